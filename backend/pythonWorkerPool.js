@@ -0,0 +1,153 @@
+// Python 常驻 worker 进程池 - 复用已初始化的 crawler_service.py，避免每个请求都启动 Python
+// 协议见 infrastructure/crawlers/worker_server.py：每行一个 JSON，按 id 对应请求和响应
+const { spawn } = require('child_process');
+const readline = require('readline');
+const path = require('path');
+
+const DEFAULT_SCRIPT = path.join(__dirname, '..', 'infrastructure', 'crawlers', 'crawler_service.py');
+
+class PythonWorkerPool {
+  /**
+   * @param {object} options
+   * @param {string} options.script  worker 脚本路径
+   * @param {number} options.size  worker 进程数
+   * @param {number} options.concurrency  每个 worker 同时执行的请求数
+   * @param {number} options.timeoutMs  默认请求超时
+   * @param {string} options.pythonBin  Python 可执行文件
+   */
+  constructor(options = {}) {
+    this.script = options.script || DEFAULT_SCRIPT;
+    this.size = options.size || parseInt(process.env.XHS_WORKER_POOL_SIZE) || 2;
+    this.concurrency = options.concurrency || 8;
+    this.timeoutMs = options.timeoutMs || 20000;
+    this.pythonBin = options.pythonBin || process.env.PYTHON_BIN || 'python';
+    this.workers = [];
+    this.nextId = 1;
+    this.closed = false;
+    this.counters = { requests: 0, timeouts: 0, failures: 0, restarts: 0 };
+  }
+
+  _spawn(slot) {
+    const proc = spawn(this.pythonBin, [this.script, 'serve', JSON.stringify({ concurrency: this.concurrency })], {
+      env: { ...process.env, PYTHONIOENCODING: 'utf-8' },
+      stdio: ['pipe', 'pipe', 'pipe']
+    });
+    const worker = { slot, proc, pending: new Map(), alive: true };
+
+    readline.createInterface({ input: proc.stdout }).on('line', (line) => {
+      let response;
+      try {
+        response = JSON.parse(line);
+      } catch (error) {
+        console.error(`worker ${proc.pid} 输出无法解析:`, line.slice(0, 200));
+        return;
+      }
+      const entry = worker.pending.get(response.id);
+      if (!entry) return; // 已超时的请求
+      worker.pending.delete(response.id);
+      clearTimeout(entry.timer);
+      entry.resolve(response.result);
+    });
+
+    // worker 日志写在 stderr，逐行转发
+    readline.createInterface({ input: proc.stderr }).on('line', (line) => {
+      if (process.env.XHS_WORKER_VERBOSE) console.error(`[worker ${proc.pid}] ${line}`);
+    });
+
+    const onExit = (reason) => {
+      if (!worker.alive) return;
+      worker.alive = false;
+      for (const entry of worker.pending.values()) {
+        clearTimeout(entry.timer);
+        entry.reject(new Error(`Python worker 已退出: ${reason}`));
+      }
+      worker.pending.clear();
+      if (!this.closed) {
+        // 意外退出时稍后重启，避免启动即崩溃时陷入死循环
+        console.error(`⚠️ Python worker ${proc.pid} 退出 (${reason})，1 秒后重启`);
+        setTimeout(() => {
+          if (this.closed) return;
+          this.counters.restarts += 1;
+          this.workers[slot] = this._spawn(slot);
+        }, 1000);
+      }
+    };
+    proc.on('exit', (code, signal) => onExit(signal || `code ${code}`));
+    proc.on('error', (error) => onExit(error.message));
+    proc.stdin.on('error', () => {}); // worker 退出后的 EPIPE 由 exit 处理
+    return worker;
+  }
+
+  _start() {
+    if (this.workers.length === 0) {
+      for (let slot = 0; slot < this.size; slot++) {
+        this.workers.push(this._spawn(slot));
+      }
+    }
+  }
+
+  _pick() {
+    // 选择执行中请求最少的存活 worker
+    let best = null;
+    for (const worker of this.workers) {
+      if (worker.alive && (!best || worker.pending.size < best.pending.size)) best = worker;
+    }
+    return best;
+  }
+
+  /**
+   * 发送请求，返回 worker 的结果对象（与命令行模式输出的 JSON 相同）
+   * @param {string} action
+   * @param {object} params
+   * @param {{timeoutMs?: number}} options
+   */
+  request(action, params = {}, options = {}) {
+    if (this.closed) return Promise.reject(new Error('Python worker 进程池已关闭'));
+    this._start();
+    const worker = this._pick();
+    if (!worker) return Promise.reject(new Error('没有可用的 Python worker'));
+
+    const timeoutMs = options.timeoutMs || this.timeoutMs;
+    const id = String(this.nextId++);
+    this.counters.requests += 1;
+
+    return new Promise((resolve, reject) => {
+      // worker 侧超时先触发并返回失败结果；这里多留 1 秒兜底 worker 无响应的情况
+      const timer = setTimeout(() => {
+        worker.pending.delete(id);
+        this.counters.timeouts += 1;
+        reject(new Error(`Python worker 请求超时: ${action}`));
+      }, timeoutMs + 1000);
+      worker.pending.set(id, {
+        timer,
+        resolve,
+        reject: (error) => {
+          this.counters.failures += 1;
+          reject(error);
+        }
+      });
+      worker.proc.stdin.write(JSON.stringify({ id, action, params, timeout: timeoutMs / 1000 }) + '\n');
+    });
+  }
+
+  stats() {
+    return {
+      ...this.counters,
+      workers: this.workers.map((worker) => ({
+        pid: worker.proc.pid,
+        alive: worker.alive,
+        inflight: worker.pending.size
+      }))
+    };
+  }
+
+  close() {
+    this.closed = true;
+    for (const worker of this.workers) {
+      // 关闭 stdin 后 worker 处理完已收到的请求再退出
+      worker.proc.stdin.end();
+    }
+  }
+}
+
+module.exports = { PythonWorkerPool };
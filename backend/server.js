@@ -4,8 +4,11 @@ const cors = require('cors');
 const fs = require('fs');
 const { spawn } = require('child_process');
 const path = require('path');
+const { PythonWorkerPool } = require('./pythonWorkerPool');
 
 const app = express();
+// 常驻 Python worker 进程池（首次请求时启动），平台统计和搜索复用已初始化的爬虫服务
+const pythonWorkers = new PythonWorkerPool();
 const PORT = 8000;
 
 // 中间件
@@ -182,62 +185,23 @@ app.get('/api/stats/platform', async (req, res) => {
   try {
     console.log('📊 调用Python爬虫获取平台统计数据...');
     
-    const pythonScript = path.join(__dirname, '..', 'services', 'real_crawler_service.py');
-    const pythonProcess = spawn('python', [pythonScript, 'get_platform_stats']);
-    
-    let output = '';
-    let errorOutput = '';
-    
-    pythonProcess.stdout.on('data', (data) => {
-      output += data.toString();
-    });
-    
-    pythonProcess.stderr.on('data', (data) => {
-      errorOutput += data.toString();
-    });
-    
-    pythonProcess.on('close', (code) => {
-      if (code === 0) {
-        try {
-          const result = JSON.parse(output);
-          if (result.success && result.data) {
-            console.log('✅ 成功获取真实平台统计数据');
-            res.json({
-              success: true,
-              stats: result.data,
-              source: 'real_crawler',
-              timestamp: new Date().toISOString()
-            });
-          } else {
-            throw new Error(result.error || '统计数据获取失败');
-          }
-        } catch (parseError) {
-          console.error('解析统计数据失败:', parseError);
-          res.json({
-            success: false,
-            stats: generateFallbackStats(),
-            source: 'fallback'
-          });
-        }
-      } else {
-        console.error('获取统计数据失败:', errorOutput);
-        res.json({
-          success: false,
-          stats: generateFallbackStats(),
-          source: 'fallback'
-        });
-      }
-    });
-    
-    // 设置超时
-    setTimeout(() => {
-      pythonProcess.kill();
+    const result = await pythonWorkers.request('get_platform_stats', {}, { timeoutMs: 20000 });
+    if (result.success && result.data) {
+      console.log('✅ 成功获取真实平台统计数据');
+      res.json({
+        success: true,
+        stats: result.data,
+        source: 'real_crawler',
+        timestamp: new Date().toISOString()
+      });
+    } else {
+      console.error('获取统计数据失败:', result.error);
       res.json({
         success: false,
         stats: generateFallbackStats(),
         source: 'fallback'
       });
-    }, 20000); // 20秒超时
+    }
     
   } catch (error) {
     console.error('获取平台统计失败:', error);
@@ -263,51 +227,23 @@ app.post('/api/topics/search', async (req, res) => {
   try {
     console.log(`🔍 搜索话题: ${keyword}`);
     
-    const pythonScript = path.join(__dirname, '..', 'services', 'real_crawler_service.py');
-    const pythonProcess = spawn('python', [pythonScript, 'search_topics', JSON.stringify({ keyword, limit })]);
-    
-    let output = '';
-    let errorOutput = '';
-    
-    pythonProcess.stdout.on('data', (data) => {
-      output += data.toString();
-    });
-    
-    pythonProcess.stderr.on('data', (data) => {
-      errorOutput += data.toString();
-    });
-    
-    pythonProcess.on('close', (code) => {
-      if (code === 0) {
-        try {
-          const result = JSON.parse(output);
-          if (result.success && result.data) {
-            console.log(`✅ 搜索到 ${result.data.length} 条相关话题`);
-            res.json({
-              success: true,
-              topics: result.data,
-              keyword,
-              source: 'real_crawler'
-            });
-          } else {
-            throw new Error(result.error || '搜索失败');
-          }
-        } catch (parseError) {
-          res.status(500).json({
-            success: false,
-            error: '搜索结果解析失败',
-            topics: []
-          });
-        }
-      } else {
-        console.error('搜索失败:', errorOutput);
-        res.status(500).json({
-          success: false,
-          error: '搜索执行失败',
-          topics: []
-        });
-      }
-    });
+    const result = await pythonWorkers.request('search_topics', { keyword, limit });
+    if (result.success && result.data) {
+      console.log(`✅ 搜索到 ${result.data.length} 条相关话题`);
+      res.json({
+        success: true,
+        topics: result.data,
+        keyword,
+        source: 'real_crawler'
+      });
+    } else {
+      console.error('搜索失败:', result.error);
+      res.status(500).json({
+        success: false,
+        error: result.error || '搜索执行失败',
+        topics: []
+      });
+    }
     
   } catch (error) {
     console.error('搜索话题失败:', error);
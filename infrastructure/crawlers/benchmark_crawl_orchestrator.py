@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发爬取基准测试 - 对比逐个关键词顺序爬取与 CrawlOrchestrator 并发爬取
+
+用法:
+    python benchmark_crawl_orchestrator.py --keywords 5 50 500 --latency 0.05 --rate 100 --max-in-flight 16
+本地启动一个模拟搜索 API（每个请求固定延迟 --latency 秒，返回 --notes 条笔记），两种方式都通过 HTTP 请求它。
+顺序爬取对应原来的 for 循环（--legacy-delay 为每个关键词之后的 sleep，默认 0 只比较请求本身）；
+并发爬取受令牌桶（--rate 个请求/秒）和 --max-in-flight 共同限制，
+服务端记录的最大并发数和峰值每秒请求数用来确认限流生效。
+"""
+
+import json
+import time
+import argparse
+import threading
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from crawl_orchestrator import CrawlOrchestrator, TokenBucket
+
+
+class MockSearchAPI:
+    """模拟小红书搜索接口，统计并发数和每秒请求数"""
+
+    def __init__(self, latency: float, notes: int):
+        self.latency = latency
+        self.notes = notes
+        self._lock = threading.Lock()
+        self.reset()
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                keyword = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query).get('keyword', [''])[0]
+                api._enter()
+                try:
+                    time.sleep(api.latency)
+                    body = json.dumps([{'note_id': f"{keyword}_{i}", 'title': f"{keyword} 笔记 {i}"}
+                                       for i in range(api.notes)], ensure_ascii=False).encode('utf-8')
+                finally:
+                    api._leave()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/search"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        with self._lock:
+            self.in_flight = 0
+            self.max_in_flight = 0
+            self.per_second: Dict[int, int] = {}
+
+    def _enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            second = int(time.monotonic())
+            self.per_second[second] = self.per_second.get(second, 0) + 1
+
+    def _leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def peak_rps(self) -> int:
+        with self._lock:
+            return max(self.per_second.values(), default=0)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_fetch(url: str):
+    def fetch(keyword: str) -> List[dict]:
+        query = urllib.parse.urlencode({'keyword': keyword})
+        with urllib.request.urlopen(f"{url}?{query}", timeout=30) as response:
+            return json.loads(response.read())
+    return fetch
+
+
+def run_sequential(fetch, keywords: List[str], delay: float) -> int:
+    """原来的实现：一个关键词爬完再爬下一个"""
+    total = 0
+    for keyword in keywords:
+        total += len(fetch(keyword))
+        if delay:
+            time.sleep(delay)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='并发爬取基准测试')
+    parser.add_argument('--keywords', type=int, nargs='+', default=[5, 50, 500])
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟接口每个请求的延迟（秒）')
+    parser.add_argument('--notes', type=int, default=20, help='每个关键词返回的笔记数')
+    parser.add_argument('--rate', type=float, default=100, help='令牌桶速率（请求/秒）')
+    parser.add_argument('--burst', type=float, default=None)
+    parser.add_argument('--max-in-flight', type=int, default=16)
+    parser.add_argument('--legacy-delay', type=float, default=0.0, help='顺序爬取时每个关键词之后的 sleep（秒）')
+    args = parser.parse_args()
+
+    api = MockSearchAPI(args.latency, args.notes)
+    fetch = make_fetch(api.url)
+    print(f"latency={args.latency * 1000:.0f}ms rate={args.rate:g}/s max_in_flight={args.max_in_flight} "
+          f"legacy_delay={args.legacy_delay:g}s")
+    print(f"{'keywords':>8} | {'sequential s':>12} | {'orchestrated s':>14} | {'speedup':>7} | "
+          f"{'peak conc':>9} | {'peak rps':>8} | {'failed':>6}")
+
+    try:
+        for count in args.keywords:
+            keywords = [f"关键词{i}" for i in range(count)]
+
+            start = time.perf_counter()
+            sequential_notes = run_sequential(fetch, keywords, args.legacy_delay)
+            sequential = time.perf_counter() - start
+
+            # 每轮使用新的令牌桶，避免上一轮透支的令牌影响本轮
+            api.reset()
+            orchestrator = CrawlOrchestrator(fetch, limiter=TokenBucket(args.rate, args.burst),
+                                             max_in_flight=args.max_in_flight)
+            start = time.perf_counter()
+            results = orchestrator.run(keywords)
+            orchestrated = time.perf_counter() - start
+
+            notes = sum(len(result['notes']) for result in results)
+            assert notes == sequential_notes, f"笔记数不一致: {notes} != {sequential_notes}"
+            print(f"{count:>8} | {sequential:12.2f} | {orchestrated:14.2f} | {sequential / orchestrated:6.1f}x | "
+                  f"{api.max_in_flight:>9} | {api.peak_rps():>8} | {orchestrator.last_run['failed']:>6}")
+    finally:
+        api.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+worker 延迟基准测试 - 对比每个请求启动一次 crawler_service.py 与常驻 worker（serve 模式）
+
+用法:
+    python benchmark_worker_latency.py --action get_platform_stats --requests 20 --concurrency 8
+冷启动每次都包含解释器启动、依赖导入和 initialize()；常驻 worker 只在启动时付出这部分开销。
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from typing import List
+
+SERVICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crawler_service.py')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def report(name: str, latencies: List[float], wall: float):
+    print(f"{name:<22} | {len(latencies):>4} | {percentile(latencies, 0.5):9.1f} | "
+          f"{percentile(latencies, 0.95):9.1f} | {max(latencies):9.1f} | {len(latencies) / wall:8.1f}")
+
+
+def run_cold(action: str, params: dict, count: int) -> List[float]:
+    """旧路径：每个请求启动一个新进程"""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SERVICE, action, json.dumps(params)],
+                       stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def run_warm(action: str, params: dict, count: int, concurrency: int):
+    """新路径：启动一个 serve 进程，先串行再并发发送请求"""
+    start = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, SERVICE, 'serve', json.dumps({'concurrency': concurrency}),
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+    )
+    waiters = {}
+
+    async def read_responses():
+        while True:
+            line = await proc.stdout.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = waiters.pop(response['id'], None)
+            if future is not None:
+                future.set_result(response['result'])
+
+    reader = asyncio.ensure_future(read_responses())
+    next_id = 0
+
+    async def request(req_action: str, req_params: dict) -> float:
+        nonlocal next_id
+        next_id += 1
+        request_id = str(next_id)
+        future = asyncio.get_running_loop().create_future()
+        waiters[request_id] = future
+        sent = time.perf_counter()
+        proc.stdin.write((json.dumps({'id': request_id, 'action': req_action, 'params': req_params}) + '\n').encode())
+        await proc.stdin.drain()
+        await future
+        return (time.perf_counter() - sent) * 1000
+
+    # 第一个请求完成时 worker 才算就绪
+    await request('ping', {})
+    startup = (time.perf_counter() - start) * 1000
+
+    sequential_start = time.perf_counter()
+    sequential = [await request(action, params) for _ in range(count)]
+    sequential_wall = time.perf_counter() - sequential_start
+
+    concurrent_start = time.perf_counter()
+    concurrent = await asyncio.gather(*(request(action, params) for _ in range(count)))
+    concurrent_wall = time.perf_counter() - concurrent_start
+
+    proc.stdin.close()
+    await proc.wait()
+    reader.cancel()
+    return startup, (sequential, sequential_wall), (list(concurrent), concurrent_wall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='worker 延迟基准测试')
+    parser.add_argument('--action', default='get_platform_stats')
+    parser.add_argument('--params', default='{}')
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    params = json.loads(args.params)
+
+    print(f"action={args.action} requests={args.requests}")
+    print(f"{'mode':<22} | {'n':>4} | {'p50 ms':>9} | {'p95 ms':>9} | {'max ms':>9} | {'req/s':>8}")
+
+    start = time.perf_counter()
+    cold = run_cold(args.action, params, args.requests)
+    report('cold spawn', cold, time.perf_counter() - start)
+
+    startup, (sequential, sequential_wall), (concurrent, concurrent_wall) = asyncio.run(
+        run_warm(args.action, params, args.requests, args.concurrency))
+    report('warm worker', sequential, sequential_wall)
+    report(f'warm worker x{args.concurrency}', concurrent, concurrent_wall)
+    print(f"worker 启动耗时: {startup:.1f} ms（只在启动时付出一次）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命令行冷启动预算检查 - 测量 crawler_service.py 等脚本单次调用的耗时，并按模块列出导入开销
+
+用法:
+    python check_startup_budget.py                                   # 默认 crawler_service.py get_platform_stats
+    python check_startup_budget.py --budget-ms 300 --runs 7
+    python check_startup_budget.py --script ../../utilities/analysis/data_analysis_service.py \\
+        --args analyze_content_performance
+冷启动耗时的中位数超过预算（--budget-ms 或环境变量 XHS_STARTUP_BUDGET_MS）时以状态码 1 退出，
+可以放进 CI 防止重新引入模块级的重量级导入。
+导入开销来自 python -X importtime：self 为模块自身执行时间，按顶层包汇总。
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+from statistics import median
+from typing import Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCRIPT = os.path.join(HERE, 'crawler_service.py')
+DEFAULT_BUDGET_MS = 400
+
+
+def run_once(command: List[str], env: Dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, check=False)
+    return (time.perf_counter() - start) * 1000
+
+
+def profile_imports(command: List[str], env: Dict[str, str]) -> List[Tuple[str, int, int]]:
+    """
+    用 -X importtime 运行一次，返回 [(模块名, self 微秒, cumulative 微秒)]
+    """
+    result = subprocess.run([command[0], '-X', 'importtime'] + command[1:], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, env=env, check=False)
+    modules = []
+    for line in result.stderr.decode('utf-8', 'replace').splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return modules
+
+
+def print_profile(modules: List[Tuple[str, int, int]], top: int):
+    by_package = defaultdict(lambda: [0, 0])
+    for name, self_us, _ in modules:
+        package = by_package[name.split('.')[0]]
+        package[0] += self_us
+        package[1] += 1
+
+    total_ms = sum(self_us for _, self_us, _ in modules) / 1000
+    print(f"\n📦 导入开销（共 {len(modules)} 个模块，{total_ms:.1f} ms），按顶层包汇总:")
+    print(f"{'package':<28} | {'modules':>7} | {'self ms':>8} | {'share':>6}")
+    for package, (self_us, count) in sorted(by_package.items(), key=lambda item: -item[1][0])[:top]:
+        print(f"{package:<28} | {count:>7} | {self_us / 1000:8.1f} | {self_us / 1000 / total_ms:6.1%}")
+
+    print(f"\n🐢 单个模块 cumulative 最大的 {top} 个:")
+    for name, _, cumulative_us in sorted(modules, key=lambda module: -module[2])[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='命令行冷启动预算检查')
+    parser.add_argument('--script', default=DEFAULT_SCRIPT)
+    parser.add_argument('--args', default='get_platform_stats', help='传给脚本的参数，空格分隔')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float,
+                        default=float(os.environ.get('XHS_STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    command = [sys.executable, os.path.abspath(args.script)] + args.args.split()
+    env = dict(os.environ)
+
+    # 第一次运行生成 .pyc 并预热文件缓存，不计入结果
+    run_once(command, env)
+    timings = [run_once(command, env) for _ in range(args.runs)]
+    print_profile(profile_imports(command, env), args.top)
+
+    cold_start = median(timings)
+    print(f"\n⏱️ {os.path.basename(args.script)} {args.args}: 中位数 {cold_start:.1f} ms "
+          f"(最小 {min(timings):.1f} / 最大 {max(timings):.1f}，{args.runs} 次)，预算 {args.budget_ms:.0f} ms")
+    if cold_start > args.budget_ms:
+        print(f"❌ 超出启动预算 {cold_start - args.budget_ms:.1f} ms")
+        sys.exit(1)
+    print("✅ 在启动预算内")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发爬取编排 - 多个关键词同时爬取，由全局令牌桶控制请求速率
+
+    orchestrator = CrawlOrchestrator(lambda kw: crawler.search_notes(kw, limit=10))
+    results = orchestrator.run(keywords)            # 同步调用，按输入顺序返回
+    async for result in orchestrator.stream(keywords):   # 异步调用，每个关键词完成即返回
+        ...
+
+每个关键词的结果为 {'keyword', 'notes', 'error', 'elapsed_ms'}；单个关键词失败或超时只记录 error，不影响其他关键词。
+fetch 可以是协程函数，也可以是普通函数（在线程池中执行，requests 等阻塞调用不会卡住事件循环）。
+
+速率限制:
+    - TokenBucket: 每个关键词开始前取一个令牌，rate 为每秒令牌数，burst 为最多攒下的令牌数；
+      令牌桶用线程锁计时，不绑定事件循环，同一进程内的多次 run()、多个线程可以共用
+    - max_in_flight: 同一次编排中同时执行的关键词数上限
+get_rate_limiter() 返回进程内共享的令牌桶，速率由 XHS_CRAWL_RATE / XHS_CRAWL_BURST 配置。
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = None):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            burst: 桶容量，空闲后最多可以连续发出的请求数，默认 max(1, rate)
+        """
+        self.rate = rate
+        self.burst = max(1.0, rate) if burst is None else burst
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._counters = {'acquired': 0, 'waited': 0, 'wait_s_total': 0.0, 'wait_s_max': 0.0}
+
+    def _reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数；令牌可以透支，等待者按预约顺序放行"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = max(0.0, -self._tokens / self.rate)
+            self._counters['acquired'] += 1
+            if wait > 0:
+                self._counters['waited'] += 1
+                self._counters['wait_s_total'] += wait
+                self._counters['wait_s_max'] = max(self._counters['wait_s_max'], wait)
+            return wait
+
+    async def acquire(self):
+        """协程中取一个令牌"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self):
+        """线程中取一个令牌（阻塞等待）"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+        stats['rate'] = self.rate
+        stats['burst'] = self.burst
+        stats['wait_s_total'] = round(stats['wait_s_total'], 3)
+        stats['wait_s_max'] = round(stats['wait_s_max'], 3)
+        return stats
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucket:
+    """进程内共享的令牌桶（首次使用时按环境变量创建）"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            rate = float(os.environ.get('XHS_CRAWL_RATE', 1.0))
+            burst = os.environ.get('XHS_CRAWL_BURST')
+            _rate_limiter = TokenBucket(rate, float(burst) if burst else None)
+        return _rate_limiter
+
+
+class CrawlOrchestrator:
+    def __init__(self, fetch: Callable[[str], Any], limiter: TokenBucket = None,
+                 max_in_flight: int = None, timeout: float = None):
+        """
+        Args:
+            fetch: 爬取单个关键词，返回笔记列表；协程函数或普通函数
+            limiter: 令牌桶，默认 get_rate_limiter()
+            max_in_flight: 同时执行的关键词数，默认 XHS_CRAWL_MAX_IN_FLIGHT 或 4
+            timeout: 单个关键词的超时（秒），None 表示不限
+        """
+        self.fetch = fetch
+        self.limiter = limiter or get_rate_limiter()
+        self.max_in_flight = max_in_flight or int(os.environ.get('XHS_CRAWL_MAX_IN_FLIGHT', 4))
+        self.timeout = timeout
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    async def stream(self, keywords: Iterable[str]) -> AsyncIterator[Dict[str, Any]]:
+        """并发爬取，按完成顺序逐个返回关键词结果；重复的关键词只爬一次"""
+        keywords = list(dict.fromkeys(keywords))
+        if not keywords:
+            return
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        is_async = asyncio.iscoroutinefunction(self.fetch)
+        executor = None if is_async else ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                                            thread_name_prefix='crawl')
+
+        async def crawl_one(keyword: str) -> Dict[str, Any]:
+            async with semaphore:
+                await self.limiter.acquire()
+                start = time.perf_counter()
+                call = self.fetch(keyword) if is_async else loop.run_in_executor(executor, self.fetch, keyword)
+                try:
+                    notes = await asyncio.wait_for(call, self.timeout)
+                    result = {'keyword': keyword, 'notes': list(notes or []), 'error': None}
+                except asyncio.TimeoutError:
+                    result = {'keyword': keyword, 'notes': [], 'error': f"超时（{self.timeout:g} 秒）"}
+                except Exception as e:
+                    result = {'keyword': keyword, 'notes': [], 'error': str(e)}
+                result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+                if result['error']:
+                    logger.warning(f"⚠️ 爬取关键词 {keyword} 失败: {result['error']}")
+                return result
+
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(crawl_one(keyword)) for keyword in keywords]
+        summary = {'keywords': len(keywords), 'failed': 0, 'notes': 0}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                summary['notes'] += len(result['notes'])
+                summary['failed'] += 1 if result['error'] else 0
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+            summary['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            self.last_run = summary
+
+    async def crawl(self, keywords: Iterable[str],
+                    on_result: Callable[[Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+        """并发爬取全部关键词，结果按输入顺序返回；on_result 在每个关键词完成时调用"""
+        keywords = list(dict.fromkeys(keywords))
+        results = {}
+        async for result in self.stream(keywords):
+            results[result['keyword']] = result
+            if on_result:
+                on_result(result)
+        return [results[keyword] for keyword in keywords]
+
+    def run(self, keywords: Iterable[str],
+            on_result: Callable[[Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+        """同步入口（调度器线程、命令行），不能在已运行的事件循环中调用"""
+        return asyncio.run(self.crawl(keywords, on_result))
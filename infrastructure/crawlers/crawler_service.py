@@ -3,6 +3,10 @@
 """
 真实数据爬取服务
 集成MediaCrawler实现真实的小红书数据获取
+
+用法:
+    python crawler_service.py <action> ['{"limit": 20}']   # 单次调用
+    python crawler_service.py serve ['{"socket": "/tmp/xhs.sock"}']   # 常驻 worker，见 worker_server.py
 """
 
 import sys
@@ -10,13 +14,20 @@ import os
 import json
 import asyncio
 import logging
-import mysql.connector
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
-import redis
 
 # 添加crawler目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'crawler'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
+
+from storage_backends import create_backend
+from rollups import RollupStore
+from mysql_pool import get_pool
+from redis_cache import AsyncCache
+from worker_server import WorkerServer
+from category_classifier import get_classifier
+from topic_aggregator import TopicAggregator
 
 try:
     from media_platform.xhs.core import XhsCrawler
@@ -34,6 +45,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 热门话题的缓存键（与请求的 limit 无关）
+HOT_TOPICS_CACHE_KEY = "hot_topics"
+
+# 没有统计数据时的默认热门分类（分类名与共享分类器一致）
+DEFAULT_TOP_CATEGORY = '穿搭'
+
 class RealCrawlerService:
     def __init__(self):
         self.crawler = None
@@ -45,15 +62,36 @@ class RealCrawlerService:
             'database': 'xiaohongshu_data',
             'charset': 'utf8mb4'
         }
-        self.redis_client = None
+        # 异步 Redis 缓存，Redis 不可用时退化为进程内缓存
+        self.cache = AsyncCache(os.environ.get('XHS_REDIS_URL', 'redis://localhost:6379/0'))
+        # 热门话题缓存的列表长度，以及过了 5 分钟新鲜期后仍可返回旧数据的时间（秒）
+        self.hot_topics_cache_size = int(os.environ.get('XHS_HOT_TOPICS_CACHE_SIZE', 50))
+        self.hot_topics_stale_ttl = int(os.environ.get('XHS_HOT_TOPICS_STALE_TTL', 1800))
         self.initialized = False
+        # 存储后端: mysql（默认）/ sqlite（单机无外部数据库）/ mongo
+        self.storage_kind = os.environ.get('XHS_STORAGE_BACKEND', 'mysql')
+        self.storage = None
+        # 跨批次累计的话题统计，热门话题按 XHS_TOPIC_WINDOW（1h / 24h / 7d）窗口排序
+        self.topic_aggregator = TopicAggregator(classify=self._classify_topic)
+        self.topic_window = os.environ.get('XHS_TOPIC_WINDOW', '24h')
+        # 笔记/话题每批写入的行数
+        self.write_batch_size = int(os.environ.get('XHS_WRITE_BATCH_SIZE', 500))
+    
+    def get_storage(self):
+        """获取存储后端（首次使用时创建）"""
+        if self.storage is None:
+            if self.storage_kind == 'mysql':
+                self.storage = create_backend('mysql', db_config=self.db_config, rollups=RollupStore(),
+                                              batch_size=self.write_batch_size)
+            elif self.storage_kind == 'sqlite':
+                self.storage = create_backend('sqlite', rollups=RollupStore(), batch_size=self.write_batch_size)
+            else:
+                self.storage = create_backend(self.storage_kind)
+        return self.storage
         
     async def initialize(self):
         """初始化服务"""
         try:
-            # 初始化Redis连接
-            self.redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
-            
             # 检查MediaCrawler是否可用
             if not CRAWLER_AVAILABLE:
                 logger.warning("MediaCrawler不可用，将使用模拟数据")
@@ -74,55 +112,33 @@ class RealCrawlerService:
             return False
     
     def get_db_connection(self):
-        """获取数据库连接"""
+        """从共享连接池借出数据库连接，close() 时归还"""
         try:
-            return mysql.connector.connect(**self.db_config)
+            return get_pool(self.db_config).get_connection()
         except Exception as e:
             logger.error(f"数据库连接失败: {e}")
             return None
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """MySQL 连接池的连接数和借出等待时间"""
+        return {"success": True, "data": get_pool(self.db_config).stats()}
+    
     async def crawl_hot_topics(self, limit: int = 20) -> Dict[str, Any]:
         """爬取热门话题"""
         try:
-            # 检查缓存
-            cache_key = f"hot_topics:{limit}"
-            cached_data = self.redis_client.get(cache_key) if self.redis_client else None
-            
-            if cached_data:
-                logger.info("从缓存获取热门话题数据")
-                return json.loads(cached_data)
-            
-            # 尝试使用真实爬虫
-            if CRAWLER_AVAILABLE and self.crawler:
-                try:
-                    # 使用MediaCrawler获取热门笔记
-                    notes = await self.crawler.search_notes("热门", limit=limit)
-                    topics = self._process_notes_to_topics(notes)
-                    
-                    # 保存到数据库
-                    await self._save_topics_to_db(topics)
-                    
-                    result = {
-                        "success": True,
-                        "data": topics,
-                        "source": "real_crawler",
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    
-                    # 缓存结果（5分钟）
-                    if self.redis_client:
-                        self.redis_client.setex(cache_key, 300, json.dumps(result))
-                    
-                    logger.info(f"成功爬取 {len(topics)} 个热门话题")
-                    return result
-                    
-                except Exception as e:
-                    logger.error(f"真实爬虫失败: {e}")
-                    # 降级到数据库数据
-                    return await self._get_topics_from_db(limit)
+            # 缓存与 limit 无关：只缓存一份最长的列表，按请求的数量截取
+            if limit > self.hot_topics_cache_size:
+                result = await self._refresh_hot_topics(limit)
             else:
-                # 从数据库获取数据
-                return await self._get_topics_from_db(limit)
+                result = await self.cache.get_or_refresh(
+                    HOT_TOPICS_CACHE_KEY,
+                    lambda: self._refresh_hot_topics(self.hot_topics_cache_size),
+                    ttl=300,
+                    stale_ttl=self.hot_topics_stale_ttl,
+                    # 只缓存真实爬虫的结果，数据库降级数据下次仍重试爬虫
+                    should_cache=lambda value: value.get("source") == "real_crawler"
+                )
+            return dict(result, data=result.get("data", [])[:limit])
                 
         except Exception as e:
             logger.error(f"获取热门话题失败: {e}")
@@ -133,6 +149,34 @@ class RealCrawlerService:
                 "source": "fallback"
             }
     
+    async def _refresh_hot_topics(self, limit: int) -> Dict[str, Any]:
+        """爬取并保存热门话题；同一时刻只由一个调用者执行（见 AsyncCache.get_or_refresh）"""
+        # 尝试使用真实爬虫
+        if CRAWLER_AVAILABLE and self.crawler:
+            try:
+                # 使用MediaCrawler获取热门笔记
+                notes = await self.crawler.search_notes("热门", limit=limit)
+                topics = self._process_notes_to_topics(notes, limit)
+                
+                # 保存到数据库
+                await self._save_topics_to_db(topics)
+                
+                logger.info(f"成功爬取 {len(topics)} 个热门话题")
+                return {
+                    "success": True,
+                    "data": topics,
+                    "source": "real_crawler",
+                    "timestamp": datetime.now().isoformat()
+                }
+                
+            except Exception as e:
+                logger.error(f"真实爬虫失败: {e}")
+                # 降级到数据库数据
+                return await self._get_topics_from_db(limit)
+        else:
+            # 从数据库获取数据
+            return await self._get_topics_from_db(limit)
+    
     async def crawl_user_notes(self, user_id: str, limit: int = 20) -> Dict[str, Any]:
         """爬取用户笔记"""
         try:
@@ -184,35 +228,17 @@ class RealCrawlerService:
         try:
             # 检查缓存
             cache_key = "platform_stats"
-            cached_data = self.redis_client.get(cache_key) if self.redis_client else None
+            cached_data = await self.cache.get(cache_key)
             
             if cached_data:
-                return json.loads(cached_data)
+                return cached_data
             
-            # 从数据库计算统计数据
-            conn = self.get_db_connection()
-            if not conn:
+            # 数据库查询在线程池中执行，常驻 worker 中其他请求不会被阻塞
+            loop = asyncio.get_running_loop()
+            stats = await loop.run_in_executor(None, self._read_platform_stats)
+            if stats is None:
                 return self._generate_fallback_stats()
             
-            cursor = conn.cursor(dictionary=True)
-            
-            # 获取最新统计数据
-            cursor.execute("""
-                SELECT * FROM xhs_platform_stats 
-                WHERE stat_date = CURDATE()
-                ORDER BY created_time DESC 
-                LIMIT 1
-            """)
-            
-            stats = cursor.fetchone()
-            
-            if not stats:
-                # 如果没有今天的数据，计算实时统计
-                stats = await self._calculate_real_time_stats(cursor)
-            
-            cursor.close()
-            conn.close()
-            
             result = {
                 "success": True,
                 "data": {
@@ -221,14 +247,13 @@ class RealCrawlerService:
                     "dailyPosts": stats.get('daily_posts', 0),
                     "totalInteractions": stats.get('total_interactions', 0),
                     "avgEngagementRate": float(stats.get('avg_engagement_rate', 0)),
-                    "topCategory": stats.get('top_category', '时尚')
+                    "topCategory": stats.get('top_category', DEFAULT_TOP_CATEGORY)
                 },
                 "source": "database"
             }
             
             # 缓存结果（10分钟）
-            if self.redis_client:
-                self.redis_client.setex(cache_key, 600, json.dumps(result))
+            await self.cache.set(cache_key, result, 600)
             
             return result
             
@@ -240,214 +265,135 @@ class RealCrawlerService:
                 "data": self._generate_fallback_stats()
             }
     
-    def _process_notes_to_topics(self, notes: List[Dict]) -> List[Dict]:
-        """将笔记数据处理为话题数据"""
-        topic_stats = {}
-        
-        for note in notes:
-            # 提取标签作为话题
-            tags = note.get('tag_list', [])
-            for tag in tags:
-                topic_name = tag.get('name', '')
-                if not topic_name:
-                    continue
-                
-                if topic_name not in topic_stats:
-                    topic_stats[topic_name] = {
-                        'id': f"topic_{len(topic_stats)}",
-                        'title': topic_name,
-                        'category': self._classify_topic(topic_name),
-                        'likeCount': 0,
-                        'commentCount': 0,
-                        'shareCount': 0,
-                        'viewCount': 0,
-                        'noteCount': 0,
-                        'trendScore': 0
-                    }
-                
-                # 累加统计数据
-                interact_info = note.get('interact_info', {})
-                topic_stats[topic_name]['likeCount'] += int(interact_info.get('liked_count', 0))
-                topic_stats[topic_name]['commentCount'] += int(interact_info.get('comment_count', 0))
-                topic_stats[topic_name]['shareCount'] += int(interact_info.get('share_count', 0))
-                topic_stats[topic_name]['noteCount'] += 1
+    def _read_platform_stats(self) -> Optional[Dict[str, Any]]:
+        """读取今天的平台统计（阻塞调用），数据库不可用时返回 None"""
+        if self.storage_kind != 'mysql':
+            # 其他存储后端没有 xhs_platform_stats 表，直接从存储统计
+            return self._stats_from_storage()
         
-        # 计算趋势分数并排序
-        topics = []
-        for topic_name, stats in topic_stats.items():
-            stats['trendScore'] = (
-                stats['likeCount'] * 0.3 + 
-                stats['commentCount'] * 0.5 + 
-                stats['shareCount'] * 0.2 + 
-                stats['noteCount'] * 10
-            ) / 100
-            
-            stats['publishTime'] = datetime.now().isoformat()
-            topics.append(stats)
-        
-        return sorted(topics, key=lambda x: x['trendScore'], reverse=True)
-    
-    def _classify_topic(self, topic_name: str) -> str:
-        """分类话题"""
-        fashion_keywords = ['穿搭', '时尚', '搭配', '服装', '鞋子', '包包']
-        beauty_keywords = ['美妆', '护肤', '化妆', '口红', '面膜', '精华']
-        food_keywords = ['美食', '餐厅', '料理', '甜品', '咖啡', '奶茶']
-        travel_keywords = ['旅行', '旅游', '景点', '攻略', '酒店', '机票']
-        life_keywords = ['生活', '好物', '家居', '收纳', '清洁', '日常']
-        fitness_keywords = ['健身', '运动', '瑜伽', '减肥', '塑形', '跑步']
-        study_keywords = ['学习', '读书', '考试', '技能', '课程', '知识']
-        pet_keywords = ['宠物', '猫咪', '狗狗', '萌宠', '养宠', '动物']
-        
-        topic_lower = topic_name.lower()
+        conn = self.get_db_connection()
+        if not conn:
+            return None
         
-        if any(keyword in topic_lower for keyword in fashion_keywords):
-            return '时尚'
-        elif any(keyword in topic_lower for keyword in beauty_keywords):
-            return '美妆'
-        elif any(keyword in topic_lower for keyword in food_keywords):
-            return '美食'
-        elif any(keyword in topic_lower for keyword in travel_keywords):
-            return '旅行'
-        elif any(keyword in topic_lower for keyword in life_keywords):
-            return '生活'
-        elif any(keyword in topic_lower for keyword in fitness_keywords):
-            return '健身'
-        elif any(keyword in topic_lower for keyword in study_keywords):
-            return '学习'
-        elif any(keyword in topic_lower for keyword in pet_keywords):
-            return '宠物'
-        else:
-            return '其他'
-    
-    async def _save_topics_to_db(self, topics: List[Dict]):
-        """保存话题数据到数据库"""
         try:
-            conn = self.get_db_connection()
-            if not conn:
-                return
+            cursor = conn.cursor(dictionary=True)
             
-            cursor = conn.cursor()
+            # 获取最新统计数据
+            cursor.execute("""
+                SELECT * FROM xhs_platform_stats 
+                WHERE stat_date = CURDATE()
+                ORDER BY created_time DESC 
+                LIMIT 1
+            """)
             
-            for topic in topics:
-                cursor.execute("""
-                    INSERT INTO xhs_topics 
-                    (keyword, heat_score, note_count, total_likes, total_comments, category, date)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                        heat_score = VALUES(heat_score),
-                        note_count = VALUES(note_count),
-                        total_likes = VALUES(total_likes),
-                        total_comments = VALUES(total_comments)
-                """, (
-                    topic['title'],
-                    topic['trendScore'],
-                    topic['noteCount'],
-                    topic['likeCount'],
-                    topic['commentCount'],
-                    topic['category'],
-                    datetime.now().date()
-                ))
+            stats = cursor.fetchone()
+            
+            if not stats:
+                # 如果没有今天的数据，计算实时统计
+                stats = self._calculate_real_time_stats(cursor)
             
-            conn.commit()
             cursor.close()
+            return stats
+        finally:
             conn.close()
+    
+    def _process_notes_to_topics(self, notes: List[Dict], limit: int = 50) -> List[Dict]:
+        """把新爬取的笔记累计到话题聚合器，返回窗口内趋势分数最高的 limit 个话题"""
+        self.topic_aggregator.ingest(notes)
+        return self.topic_aggregator.top(limit, self.topic_window)
+    
+    def _classify_topic(self, topic_name: str) -> str:
+        """分类话题（共享分类器，见 category_classifier.py）"""
+        return get_classifier().category_of(topic_name)
+    
+    async def _save_topics_to_db(self, topics: List[Dict]) -> Optional[Dict[str, Any]]:
+        """保存话题数据到数据库（在线程池中执行，不阻塞事件循环），返回分批耗时"""
+        try:
+            loop = asyncio.get_running_loop()
+            saved, report = await loop.run_in_executor(None, self._write_topics, topics)
             
-            logger.info(f"成功保存 {len(topics)} 个话题到数据库")
+            logger.info(f"成功保存 {saved} 个话题到数据库{self._format_write_report(report)}")
+            return report
             
         except Exception as e:
             logger.error(f"保存话题到数据库失败: {e}")
+            return None
     
-    async def _save_notes_to_db(self, notes: List[Dict]):
-        """保存笔记数据到数据库"""
+    def _write_topics(self, topics: List[Dict]):
+        storage = self.get_storage()
+        saved = storage.save_topics(topics, datetime.now().date())
+        return saved, storage.last_write_report
+    
+    async def _save_notes_to_db(self, notes: List[Dict]) -> Optional[Dict[str, Any]]:
+        """保存笔记数据到数据库（在线程池中执行，不阻塞事件循环），返回分批耗时"""
         try:
-            conn = self.get_db_connection()
-            if not conn:
-                return
-            
-            cursor = conn.cursor()
-            
-            for note in notes:
-                user_info = note.get('user', {})
-                interact_info = note.get('interact_info', {})
-                
-                cursor.execute("""
-                    INSERT INTO xhs_notes 
-                    (id, title, content, note_type, user_id, user_nickname, user_avatar,
-                     like_count, collect_count, comment_count, share_count,
-                     publish_time, tags, images, category)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                        like_count = VALUES(like_count),
-                        collect_count = VALUES(collect_count),
-                        comment_count = VALUES(comment_count),
-                        share_count = VALUES(share_count)
-                """, (
-                    note.get('id'),
-                    note.get('title', ''),
-                    note.get('desc', ''),
-                    note.get('type', 'normal'),
-                    user_info.get('user_id'),
-                    user_info.get('nickname'),
-                    user_info.get('avatar'),
-                    int(interact_info.get('liked_count', 0)),
-                    int(interact_info.get('collected_count', 0)),
-                    int(interact_info.get('comment_count', 0)),
-                    int(interact_info.get('share_count', 0)),
-                    datetime.fromtimestamp(note.get('time', 0)),
-                    json.dumps(note.get('tag_list', [])),
-                    json.dumps(note.get('image_list', [])),
-                    self._classify_topic(note.get('title', ''))
-                ))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
+            loop = asyncio.get_running_loop()
+            saved, total, report = await loop.run_in_executor(None, self._write_notes, notes)
             
-            logger.info(f"成功保存 {len(notes)} 条笔记到数据库")
+            logger.info(f"成功保存 {saved} 条笔记到数据库，{total - saved} 条未变化已跳过"
+                        f"{self._format_write_report(report)}")
+            return report
             
         except Exception as e:
             logger.error(f"保存笔记到数据库失败: {e}")
+            return None
+    
+    @staticmethod
+    def _format_write_report(report: Optional[Dict[str, Any]]) -> str:
+        if not report or not report['batches']:
+            return ''
+        slowest = max(batch['ms'] for batch in report['batches'])
+        return f"（{len(report['batches'])} 批, 共 {report['ms']:.1f} ms, 最慢一批 {slowest:.1f} ms）"
+    
+    def _write_notes(self, notes: List[Dict]):
+        """把爬虫返回的笔记转换为 xhs_notes 行并批量写入"""
+        rows = []
+        for note in notes:
+            user_info = note.get('user', {})
+            interact_info = note.get('interact_info', {})
+            
+            rows.append({
+                'id': note.get('id'),
+                'title': note.get('title', ''),
+                'content': note.get('desc', ''),
+                'note_type': note.get('type', 'normal'),
+                'user_id': user_info.get('user_id'),
+                'user_nickname': user_info.get('nickname'),
+                'user_avatar': user_info.get('avatar'),
+                'like_count': int(interact_info.get('liked_count', 0)),
+                'collect_count': int(interact_info.get('collected_count', 0)),
+                'comment_count': int(interact_info.get('comment_count', 0)),
+                'share_count': int(interact_info.get('share_count', 0)),
+                'publish_time': datetime.fromtimestamp(note.get('time', 0)),
+                'tags': note.get('tag_list', []),
+                'images': note.get('image_list', []),
+                'category': self._classify_topic(note.get('title', ''))
+            })
+        
+        storage = self.get_storage()
+        saved = storage.save_notes(rows)
+        return saved, len(rows), storage.last_write_report
     
     async def _get_topics_from_db(self, limit: int) -> Dict[str, Any]:
         """从数据库获取话题数据"""
         try:
-            conn = self.get_db_connection()
-            if not conn:
-                return {
-                    "success": False,
-                    "data": self._generate_fallback_topics(limit),
-                    "source": "fallback"
-                }
-            
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT keyword as title, heat_score as trendScore, note_count as noteCount,
-                       total_likes as likeCount, total_comments as commentCount,
-                       category, date as publishTime
-                FROM xhs_topics 
-                WHERE date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
-                ORDER BY heat_score DESC 
-                LIMIT %s
-            """, (limit,))
-            
-            topics = cursor.fetchall()
-            cursor.close()
-            conn.close()
+            loop = asyncio.get_running_loop()
+            topics = await loop.run_in_executor(None, lambda: self.get_storage().get_topics(limit=limit, days=7))
             
             # 转换数据格式
             formatted_topics = []
             for i, topic in enumerate(topics):
                 formatted_topics.append({
                     'id': f"db_topic_{i}",
-                    'title': topic['title'],
+                    'title': topic['keyword'],
                     'category': topic['category'],
-                    'trendScore': float(topic['trendScore']),
-                    'noteCount': topic['noteCount'],
-                    'likeCount': topic['likeCount'],
-                    'commentCount': topic['commentCount'],
-                    'shareCount': topic['likeCount'] // 10,  # 估算
-                    'viewCount': topic['likeCount'] * 20,   # 估算
-                    'publishTime': topic['publishTime'].isoformat() if topic['publishTime'] else datetime.now().isoformat()
+                    'trendScore': float(topic['heat_score']),
+                    'noteCount': topic['note_count'],
+                    'likeCount': topic['total_likes'],
+                    'commentCount': topic['total_comments'],
+                    'shareCount': topic['total_likes'] // 10,  # 估算
+                    'viewCount': topic['total_likes'] * 20,   # 估算
+                    'publishTime': topic['date'].isoformat() if topic['date'] else datetime.now().isoformat()
                 })
             
             return {
@@ -469,7 +415,7 @@ class RealCrawlerService:
         import random
         
         topics = []
-        categories = ['时尚', '美妆', '生活', '美食', '旅行', '健身', '学习', '宠物']
+        categories = list(get_classifier().taxonomy)
         keywords = ['穿搭', '护肤', '好物', '美食', '攻略', '健身', '学习', '萌宠']
         
         for i in range(limit):
@@ -501,10 +447,20 @@ class RealCrawlerService:
             "dailyPosts": random.randint(50000, 80000),
             "totalInteractions": random.randint(1000000, 2000000),
             "avgEngagementRate": round(random.uniform(10, 20), 1),
-            "topCategory": "时尚"
+            "topCategory": DEFAULT_TOP_CATEGORY
+        }
+    
+    def _stats_from_storage(self) -> Dict[str, Any]:
+        """把存储后端的统计转换为 xhs_platform_stats 的字段"""
+        stats = self.get_storage().get_statistics()
+        by_category = stats.get('notes_by_category', {})
+        return {
+            'total_notes': stats.get('total_notes', 0),
+            'daily_posts': stats.get('recent_notes', 0) // 7,
+            'top_category': next(iter(by_category), DEFAULT_TOP_CATEGORY)
         }
     
-    async def _calculate_real_time_stats(self, cursor) -> Dict[str, Any]:
+    def _calculate_real_time_stats(self, cursor) -> Dict[str, Any]:
         """计算实时统计数据"""
         # 这里可以实现实时统计计算逻辑
         # 暂时返回默认值
@@ -514,12 +470,48 @@ class RealCrawlerService:
             'daily_posts': 3200,
             'total_interactions': 1224000,
             'avg_engagement_rate': 15.5,
-            'top_category': '时尚'
+            'top_category': DEFAULT_TOP_CATEGORY
         }
 
 # 全局服务实例
 crawler_service = RealCrawlerService()
 
+async def handle_action(action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """执行一个操作，命令行模式和常驻 worker 模式共用"""
+    if action == "get_trending_topics":
+        return await crawler_service.crawl_hot_topics(params.get("limit", 20))
+    elif action == "get_platform_stats":
+        return await crawler_service.get_platform_stats()
+    elif action == "get_pool_stats":
+        return crawler_service.get_pool_stats()
+    elif action == "get_cache_stats":
+        return {"success": True, "data": crawler_service.cache.stats()}
+    elif action == "search_topics":
+        return await crawler_service.search_notes(
+            params.get("keyword", ""),
+            params.get("limit", 20)
+        )
+    return {"success": False, "error": f"未知操作: {action}", "data": None}
+
+async def serve(params: Dict[str, Any]):
+    """
+    常驻 worker 模式，初始化一次后持续处理请求
+
+    params:
+        socket: Unix socket 路径，不指定时使用 stdin/stdout
+        concurrency: 最多同时执行的请求数
+        timeout: 默认请求超时（秒）
+    """
+    server = WorkerServer(
+        handle_action,
+        concurrency=int(params.get("concurrency", os.environ.get('XHS_WORKER_CONCURRENCY', 8))),
+        default_timeout=float(params.get("timeout", 20))
+    )
+    if params.get("socket"):
+        await server.serve_unix(params["socket"])
+    else:
+        await server.serve_stdio()
+
 async def main():
     """主函数 - 处理命令行调用"""
     if len(sys.argv) < 2:
@@ -533,23 +525,20 @@ async def main():
     await crawler_service.initialize()
     
     try:
-        if action == "get_trending_topics":
-            result = await crawler_service.crawl_hot_topics(params.get("limit", 20))
-        elif action == "get_platform_stats":
-            result = await crawler_service.get_platform_stats()
-        elif action == "search_topics":
-            result = await crawler_service.search_notes(
-                params.get("keyword", ""),
-                params.get("limit", 20)
-            )
-        else:
-            result = {"success": False, "error": f"未知操作: {action}", "data": None}
+        if action == "serve":
+            await serve(params)
+            return
         
+        result = await handle_action(action, params)
         print(json.dumps(result, ensure_ascii=False, default=str))
         
     except Exception as e:
         error_result = {"success": False, "error": str(e), "data": None}
         print(json.dumps(error_result, ensure_ascii=False))
+    finally:
+        # 命令行模式下进程随即退出，先等后台刷新写完缓存
+        await crawler_service.cache.drain()
+        await crawler_service.cache.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
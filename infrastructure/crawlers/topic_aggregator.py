@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+话题聚合器 - 按标签增量累计笔记互动数据，维护多个滑动时间窗口
+
+每个爬取批次调用 ingest(notes)：互动增量记入当前时间桶（bucket_seconds 秒一个），
+同时加到每个窗口（默认 1h / 24h / 7d）的按标签累计值上；时间桶滑出窗口时再从该窗口的累计值中减去，
+因此查询不需要重新扫描历史数据。
+同一篇笔记再次出现时只累计互动数的变化量，不重复计数（与 rollups.rollup_deltas 相同）；
+笔记的标签变化时，被去掉的标签减去该笔记此前记入的全部增量，新加的标签按新笔记计入。
+
+top(k, window) 用堆选出 trendScore 最高的 k 个话题，不对全部标签排序；
+话题 id 由标签名哈希得到，同一标签在不同批次、不同进程中的 id 相同。
+"""
+
+import bisect
+import hashlib
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List
+
+# 窗口名称 -> 长度（秒）
+DEFAULT_WINDOWS = {'1h': 3600, '24h': 86400, '7d': 7 * 86400}
+
+# 累计值的下标: 点赞、评论、分享、新笔记数
+_LIKES, _COMMENTS, _SHARES, _NOTES = range(4)
+
+
+def topic_id(tag: str) -> str:
+    """由标签名生成稳定的话题 id"""
+    return 'topic_' + hashlib.blake2b(tag.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def trend_score(counts: List[int]) -> float:
+    """与原 _process_notes_to_topics 相同的趋势分数"""
+    return (
+        counts[_LIKES] * 0.3 +
+        counts[_COMMENTS] * 0.5 +
+        counts[_SHARES] * 0.2 +
+        counts[_NOTES] * 10
+    ) / 100
+
+
+def _note_tags(note: Dict[str, Any]) -> tuple:
+    """笔记的标签名（去重，保持顺序）"""
+    names = []
+    for tag in note.get('tag_list') or []:
+        name = tag.get('name', '') if isinstance(tag, dict) else str(tag)
+        if name and name not in names:
+            names.append(name)
+    return tuple(names)
+
+
+def _note_counts(note: Dict[str, Any]) -> tuple:
+    interact_info = note.get('interact_info') or {}
+    return (int(interact_info.get('liked_count', 0) or 0),
+            int(interact_info.get('comment_count', 0) or 0),
+            int(interact_info.get('share_count', 0) or 0))
+
+
+class TopicAggregator:
+    def __init__(self, windows: Dict[str, float] = None, bucket_seconds: int = 60,
+                 classify: Callable[[str], str] = None):
+        """
+        Args:
+            windows: 窗口名称 -> 长度（秒），默认 DEFAULT_WINDOWS
+            bucket_seconds: 时间桶长度，窗口边界的精度
+            classify: 标签 -> 分类名，每个标签只调用一次
+        """
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        self.bucket_seconds = bucket_seconds
+        self.classify = classify
+        self._max_span = max(self.windows.values())
+        self._lock = threading.Lock()
+        # 时间桶起点（升序）和每个桶内的按标签增量
+        self._bucket_keys: List[int] = []
+        self._buckets: Dict[int, Dict[str, List[int]]] = {}
+        # 每个窗口的按标签累计值，以及已从该窗口减去的最后一个桶
+        self._totals: Dict[str, Dict[str, List[int]]] = {name: {} for name in self.windows}
+        self._expired_through: Dict[str, float] = {name: float('-inf') for name in self.windows}
+        # 笔记 id -> (最后出现时间, 互动数, 标签, {标签: [(时间桶, 增量)]})，按最后出现时间排序，超过最长窗口后丢弃
+        self._notes: "OrderedDict[str, tuple]" = OrderedDict()
+        self._last_seen: Dict[str, float] = {}
+        self._categories: Dict[str, str] = {}
+
+    def ingest(self, notes: Iterable[Dict[str, Any]], now: float = None) -> int:
+        """
+        累计一批笔记，返回对话题有影响的笔记数
+
+        Args:
+            notes: MediaCrawler 格式的笔记（tag_list / interact_info）
+            now: 这批数据的时间戳，默认当前时间
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            bucket = self._bucket(now)
+            applied = 0
+            cutoff = now - self._max_span
+            for note in notes:
+                tags = _note_tags(note)
+                note_id = note.get('note_id') or note.get('id')
+                previous = self._notes.pop(note_id, None) if note_id else None
+                if not tags and previous is None:
+                    continue
+                counts = _note_counts(note)
+                history = {} if previous is None else previous[3]
+                changed = False
+
+                # 被去掉的标签：撤回该笔记在仍保留的时间桶中记入的增量
+                for tag in (previous[2] if previous else ()):
+                    if tag not in tags:
+                        for contributed_bucket, delta in history.pop(tag, ()):
+                            self._retract(contributed_bucket, tag, delta)
+                        changed = True
+
+                for tag in tags:
+                    entries = history.get(tag)
+                    if entries is None:
+                        delta = [counts[0], counts[1], counts[2], 1]
+                        entries = history[tag] = []
+                    else:
+                        delta = [counts[i] - previous[1][i] for i in range(3)] + [0]
+                        # 已滑出最长窗口的时间桶不会再被撤回
+                        entries[:] = [entry for entry in entries if entry[0] + self.bucket_seconds > cutoff]
+                    if not any(delta):
+                        continue
+                    changed = True
+                    self._add(bucket, tag, delta)
+                    if entries and entries[-1][0] == bucket:
+                        entries[-1] = (bucket, [a + b for a, b in zip(entries[-1][1], delta)])
+                    else:
+                        entries.append((bucket, delta))
+                    self._last_seen[tag] = max(self._last_seen.get(tag, now), now)
+
+                if note_id:
+                    self._notes[note_id] = (now, counts, tags, history)
+                applied += changed
+            return applied
+
+    def _bucket(self, now: float) -> int:
+        return int(now // self.bucket_seconds) * self.bucket_seconds
+
+    def _add(self, bucket: int, tag: str, delta: List[int]):
+        counts = self._buckets.get(bucket)
+        if counts is None:
+            counts = self._buckets[bucket] = {}
+            bisect.insort(self._bucket_keys, bucket)
+        _accumulate(counts, tag, delta, 1)
+        for name, totals in self._totals.items():
+            # 已滑出该窗口的桶（乱序的旧时间戳）不再计入
+            if bucket > self._expired_through[name]:
+                _accumulate(totals, tag, delta, 1)
+
+    def _retract(self, bucket: int, tag: str, delta: List[int]):
+        """从时间桶和尚未滑出的窗口中减去一次增量（_add 的逆操作）"""
+        counts = self._buckets.get(bucket)
+        if counts is None:
+            return
+        _accumulate(counts, tag, delta, -1)
+        for name, totals in self._totals.items():
+            if bucket > self._expired_through[name]:
+                _accumulate(totals, tag, delta, -1)
+
+    def _expire(self, now: float):
+        """把滑出窗口的时间桶从对应窗口的累计值中减去"""
+        for name, span in self.windows.items():
+            totals = self._totals[name]
+            start = bisect.bisect_right(self._bucket_keys, self._expired_through[name])
+            for bucket in self._bucket_keys[start:]:
+                if bucket + self.bucket_seconds > now - span:
+                    break
+                for tag, delta in self._buckets[bucket].items():
+                    _accumulate(totals, tag, delta, -1)
+                self._expired_through[name] = bucket
+
+        # 滑出最长窗口的桶和笔记状态不再需要
+        cutoff = now - self._max_span
+        drop = 0
+        while drop < len(self._bucket_keys) and self._bucket_keys[drop] + self.bucket_seconds <= cutoff:
+            del self._buckets[self._bucket_keys[drop]]
+            drop += 1
+        del self._bucket_keys[:drop]
+        while self._notes:
+            note_id, (seen, *_) = next(iter(self._notes.items()))
+            if seen > cutoff:
+                break
+            del self._notes[note_id]
+        for tag in [tag for tag, seen in self._last_seen.items() if seen <= cutoff]:
+            del self._last_seen[tag]
+            self._categories.pop(tag, None)
+
+    def top(self, k: int = 20, window: str = '24h', now: float = None) -> List[Dict[str, Any]]:
+        """
+        窗口内 trendScore 最高的 k 个话题（降序）
+
+        Returns:
+            与原 _process_notes_to_topics 相同结构的话题字典，另有 window 字段
+        """
+        if window not in self.windows:
+            raise ValueError(f"未知窗口: {window}（可选 {', '.join(self.windows)}）")
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            best = heapq.nlargest(k, self._totals[window].items(), key=lambda item: trend_score(item[1]))
+            return [self._topic(tag, counts, window) for tag, counts in best]
+
+    def _topic(self, tag: str, counts: List[int], window: str) -> Dict[str, Any]:
+        category = self._categories.get(tag)
+        if category is None:
+            category = self._categories[tag] = self.classify(tag) if self.classify else '其他'
+        return {
+            'id': topic_id(tag),
+            'title': tag,
+            'category': category,
+            'likeCount': counts[_LIKES],
+            'commentCount': counts[_COMMENTS],
+            'shareCount': counts[_SHARES],
+            'viewCount': 0,
+            'noteCount': counts[_NOTES],
+            'trendScore': trend_score(counts),
+            'publishTime': datetime.fromtimestamp(self._last_seen.get(tag, time.time())).isoformat(),
+            'window': window
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """每个窗口的标签数、时间桶数和跟踪中的笔记数"""
+        with self._lock:
+            return {
+                'tags': {name: len(totals) for name, totals in self._totals.items()},
+                'buckets': len(self._bucket_keys),
+                'notes_tracked': len(self._notes)
+            }
+
+
+def _accumulate(totals: Dict[str, List[int]], tag: str, delta: List[int], sign: int):
+    counts = totals.get(tag)
+    if counts is None:
+        counts = totals[tag] = [0, 0, 0, 0]
+    for i, value in enumerate(delta):
+        counts[i] += sign * value
+    if not any(counts):
+        del totals[tag]
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻 worker 服务 - 用 NDJSON 协议复用已初始化的爬虫服务，避免每个请求重新启动 Python 进程
+
+每行一个 JSON 对象:
+    请求: {"id": "42", "action": "search_topics", "params": {"keyword": "美妆"}, "timeout": 20}
+    响应: {"id": "42", "result": {...}, "elapsed_ms": 12.5}
+同一连接上可以同时有多个请求在执行，响应按完成顺序返回，调用方用 id 对应请求。
+最多同时执行 concurrency 个请求，超出的排队；超过 timeout 秒的请求返回失败结果。
+内置 action "ping" 返回进程号和当前执行中的请求数，用于健康检查。
+
+传输方式:
+    - stdio: 从 stdin 读请求、向 stdout 写响应（由 backend/pythonWorkerPool.js 启动多个进程组成进程池）
+    - unix socket: 在指定路径监听，每个连接独立读写
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+# 单行请求的最大长度
+MAX_LINE_BYTES = 1024 * 1024
+
+
+class WorkerServer:
+    def __init__(self, handler: Handler, concurrency: int = 8, default_timeout: float = 20.0):
+        """
+        Args:
+            handler: 处理请求的协程函数 handler(action, params) -> 结果字典
+            concurrency: 最多同时执行的请求数
+            default_timeout: 请求未指定 timeout 时的超时时间（秒）
+        """
+        self.handler = handler
+        self.concurrency = concurrency
+        self.default_timeout = default_timeout
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+        self._counters = {'requests': 0, 'errors': 0, 'timeouts': 0}
+
+    async def handle_line(self, line: bytes) -> Optional[Dict[str, Any]]:
+        """处理一行请求，返回响应；空行返回 None"""
+        line = line.strip()
+        if not line:
+            return None
+
+        start = time.perf_counter()
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            action = request['action']
+            params = request.get('params') or {}
+            timeout = float(request.get('timeout') or self.default_timeout)
+        except Exception as e:
+            self._counters['errors'] += 1
+            return {"id": request_id, "result": {"success": False, "error": f"无效请求: {e}", "data": None}}
+
+        self._counters['requests'] += 1
+        try:
+            if action == 'ping':
+                result = {"success": True, "data": self.stats()}
+            else:
+                # 排队时间也计入超时
+                result = await asyncio.wait_for(self._run(action, params), timeout)
+        except asyncio.TimeoutError:
+            self._counters['timeouts'] += 1
+            result = {"success": False, "error": f"请求超时（{timeout:.0f} 秒）", "data": None}
+        except Exception as e:
+            self._counters['errors'] += 1
+            logger.error(f"处理请求失败 {action}: {e}")
+            result = {"success": False, "error": str(e), "data": None}
+
+        return {"id": request_id, "result": result,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    async def _run(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._slots:
+            return await self.handler(action, params)
+
+    async def _serve_stream(self, reader: asyncio.StreamReader, write: Callable[[bytes], Awaitable[None]]):
+        """从 reader 逐行读取请求并发处理，直到对端关闭"""
+        pending = set()
+
+        async def respond(line: bytes):
+            response = await self.handle_line(line)
+            if response is not None:
+                await write((json.dumps(response, ensure_ascii=False, default=str) + '\n').encode('utf-8'))
+
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # 超过 MAX_LINE_BYTES 的行，丢弃缓冲区后继续
+                logger.warning("⚠️ 请求过长，已丢弃")
+                continue
+            if not line:
+                break
+            task = asyncio.ensure_future(respond(line))
+            pending.add(task)
+            self._tasks.add(task)
+            task.add_done_callback(pending.discard)
+            task.add_done_callback(self._tasks.discard)
+
+        # 对端关闭输入后，等已接收的请求处理完再退出
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def serve_stdio(self):
+        """stdin/stdout 模式；stdin 关闭时返回"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=MAX_LINE_BYTES, loop=loop)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader, loop=loop), sys.stdin)
+
+        # 协议只占用原始 stdout；第三方库的 print 改写到 stderr，避免混入响应
+        out = os.fdopen(os.dup(sys.stdout.fileno()), 'wb', buffering=0)
+        sys.stdout = sys.stderr
+        lock = asyncio.Lock()
+
+        async def write(data: bytes):
+            async with lock:
+                await loop.run_in_executor(None, out.write, data)
+
+        logger.info(f"🚀 worker 已就绪 (stdio, pid={os.getpid()}, 并发 {self.concurrency})")
+        try:
+            await self._serve_stream(reader, write)
+        finally:
+            out.close()
+
+    async def serve_unix(self, path: str):
+        """Unix socket 模式；一直运行直到被取消"""
+        async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            lock = asyncio.Lock()
+
+            async def write(data: bytes):
+                async with lock:
+                    writer.write(data)
+                    await writer.drain()
+
+            try:
+                await self._serve_stream(reader, write)
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(on_connect, path=path, limit=MAX_LINE_BYTES)
+        logger.info(f"🚀 worker 已就绪 (unix:{path}, pid={os.getpid()}, 并发 {self.concurrency})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def stats(self) -> Dict[str, Any]:
+        """请求计数和当前执行中的请求数"""
+        stats = dict(self._counters)
+        stats['pid'] = os.getpid()
+        stats['inflight'] = len(self._tasks)
+        stats['concurrency'] = self.concurrency
+        return stats
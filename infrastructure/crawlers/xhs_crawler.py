@@ -12,6 +12,8 @@ import random
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 
+from crawl_orchestrator import CrawlOrchestrator
+
 try:
     from xhs import XhsClient, DataFetchError
     from playwright.sync_api import sync_playwright
@@ -99,15 +101,13 @@ class XhsCrawler:
             hot_keywords = ["穿搭", "美妆", "美食", "旅行", "生活", "健身"]
             all_notes = []
             
-            for keyword in hot_keywords[:3]:  # 限制关键词数量
-                try:
-                    time.sleep(random.uniform(1, 2))  # 随机延迟
-                    # 这里应该调用真实的搜索API，但由于需要cookie，暂时返回模拟数据
-                    notes = self._generate_mock_notes(keyword, count // 3)
-                    all_notes.extend(notes)
-                except Exception as e:
-                    print(f"搜索关键词 {keyword} 失败: {e}", file=sys.stderr)
+            # 这里应该调用真实的搜索API，但由于需要cookie，暂时返回模拟数据
+            orchestrator = CrawlOrchestrator(lambda keyword: self._generate_mock_notes(keyword, count // 3))
+            for result in orchestrator.run(hot_keywords[:3]):  # 限制关键词数量
+                if result['error']:
+                    print(f"搜索关键词 {result['keyword']} 失败: {result['error']}", file=sys.stderr)
                     continue
+                all_notes.extend(result['notes'])
             
             return {
                 "success": True,
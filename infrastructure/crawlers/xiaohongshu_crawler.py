@@ -10,6 +10,7 @@ import asyncio
 import json
 import time
 import os
+import sys
 import random
 import requests
 import hashlib
@@ -18,6 +19,11 @@ from typing import List, Dict, Any, Optional
 from urllib.parse import urlencode
 import argparse
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
+
+from category_classifier import get_classifier
+from crawl_orchestrator import CrawlOrchestrator
+
 # 尝试导入 Playwright
 try:
     from playwright.async_api import async_playwright, BrowserContext, Page
@@ -256,27 +262,8 @@ class MediaCrawlerXHS:
             return None
     
     def _classify_note(self, content: str) -> str:
-        """简单的内容分类"""
-        content_lower = content.lower()
-        
-        if any(word in content_lower for word in ['美妆', '化妆', '口红', '粉底', '眼影']):
-            return '美妆'
-        elif any(word in content_lower for word in ['穿搭', '搭配', '时尚', '服装']):
-            return '穿搭'
-        elif any(word in content_lower for word in ['护肤', '保养', '面膜', '精华']):
-            return '护肤'
-        elif any(word in content_lower for word in ['美食', '食谱', '烘焙', '餐厅']):
-            return '美食'
-        elif any(word in content_lower for word in ['旅行', '旅游', '攻略', '景点']):
-            return '旅行'
-        elif any(word in content_lower for word in ['健身', '运动', '瑜伽', '减肥']):
-            return '健身'
-        elif any(word in content_lower for word in ['数码', '手机', '电脑', '测评']):
-            return '数码'
-        elif any(word in content_lower for word in ['家居', '装修', '收纳', '家具']):
-            return '家居'
-        else:
-            return '其他'
+        """内容分类（共享分类器，见 category_classifier.py）"""
+        return get_classifier().category_of(content)
     
     def _generate_mock_notes(self, keyword: str, limit: int) -> List[Dict[str, Any]]:
         """生成模拟笔记数据"""
@@ -538,14 +525,12 @@ async def async_main():
         keywords = [kw.strip() for kw in args.keywords.split(',')]
         all_notes = []
 
-        # 为每个关键词获取数据
-        for keyword in keywords:
-            print(f"\n🔍 处理关键词: {keyword}")
-            notes = crawler.search_notes_by_keyword(keyword, limit=args.limit)
-            all_notes.extend(notes)
-
-            # 随机延迟，避免请求过快
-            time.sleep(random.uniform(1, 3))
+        # 关键词并发爬取，请求速率由共享令牌桶控制；每个关键词完成即输出
+        orchestrator = CrawlOrchestrator(lambda keyword: crawler.search_notes(keyword, limit=args.limit))
+        async for result in orchestrator.stream(keywords):
+            status = f"失败: {result['error']}" if result['error'] else f"{len(result['notes'])} 条"
+            print(f"🔍 关键词 {result['keyword']}: {status}（{result['elapsed_ms']:.0f} ms）")
+            all_notes.extend(result['notes'])
 
         # 保存数据
         print(f"\n💾 保存数据...")
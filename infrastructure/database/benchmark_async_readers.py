@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发读取基准测试 - 对比同步路径（线程池）与异步路径（motor）
+
+用法:
+    python benchmark_async_readers.py --readers 1,10,50,200 --rounds 5
+需要本地运行的 mongod，测试使用独立的数据库并在结束后删除。
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database_manager import DatabaseManager
+from benchmark_bulk_save import generate_notes
+
+BENCHMARK_DB = 'xiaohongshu_benchmark'
+
+
+def run_sync_readers(manager: DatabaseManager, readers: int, rounds: int) -> float:
+    """N 个线程同时调用同步 get_notes/get_statistics"""
+    def reader():
+        for _ in range(rounds):
+            manager.get_notes(limit=20)
+            manager.get_statistics()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=readers) as executor:
+        for future in [executor.submit(reader) for _ in range(readers)]:
+            future.result()
+    return time.perf_counter() - start
+
+
+async def run_async_readers(manager: DatabaseManager, readers: int, rounds: int) -> float:
+    """N 个协程在同一个事件循环中并发调用异步接口"""
+    async def reader():
+        for _ in range(rounds):
+            await asyncio.gather(manager.async_get_notes(limit=20), manager.async_get_statistics())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(reader() for _ in range(readers)))
+    return time.perf_counter() - start
+
+
+async def main_async(args):
+    manager = DatabaseManager(args.uri, db_name=BENCHMARK_DB)
+    if not manager.connect():
+        print("❌ 无法连接到 MongoDB，基准测试需要本地 mongod")
+        return
+
+    try:
+        manager.bulk_save_notes(generate_notes(args.notes))
+
+        print(f"{'readers':>8} | {'sync req/s':>11} | {'async req/s':>12} | speedup")
+        for readers in [int(r) for r in args.readers.split(',')]:
+            requests = readers * args.rounds * 2
+            loop = asyncio.get_running_loop()
+            sync_elapsed = await loop.run_in_executor(None, run_sync_readers, manager, readers, args.rounds)
+            async_elapsed = await run_async_readers(manager, readers, args.rounds)
+            print(f"{readers:>8} | {requests / sync_elapsed:11.0f} | {requests / async_elapsed:12.0f} | "
+                  f"{sync_elapsed / async_elapsed:.1f}x")
+    finally:
+        manager.client.drop_database(BENCHMARK_DB)
+        manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='同步/异步并发读取基准测试')
+    parser.add_argument('--uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--readers', default='1,10,50,200', help='并发读取者数量，用逗号分隔')
+    parser.add_argument('--rounds', type=int, default=5, help='每个读取者的请求轮数')
+    parser.add_argument('--notes', type=int, default=10000, help='预置的笔记数量')
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+笔记批量写入基准测试 - 对比逐条 upsert 与 bulk_write
+
+用法:
+    python benchmark_bulk_save.py --sizes 1000,10000,100000
+需要本地运行的 mongod，测试使用独立的数据库并在结束后删除。
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+
+from database_manager import DatabaseManager
+
+CATEGORIES = ['时尚', '美妆', '生活', '美食', '旅行', '健身', '学习', '宠物']
+
+
+def generate_notes(count: int) -> List[Dict[str, Any]]:
+    """生成与 data/mass_real_notes_*.json 结构一致的合成笔记"""
+    now = datetime.now()
+    notes = []
+    for i in range(count):
+        category = random.choice(CATEGORIES)
+        notes.append({
+            'id': f"bench_{i:08d}",
+            'title': f"{category}分享 #{i}",
+            'content': f"关于{category}的详细分享，包含了实用的经验和心得..." * 3,
+            'author': f"用户{random.randint(100000, 999999)}",
+            'like_count': random.randint(0, 50000),
+            'comment_count': random.randint(0, 2000),
+            'share_count': random.randint(0, 500),
+            'view_count': random.randint(0, 200000),
+            'category': category,
+            'tags': [category, '分享'],
+            'publish_time': (now - timedelta(hours=random.randint(0, 720))).isoformat(),
+            'crawl_time': now.isoformat()
+        })
+    return notes
+
+
+def run_legacy(manager: DatabaseManager, notes: List[Dict[str, Any]]) -> float:
+    """旧路径：每条笔记一次 update_one 往返"""
+    collection = manager.db[manager.collections['notes']]
+    start = time.perf_counter()
+    for note in notes:
+        note['stored_at'] = datetime.now()
+        collection.update_one({'note_id': note['id']}, {'$set': note}, upsert=True)
+    return time.perf_counter() - start
+
+
+def run_bulk(manager: DatabaseManager, notes: List[Dict[str, Any]], chunk_size: int) -> float:
+    """新路径：无序 bulk_write 分块写入"""
+    start = time.perf_counter()
+    summary = manager.bulk_save_notes(notes, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    if summary['failed_ids']:
+        print(f"   ⚠️ 失败 {len(summary['failed_ids'])} 条")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='笔记批量写入基准测试')
+    parser.add_argument('--uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='笔记数量，用逗号分隔')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--skip-legacy', action='store_true', help='跳过逐条写入的对照组')
+    args = parser.parse_args()
+
+    manager = DatabaseManager(args.uri, db_name='xiaohongshu_benchmark')
+    if not manager.connect():
+        print("❌ 无法连接到 MongoDB，基准测试需要本地 mongod")
+        return
+
+    try:
+        print(f"{'notes':>8} | {'legacy notes/s':>15} | {'bulk notes/s':>13} | speedup")
+        for size in [int(s) for s in args.sizes.split(',')]:
+            notes = generate_notes(size)
+
+            legacy_rate = None
+            if not args.skip_legacy:
+                manager.db.drop_collection(manager.collections['notes'])
+                manager._create_indexes()
+                legacy_rate = size / run_legacy(manager, [dict(n) for n in notes])
+
+            manager.db.drop_collection(manager.collections['notes'])
+            manager._create_indexes()
+            bulk_rate = size / run_bulk(manager, [dict(n) for n in notes], args.chunk_size)
+
+            legacy_text = f"{legacy_rate:15.0f}" if legacy_rate else f"{'-':>15}"
+            speedup = f"{bulk_rate / legacy_rate:.1f}x" if legacy_rate else '-'
+            print(f"{size:>8} | {legacy_text} | {bulk_rate:13.0f} | {speedup}")
+    finally:
+        manager.client.drop_database('xiaohongshu_benchmark')
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
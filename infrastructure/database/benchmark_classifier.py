@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分类器吞吐量基准测试 - 对比原来三个逐关键词子串查找的分类函数与共享的 CategoryClassifier
+
+用法:
+    python benchmark_classifier.py --count 1000000 --unique 0.2
+--unique 为标题中不重复文本的比例，决定缓存命中率；"no cache" 一行关闭缓存，反映纯扫描速度。
+"""
+
+import time
+import random
+import argparse
+from typing import Callable, List
+
+from category_classifier import CategoryClassifier, DEFAULT_TAXONOMY
+
+
+# ---- 替换前的实现，仅用于对比 ----
+
+_TOPIC_KEYWORDS = [
+    ('时尚', ['穿搭', '时尚', '搭配', '服装', '鞋子', '包包']),
+    ('美妆', ['美妆', '护肤', '化妆', '口红', '面膜', '精华']),
+    ('美食', ['美食', '餐厅', '料理', '甜品', '咖啡', '奶茶']),
+    ('旅行', ['旅行', '旅游', '景点', '攻略', '酒店', '机票']),
+    ('生活', ['生活', '好物', '家居', '收纳', '清洁', '日常']),
+    ('健身', ['健身', '运动', '瑜伽', '减肥', '塑形', '跑步']),
+    ('学习', ['学习', '读书', '考试', '技能', '课程', '知识']),
+    ('宠物', ['宠物', '猫咪', '狗狗', '萌宠', '养宠', '动物']),
+]
+
+_NOTE_KEYWORDS = [
+    ('美妆', ['美妆', '化妆', '口红', '粉底', '眼影']),
+    ('穿搭', ['穿搭', '搭配', '时尚', '服装']),
+    ('护肤', ['护肤', '保养', '面膜', '精华']),
+    ('美食', ['美食', '食谱', '烘焙', '餐厅']),
+    ('旅行', ['旅行', '旅游', '攻略', '景点']),
+    ('健身', ['健身', '运动', '瑜伽', '减肥']),
+    ('数码', ['数码', '手机', '电脑', '测评']),
+    ('家居', ['家居', '装修', '收纳', '家具']),
+]
+
+_CONTENT_KEYWORDS = {
+    '美妆': ['口红', '粉底', '眼影', '睫毛膏', '腮红', '化妆', '彩妆', '美妆', '护肤品'],
+    '护肤': ['面膜', '精华', '乳液', '洁面', '防晒', '护肤', '保养', '抗老', '补水'],
+    '穿搭': ['穿搭', '搭配', '衣服', '裙子', '外套', '鞋子', '包包', '时尚', '风格'],
+    '美食': ['美食', '食谱', '烘焙', '餐厅', '小吃', '甜品', '料理', '做饭', '好吃'],
+    '旅行': ['旅行', '旅游', '攻略', '景点', '酒店', '机票', '签证', '游记', '打卡'],
+    '健身': ['健身', '运动', '瑜伽', '减肥', '塑形', '锻炼', '跑步', '健康', '体重'],
+    '数码': ['手机', '电脑', '相机', '耳机', '数码', '科技', '测评', '开箱', '配置'],
+    '家居': ['家居', '装修', '收纳', '家具', '装饰', '清洁', '整理', '布置', '设计']
+}
+
+
+def legacy_classify_topic(text: str) -> str:
+    """RealCrawlerService._classify_topic"""
+    text = text.lower()
+    for category, keywords in _TOPIC_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return category
+    return '其他'
+
+
+def legacy_classify_note(text: str) -> str:
+    """MediaCrawlerXHS._classify_note"""
+    text = text.lower()
+    for category, keywords in _NOTE_KEYWORDS:
+        if any(word in text for word in keywords):
+            return category
+    return '其他'
+
+
+def legacy_classify_content(text: str) -> str:
+    """AIAnalysisService.classify_content（只取分类名）"""
+    text = text.lower()
+    scores = {}
+    for category, keywords in _CONTENT_KEYWORDS.items():
+        score = sum(1 for keyword in keywords if keyword in text)
+        if score > 0:
+            scores[category] = score
+    if not scores:
+        return '其他'
+    return max(scores.items(), key=lambda x: x[1])[0]
+
+
+# ---- 测试数据 ----
+
+_FILLERS = ['分享', '今天', '超级', '推荐', '一周', '记录', '教程', '合集', '新手', '必看', '宝藏',
+            '平价', '学生党', '上班族', '周末', '小众', '干货', '真实', '体验', '心得']
+
+
+def generate_titles(count: int, unique_ratio: float, seed: int = 42) -> List[str]:
+    """由分类关键词和常见填充词拼出标题，unique_ratio 控制不重复标题的比例"""
+    rng = random.Random(seed)
+    keywords = [keyword for keywords in DEFAULT_TAXONOMY.values() for keyword in keywords]
+    distinct = max(1, int(count * unique_ratio))
+    pool = []
+    for i in range(distinct):
+        words = rng.sample(_FILLERS, rng.randint(2, 4))
+        for _ in range(rng.randint(0, 2)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        pool.append(''.join(words) + f"#{i}")
+    return [pool[rng.randrange(distinct)] if i >= distinct else pool[i] for i in range(count)]
+
+
+def measure(name: str, fn: Callable[[List[str]], object], titles: List[str]):
+    start = time.perf_counter()
+    fn(titles)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<34} | {elapsed:8.2f} | {len(titles) / elapsed:12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分类器吞吐量基准测试')
+    parser.add_argument('--count', type=int, default=1_000_000)
+    parser.add_argument('--unique', type=float, default=0.2)
+    args = parser.parse_args()
+
+    titles = generate_titles(args.count, args.unique)
+    print(f"titles={len(titles):,} unique={len(set(titles)):,}")
+    print(f"{'implementation':<34} | {'seconds':>8} | {'titles/s':>12}")
+
+    measure('legacy _classify_topic', lambda ts: [legacy_classify_topic(t) for t in ts], titles)
+    measure('legacy _classify_note', lambda ts: [legacy_classify_note(t) for t in ts], titles)
+    measure('legacy classify_content', lambda ts: [legacy_classify_content(t) for t in ts], titles)
+
+    uncached = CategoryClassifier(cache_size=0)
+    measure('automaton category_of (no cache)', lambda ts: [uncached.category_of(t) for t in ts], titles)
+    measure('automaton classify_many (no cache)', uncached.classify_many, titles)
+
+    cached = CategoryClassifier(cache_size=max(1, int(args.count * args.unique)))
+    measure('automaton category_of (cache)', lambda ts: [cached.category_of(t) for t in ts], titles)
+    print(f"缓存: {cached.stats()}")
+
+
+if __name__ == "__main__":
+    main()
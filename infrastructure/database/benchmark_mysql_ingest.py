@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MySQL 笔记写入基准测试 - 对比逐条 execute、executemany 与多行 INSERT 分批写入
+
+用法:
+    python benchmark_mysql_ingest.py --sizes 1000,50000 --batch-sizes 100,500,1000
+需要本地 MySQL（配置同 benchmark_storage_backends.py），测试数据的 id 以 bench_ 开头，结束后删除。
+"""
+
+import argparse
+import json
+import time
+from typing import List, Dict, Any
+
+from benchmark_bulk_save import generate_notes
+from benchmark_storage_backends import MYSQL_CONFIG
+from storage_backends import create_backend, normalize_note, NOTE_COLUMNS, JSON_COLUMNS
+
+SINGLE_ROW_INSERT = f"""
+    INSERT INTO xhs_notes ({', '.join(NOTE_COLUMNS)})
+    VALUES ({', '.join('%s' for _ in NOTE_COLUMNS)})
+    ON DUPLICATE KEY UPDATE like_count = VALUES(like_count)
+"""
+
+
+def make_notes(count: int, prefix: str) -> List[Dict[str, Any]]:
+    notes = generate_notes(count)
+    for i, note in enumerate(notes):
+        note['id'] = f"bench_{prefix}_{i:08d}"
+        note['author_id'] = f"bench_user_{i % 1000}"
+    return notes
+
+
+def to_rows(notes: List[Dict[str, Any]]) -> List[tuple]:
+    rows = []
+    for note in notes:
+        row = normalize_note(note)
+        for column in JSON_COLUMNS:
+            row[column] = json.dumps(row[column], ensure_ascii=False)
+        rows.append(tuple(row[c] for c in NOTE_COLUMNS))
+    return rows
+
+
+def run_per_row(backend, notes: List[Dict[str, Any]]) -> float:
+    """旧路径：逐条 cursor.execute，最后提交一次"""
+    start = time.perf_counter()
+    conn = backend._connect()
+    try:
+        cursor = conn.cursor()
+        for row in to_rows(notes):
+            cursor.execute(SINGLE_ROW_INSERT, row)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    return time.perf_counter() - start
+
+
+def run_executemany(backend, notes: List[Dict[str, Any]]) -> float:
+    """单行语句交给驱动的 executemany"""
+    start = time.perf_counter()
+    conn = backend._connect()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany(SINGLE_ROW_INSERT, to_rows(notes))
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    return time.perf_counter() - start
+
+
+def run_batched(backend, notes: List[Dict[str, Any]]):
+    """新路径：MySQLBackend.save_notes 的多行 INSERT ... ON DUPLICATE KEY UPDATE"""
+    start = time.perf_counter()
+    backend.save_notes(notes)
+    return time.perf_counter() - start, backend.last_write_report
+
+
+def cleanup(backend):
+    conn = backend._connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM xhs_notes WHERE id LIKE 'bench\\_%'")
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MySQL 笔记写入基准测试')
+    parser.add_argument('--sizes', default='1000,50000')
+    parser.add_argument('--batch-sizes', default='100,500,1000')
+    args = parser.parse_args()
+
+    try:
+        backend = create_backend('mysql', db_config=MYSQL_CONFIG)
+        cleanup(backend)
+    except Exception as e:
+        print(f"跳过: 无法连接 MySQL: {e}")
+        return
+
+    print(f"{'rows':>8} | {'mode':<16} | {'seconds':>8} | {'rows/s':>10} | {'batches':>7} | {'slowest ms':>10}")
+    try:
+        for size in (int(s) for s in args.sizes.split(',')):
+            for name, runner in (('per-row', run_per_row), ('executemany', run_executemany)):
+                elapsed = runner(backend, make_notes(size, name.replace('-', '')))
+                print(f"{size:>8} | {name:<16} | {elapsed:8.2f} | {size / elapsed:10.0f} | {'-':>7} | {'-':>10}")
+                cleanup(backend)
+
+            for batch_size in (int(b) for b in args.batch_sizes.split(',')):
+                backend.batch_size = batch_size
+                elapsed, report = run_batched(backend, make_notes(size, f"b{batch_size}"))
+                slowest = max(batch['ms'] for batch in report['batches'])
+                print(f"{size:>8} | {f'multi-row x{batch_size}':<16} | {elapsed:8.2f} | {size / elapsed:10.0f} | "
+                      f"{len(report['batches']):>7} | {slowest:10.1f}")
+                cleanup(backend)
+    finally:
+        cleanup(backend)
+        print(f"连接池: {backend.pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
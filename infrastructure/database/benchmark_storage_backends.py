@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+存储后端基准测试 - 对比 SQLite / MySQL / MongoDB 的写入和查询吞吐
+
+用法:
+    python benchmark_storage_backends.py --notes 100000 --backends sqlite,mysql,mongo
+SQLite 使用临时文件；MySQL 和 MongoDB 需要本地服务（连接失败的后端会被跳过），
+测试数据的 id 以 bench_ 开头，MySQL 测试结束后会删除这些行。
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmark_bulk_save import generate_notes, CATEGORIES
+from storage_backends import create_backend
+
+MYSQL_CONFIG = {
+    'host': 'localhost',
+    'port': 3306,
+    'user': 'xhs_user',
+    'password': 'xhs123456',
+    'database': 'xiaohongshu_data',
+    'charset': 'utf8mb4'
+}
+
+
+def open_backend(kind: str, workdir: str):
+    if kind == 'sqlite':
+        return create_backend('sqlite', path=os.path.join(workdir, 'bench.sqlite3'))
+    if kind == 'mysql':
+        backend = create_backend('mysql', db_config=MYSQL_CONFIG)
+        backend._connect().close()  # 提前确认服务可用
+        return backend
+
+    from database_manager import DatabaseManager
+    manager = DatabaseManager(db_name='xiaohongshu_benchmark', auto_reconnect=False)
+    if not manager.connect():
+        raise RuntimeError("无法连接到 MongoDB")
+    return create_backend('mongo', manager=manager)
+
+
+def cleanup_backend(kind: str, backend):
+    if kind == 'mysql':
+        conn = backend._connect()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM xhs_notes WHERE id LIKE 'bench\\_%'")
+        conn.commit()
+        conn.close()
+    elif kind == 'mongo':
+        backend.manager.client.drop_database('xiaohongshu_benchmark')
+
+
+def run(kind: str, backend, notes, batch_size: int, queries: int):
+    results = {}
+
+    start = time.perf_counter()
+    for i in range(0, len(notes), batch_size):
+        backend.save_notes(notes[i:i + batch_size])
+    results['ingest/s'] = len(notes) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(queries):
+        backend.get_notes(limit=20, category=CATEGORIES[i % len(CATEGORIES)], days=7)
+    results['get_notes/s'] = queries / (time.perf_counter() - start)
+
+    since = datetime.now() - timedelta(days=7)
+    start = time.perf_counter()
+    scanned = sum(1 for _ in backend.scan_notes(since, time_field='publish_time'))
+    results['scan rows/s'] = scanned / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    backend.get_statistics()
+    results['stats ms'] = (time.perf_counter() - start) * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='存储后端基准测试')
+    parser.add_argument('--notes', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--backends', default='sqlite,mysql,mongo')
+    args = parser.parse_args()
+
+    notes = generate_notes(args.notes)
+    columns = ['ingest/s', 'get_notes/s', 'scan rows/s', 'stats ms']
+    print(f"{'backend':<8} | " + ' | '.join(f"{c:>12}" for c in columns))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind in args.backends.split(','):
+            try:
+                backend = open_backend(kind, workdir)
+            except Exception as e:
+                print(f"{kind:<8} | 跳过: {e}")
+                continue
+            try:
+                results = run(kind, backend, [dict(n) for n in notes], args.batch_size, args.queries)
+                print(f"{kind:<8} | " + ' | '.join(f"{results[c]:12.0f}" for c in columns))
+            finally:
+                cleanup_backend(kind, backend)
+                backend.close()
+
+
+if __name__ == "__main__":
+    main()
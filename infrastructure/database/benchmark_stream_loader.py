@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式加载基准测试 - 在合成的多 GB 笔记导出文件上测量耗时与峰值内存
+
+用法:
+    python benchmark_stream_loader.py --size-gb 2 --path /tmp/synthetic_notes.json
+每项测量在独立子进程中运行，峰值内存互不影响。json.load 对照组默认只在 1GB 以内运行。
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import time
+
+from benchmark_bulk_save import generate_notes
+from note_stream import iter_json_array, take_notes
+
+
+def write_synthetic_dump(path: str, size_gb: float):
+    """按 data/mass_real_notes_*.json 的格式写出指定大小的 JSON 数组"""
+    target = int(size_gb * 1024 ** 3)
+    batch = generate_notes(10000)
+    written = 0
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        while written < target:
+            for note in batch:
+                note = dict(note, id=f"bench_{count:010d}")
+                text = ('  ' if count == 0 else ',\n  ') + json.dumps(note, ensure_ascii=False)
+                f.write(text)
+                written += len(text.encode('utf-8'))
+                count += 1
+        f.write('\n]\n')
+    print(f"📝 已生成 {count} 条笔记, {os.path.getsize(path) / 1024 ** 3:.2f} GB: {path}")
+
+
+def _measure(name: str, path: str, queue):
+    start = time.perf_counter()
+    if name == 'stream limit=1':
+        result = len(list(take_notes(iter_json_array(path), limit=1)))
+    elif name == 'stream limit=1 category':
+        result = len(list(take_notes(iter_json_array(path), limit=1, category='宠物')))
+    elif name == 'stream full scan category':
+        result = sum(1 for _ in take_notes(iter_json_array(path), category='宠物'))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            result = len([n for n in json.load(f) if n.get('category') == '宠物'])
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((name, result, elapsed, peak_mb))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式加载基准测试')
+    parser.add_argument('--size-gb', type=float, default=2.0)
+    parser.add_argument('--path', default='/tmp/xhs_synthetic_notes.json')
+    parser.add_argument('--keep', action='store_true', help='保留生成的文件')
+    parser.add_argument('--with-json-load', action='store_true', help='强制运行 json.load 对照组')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        write_synthetic_dump(args.path, args.size_gb)
+
+    cases = ['stream limit=1', 'stream limit=1 category', 'stream full scan category']
+    if args.with_json_load or args.size_gb <= 1:
+        cases.append('json.load full')
+
+    try:
+        print(f"{'case':<28} | {'rows':>8} | {'seconds':>8} | {'peak RSS MB':>11}")
+        for case in cases:
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(target=_measure, args=(case, args.path, queue))
+            process.start()
+            name, rows, elapsed, peak_mb = queue.get()
+            process.join()
+            print(f"{name:<28} | {rows:>8} | {elapsed:8.2f} | {peak_mb:11.1f}")
+    finally:
+        if not args.keep:
+            os.remove(args.path)
+
+
+if __name__ == "__main__":
+    main()
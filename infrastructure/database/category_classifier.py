@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容分类器 - 爬虫服务、MediaCrawler 爬虫和 AI 分析服务共用的关键词分类
+
+所有分类的关键词编译成一个 Aho-Corasick 自动机（已展开为确定性转移表），
+每段文本只扫描一遍就能找出全部命中的关键词，不再对每个关键词做一次子串查找。
+命中关键词按权重累加到所属分类，得分最高的分类胜出，同分时按分类表中的顺序。
+相同文本的分类结果保存在有上限的缓存中，标题重复率高时大部分调用直接命中缓存；
+命中关键词组合相同的文本共用同一份评分结果，不重复计算。
+
+分类表默认使用 DEFAULT_TAXONOMY；设置环境变量 XHS_CATEGORY_TAXONOMY 指向 JSON 文件可以替换，格式:
+    {"美妆": {"口红": 1, "美妆": 2}, "穿搭": ["穿搭", "搭配"]}
+关键词列表等价于权重全部为 1。
+"""
+
+import os
+import json
+import logging
+from collections import deque
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+# 分类 -> {关键词: 权重}；分类名本身权重更高，泛化词权重较低
+DEFAULT_TAXONOMY: Dict[str, Dict[str, float]] = {
+    '美妆': {'美妆': 2, '化妆': 1.5, '彩妆': 1.5, '口红': 1, '粉底': 1, '眼影': 1, '睫毛膏': 1,
+             '腮红': 1, '护肤品': 1},
+    '护肤': {'护肤': 2, '保养': 1, '面膜': 1, '精华': 1, '乳液': 1, '洁面': 1, '防晒': 1,
+             '抗老': 1, '补水': 1},
+    '穿搭': {'穿搭': 2, '时尚': 1.5, '搭配': 1.5, '服装': 1, '衣服': 1, '裙子': 1, '外套': 1,
+             '鞋子': 1, '包包': 1, '风格': 0.5},
+    '美食': {'美食': 2, '食谱': 1, '烘焙': 1, '餐厅': 1, '小吃': 1, '甜品': 1, '料理': 1,
+             '做饭': 1, '咖啡': 1, '奶茶': 1, '好吃': 0.5},
+    '旅行': {'旅行': 2, '旅游': 2, '景点': 1, '酒店': 1, '机票': 1, '签证': 1, '游记': 1,
+             '攻略': 0.5, '打卡': 0.5},
+    '健身': {'健身': 2, '运动': 1, '瑜伽': 1, '减肥': 1, '塑形': 1, '锻炼': 1, '跑步': 1,
+             '体重': 1, '健康': 0.5},
+    '数码': {'数码': 2, '手机': 1, '电脑': 1, '相机': 1, '耳机': 1, '科技': 1, '测评': 0.5,
+             '开箱': 0.5, '配置': 0.5},
+    '家居': {'家居': 2, '装修': 1, '收纳': 1, '家具': 1, '装饰': 1, '清洁': 1, '整理': 1,
+             '布置': 1, '设计': 0.5},
+    '学习': {'学习': 2, '读书': 1, '考试': 1, '技能': 1, '课程': 1, '知识': 1},
+    '宠物': {'宠物': 2, '萌宠': 1.5, '养宠': 1.5, '猫咪': 1, '狗狗': 1, '动物': 0.5},
+    '生活': {'生活': 1, '好物': 1, '日常': 1},
+}
+
+# 未命中任何关键词时的分类
+UNCATEGORIZED = '其他'
+
+# 关键词组合 -> 评分结果的缓存上限
+KEYWORD_SET_CACHE_SIZE = 4096
+
+_UNMATCHED = {'category': UNCATEGORIZED, 'confidence': 0.0, 'score': 0.0, 'keywords': [], 'all_scores': {}}
+
+Taxonomy = Mapping[str, Union[Mapping[str, float], Sequence[str]]]
+
+
+class CategoryClassifier:
+    def __init__(self, taxonomy: Taxonomy = None, full_score: float = 3.0, cache_size: int = 100000):
+        """
+        编译分类表
+
+        Args:
+            taxonomy: 分类 -> {关键词: 权重} 或关键词列表，默认 DEFAULT_TAXONOMY
+            full_score: 置信度为 1 时的得分
+            cache_size: 分类结果缓存的最大条目数，0 表示不缓存
+        """
+        self.taxonomy = self._normalize(taxonomy or DEFAULT_TAXONOMY)
+        self.full_score = full_score
+        self.cache_size = cache_size
+        self._order = {category: index for index, category in enumerate(self.taxonomy)}
+        # 关键词 -> [(分类, 权重)]，同一个关键词可以属于多个分类
+        self._keyword_categories: Dict[str, List[tuple]] = {}
+        for category, keywords in self.taxonomy.items():
+            for keyword, weight in keywords.items():
+                self._keyword_categories.setdefault(keyword, []).append((category, weight))
+        self._delta, self._outputs = self._compile(self._keyword_categories)
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        # 命中关键词集合 -> 分类结果；不同文本的关键词组合远少于文本数
+        self._by_keywords: Dict[frozenset, Dict[str, Any]] = {}
+        self._counters = {'classified': 0, 'cache_hits': 0}
+
+    @staticmethod
+    def _normalize(taxonomy: Taxonomy) -> Dict[str, Dict[str, float]]:
+        normalized = {}
+        for category, keywords in taxonomy.items():
+            if not isinstance(keywords, Mapping):
+                keywords = {keyword: 1.0 for keyword in keywords}
+            normalized[category] = {str(keyword).lower(): float(weight)
+                                    for keyword, weight in keywords.items() if keyword}
+        return normalized
+
+    @staticmethod
+    def _compile(keywords: Iterable[str]):
+        """
+        构建 Aho-Corasick 自动机并展开失败指针
+
+        Returns:
+            (转移表, 输出表)：转移表中每个状态的 dict 只包含通向非根状态的字符，
+            查不到的字符直接回到根状态；输出表为每个状态结束的全部关键词（含后缀匹配）
+        """
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[set] = [set()]
+        for keyword in keywords:
+            state = 0
+            for ch in keyword:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    goto.append({})
+                    outputs.append(set())
+                    next_state = goto[state][ch] = len(goto) - 1
+                state = next_state
+            outputs[state].add(keyword)
+
+        fail = [0] * len(goto)
+        delta: List[Optional[Dict[str, int]]] = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # 父状态按层先处理，fail[state] 的转移表此时已经完整
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            outputs[state] |= outputs[fail[state]]
+            for ch, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0)
+                queue.append(child)
+
+        return delta, [tuple(sorted(output)) for output in outputs]
+
+    def _scan(self, text: str) -> set:
+        """一遍扫描返回文本中出现的全部关键词"""
+        delta, outputs = self._delta, self._outputs
+        found = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+    def _score(self, found: frozenset) -> Dict[str, Any]:
+        """按命中关键词的权重计算各分类得分"""
+        scores: Dict[str, float] = {}
+        for keyword in found:
+            for category, weight in self._keyword_categories[keyword]:
+                scores[category] = scores.get(category, 0.0) + weight
+        best = min(scores, key=lambda category: (-scores[category], self._order[category]))
+        keywords = [keyword for keyword in self.taxonomy[best] if keyword in found]
+        return {'category': best, 'confidence': min(1.0, scores[best] / self.full_score),
+                'score': scores[best], 'keywords': keywords, 'all_scores': scores}
+
+    def _classify(self, text: str) -> Dict[str, Any]:
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._counters['cache_hits'] += 1
+            return cached
+
+        self._counters['classified'] += 1
+        found = self._scan(text.lower()) if text else None
+        if not found:
+            result = _UNMATCHED
+        else:
+            found = frozenset(found)
+            result = self._by_keywords.get(found)
+            if result is None:
+                result = self._remember(self._by_keywords, found, self._score(found), KEYWORD_SET_CACHE_SIZE)
+        if self.cache_size:
+            self._remember(self._cache, text, result, self.cache_size)
+        return result
+
+    @staticmethod
+    def _remember(cache: dict, key, value, limit: int):
+        """写入有上限的缓存，满了先进先出淘汰"""
+        if len(cache) >= limit:
+            # 多线程同时淘汰时 pop 可能已被其他线程完成
+            try:
+                cache.pop(next(iter(cache)), None)
+            except (StopIteration, RuntimeError):
+                pass
+        cache[key] = value
+        return value
+
+    def category_of(self, text: str) -> str:
+        """只返回分类名"""
+        return self._classify(text)['category']
+
+    def classify(self, text: str) -> Dict[str, Any]:
+        """
+        分类单段文本
+
+        Returns:
+            {'category', 'confidence', 'score', 'keywords', 'all_scores'}
+            keywords 为最佳分类命中的关键词，all_scores 为每个命中分类的加权得分
+        """
+        result = self._classify(text)
+        # 缓存中的结果被多个调用方共享，返回副本
+        return {**result, 'keywords': list(result['keywords']), 'all_scores': dict(result['all_scores'])}
+
+    def classify_many(self, texts: Iterable[str]) -> List[Dict[str, Any]]:
+        """批量分类，结果顺序与输入一致；批内重复的文本只计算一次"""
+        batch: Dict[str, Dict[str, Any]] = {}
+        results = []
+        for text in texts:
+            result = batch.get(text)
+            if result is None:
+                result = batch[text] = self.classify(text)
+            results.append(result)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """自动机规模和缓存命中情况"""
+        stats = dict(self._counters)
+        stats['states'] = len(self._delta)
+        stats['keywords'] = len(self._keyword_categories)
+        stats['categories'] = len(self.taxonomy)
+        stats['cache_entries'] = len(self._cache)
+        total = stats['classified'] + stats['cache_hits']
+        stats['cache_hit_ratio'] = round(stats['cache_hits'] / total, 4) if total else 0.0
+        return stats
+
+
+def load_taxonomy(path: str) -> Dict[str, Any]:
+    """读取 JSON 格式的分类表"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+_classifier = None
+
+
+def get_classifier() -> CategoryClassifier:
+    """共享分类器（首次使用时编译）；XHS_CATEGORY_TAXONOMY 指定的分类表读取失败时使用默认分类表"""
+    global _classifier
+    if _classifier is None:
+        taxonomy = None
+        path = os.environ.get('XHS_CATEGORY_TAXONOMY')
+        if path:
+            try:
+                taxonomy = load_taxonomy(path)
+            except Exception as e:
+                logger.warning(f"⚠️ 分类表读取失败，使用默认分类表 {path}: {e}")
+        _classifier = CategoryClassifier(taxonomy)
+    return _classifier
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+连接监督器 - 在后台维持 DatabaseManager 与 MongoDB 的连接
+
+已连接时按 ping_interval 发送 ping，失败后把管理器切换到文件模式；
+断开时按指数退避（带随机抖动）重试 connect()，成功后管理器自动切回 MongoDB 并回放暂存的写入。
+"""
+
+import random
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionSupervisor:
+    def __init__(self, manager, ping_interval: float = 30, initial_backoff: float = 1, max_backoff: float = 60):
+        """
+        初始化连接监督器
+
+        Args:
+            manager: DatabaseManager 实例
+            ping_interval: 已连接时健康检查的间隔（秒）
+            initial_backoff: 第一次重连前的等待时间（秒）
+            max_backoff: 重连等待时间的上限（秒）
+        """
+        self.manager = manager
+        self.ping_interval = ping_interval
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._stats = {'reconnects': 0, 'failed_attempts': 0, 'ping_failures': 0,
+                       'last_error': None, 'disconnected_since': None}
+
+    def start(self):
+        """启动后台线程，已在运行时直接返回"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='mongo-supervisor', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def notify_failure(self, error: Exception):
+        """业务操作遇到连接错误时调用，立即切换到文件模式并开始重连"""
+        self._record_disconnect(error)
+        self._wakeup.set()
+
+    def _record_disconnect(self, error: Exception):
+        with self._lock:
+            self._stats['last_error'] = str(error)
+            if self._stats['disconnected_since'] is None:
+                self._stats['disconnected_since'] = datetime.now().isoformat()
+        self.manager._mark_disconnected(error)
+
+    def _run(self):
+        backoff = self.initial_backoff
+        while not self._stop.is_set():
+            if self.manager.connected:
+                backoff = self.initial_backoff
+                self._wakeup.wait(self.ping_interval)
+                self._wakeup.clear()
+                if self._stop.is_set() or not self.manager.connected:
+                    continue
+                try:
+                    self.manager.client.admin.command('ping')
+                except Exception as e:
+                    logger.warning(f"⚠️ MongoDB 健康检查失败，切换到文件存储: {e}")
+                    with self._lock:
+                        self._stats['ping_failures'] += 1
+                    self._record_disconnect(e)
+                continue
+
+            if self.manager.connect(start_supervisor=False):
+                with self._lock:
+                    self._stats['reconnects'] += 1
+                    self._stats['disconnected_since'] = None
+                logger.info("🔌 MongoDB 已重新连接")
+                continue
+
+            with self._lock:
+                self._stats['failed_attempts'] += 1
+            delay = random.uniform(backoff / 2, backoff)
+            logger.info(f"⏳ {delay:.1f} 秒后重试连接 MongoDB")
+            self._stop.wait(delay)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def stats(self) -> Dict[str, Any]:
+        """重连次数、失败次数和当前断开时长等信息"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['connected'] = self.manager.connected
+        stats['running'] = bool(self._thread and self._thread.is_alive())
+        return stats
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬取日志缓冲写入器 - 在内存中攒批后用 insert_many 写入 crawl_logs
+
+保存接口只把日志追加到内存缓冲区，真正的写入由后台线程完成：
+缓冲区达到 batch_size 条或距上次写入超过 flush_interval 秒时触发，close() 时写完剩余日志。
+"""
+
+import threading
+import logging
+from typing import List, Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedLogWriter:
+    def __init__(self, flush_fn: Callable[[List[Dict[str, Any]]], None], batch_size: int = 100,
+                 flush_interval: float = 5.0, max_buffered: int = 10000):
+        """
+        初始化缓冲写入器
+
+        Args:
+            flush_fn: 批量写入函数，接收一批日志
+            batch_size: 缓冲区达到该条数时立即写入
+            flush_interval: 两次写入之间的最长间隔（秒）
+            max_buffered: 写入持续失败时最多保留的日志条数，超过后丢弃最旧的日志
+        """
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # 保证同一时刻只有一个线程在写入，日志按追加顺序落库
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._counters = {'written': 0, 'flushes': 0, 'dropped': 0, 'failures': 0}
+
+    def add(self, entry: Dict[str, Any]):
+        """追加一条日志，不做任何 I/O，可在事件循环中直接调用"""
+        with self._lock:
+            self._buffer.append(entry)
+            if len(self._buffer) > self.max_buffered:
+                del self._buffer[0]
+                self._counters['dropped'] += 1
+            full = len(self._buffer) >= self.batch_size
+            if not self._closed:
+                self._ensure_thread()
+
+        if full:
+            self._wakeup.set()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='crawl-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if not self._closed:
+                self.flush()
+
+    def flush(self) -> int:
+        """立即写入缓冲区中的全部日志，返回写入条数；失败的批次放回缓冲区等待下次重试"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+
+            try:
+                self.flush_fn(batch)
+            except Exception as e:
+                logger.warning(f"批量写入爬取日志失败，{len(batch)} 条日志等待重试: {e}")
+                with self._lock:
+                    self._buffer[:0] = batch
+                    overflow = len(self._buffer) - self.max_buffered
+                    if overflow > 0:
+                        del self._buffer[:overflow]
+                        self._counters['dropped'] += overflow
+                    self._counters['failures'] += 1
+                return 0
+
+            with self._lock:
+                self._counters['written'] += len(batch)
+                self._counters['flushes'] += 1
+            return len(batch)
+
+    def pending(self) -> int:
+        """缓冲区中尚未写入的日志条数"""
+        with self._lock:
+            return len(self._buffer)
+
+    def stats(self) -> Dict[str, int]:
+        """写入/批次/丢弃/失败计数"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['pending'] = len(self._buffer)
+        return stats
+
+    def close(self):
+        """停止后台线程并写完剩余日志；之后再调用 add 会重新启动后台线程"""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        self._wakeup.set()
+        if thread and thread.is_alive():
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+        with self._lock:
+            self._closed = False
+            self._thread = None
+            self._wakeup.clear()
@@ -7,39 +7,121 @@
 import json
 import os
 import asyncio
+import base64
+import heapq
+import itertools
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
+from urllib.parse import unquote
 import logging
 
+from file_store import SegmentedNoteStore
+from note_stream import iter_json_array, take_notes, parse_time
+from query_cache import QueryCache
+from crawl_log_writer import BufferedLogWriter
+from write_spool import WriteSpool
+from connection_supervisor import ConnectionSupervisor
+from note_fingerprint import note_fingerprint, FINGERPRINT_FIELD
+from rollups import RollupStore, METRIC_FIELDS, DEFAULT_ROLLUP_PATH
+
 try:
     import pymongo
-    from pymongo import MongoClient
+    from bson import ObjectId
+    from pymongo import MongoClient, InsertOne, UpdateOne
+    from pymongo.errors import BulkWriteError, DuplicateKeyError, CollectionInvalid, ConnectionFailure
     import motor.motor_asyncio
     MONGODB_AVAILABLE = True
 except ImportError:
     print("⚠️ MongoDB库未安装，请运行: pip install pymongo motor")
     MONGODB_AVAILABLE = False
 
+# 物化统计文档的 _id
+STATISTICS_DOC_ID = 'global'
+
+
+def stat_key(name: Any) -> str:
+    """
+    把分类名、日期等转换为统计文档中可用作字段名的键
+
+    $inc 的点号路径中 '.' 会被当作嵌套层级，'$' 开头会被拒绝，这里把 '%'、'.'、'$' 转义为 %XX
+    """
+    return str(name).replace('%', '%25').replace('.', '%2E').replace('$', '%24')
+
+
+def unstat_key(key: str) -> str:
+    """stat_key 的逆操作"""
+    return unquote(key)
+
+# 以 BSON 日期存储的时间字段
+NOTE_TIME_FIELDS = ('crawl_time', 'publish_time')
+
+# 列表视图使用的投影，不返回正文和图片
+NOTE_LIST_PROJECTION = {'content': 0, 'images': 0}
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DatabaseManager:
-    def __init__(self, connection_string: str = "mongodb://localhost:27017/", db_name: str = "xiaohongshu_data"):
+    def __init__(self, connection_string: str = "mongodb://localhost:27017/", db_name: str = "xiaohongshu_data",
+                 bulk_chunk_size: int = 1000, keyword_versions_kept: int = 5,
+                 cache_max_entries: int = 256, cache_ttl_seconds: float = 60,
+                 crawl_log_batch_size: int = 100, crawl_log_flush_interval: float = 5.0,
+                 crawl_log_max_bytes: int = 16 * 1024 * 1024, crawl_log_ttl_days: int = 30,
+                 max_pool_size: int = 50, socket_timeout_ms: int = 20000, connect_timeout_ms: int = 5000,
+                 server_selection_timeout_ms: int = 5000, auto_reconnect: bool = True,
+                 ping_interval: float = 30, max_reconnect_backoff: float = 60,
+                 rollup_path: str = DEFAULT_ROLLUP_PATH):
         """
         初始化数据库管理器
         
         Args:
             connection_string: MongoDB连接字符串
             db_name: 数据库名称
+            bulk_chunk_size: 批量写入时每个 bulk_write 的文档数量
+            keyword_versions_kept: 保留的关键词历史版本数量（至少为 2，保证切换时正在读取旧版本的请求不受影响）
+            cache_max_entries: 查询缓存的最大条目数
+            cache_ttl_seconds: 查询缓存的存活时间（秒）
+            crawl_log_batch_size: 爬取日志攒够多少条后批量写入
+            crawl_log_flush_interval: 爬取日志最长多久写入一次（秒）
+            crawl_log_max_bytes: 新建 crawl_logs 固定大小集合的容量
+            crawl_log_ttl_days: 已存在的普通 crawl_logs 集合中日志的保留天数
+            max_pool_size: 每个客户端连接池的最大连接数
+            socket_timeout_ms: 单次读写的套接字超时
+            connect_timeout_ms: 建立连接的超时
+            server_selection_timeout_ms: 选择可用服务器的超时
+            auto_reconnect: 连接失败或断开后是否在后台自动重连，断开期间的写入暂存后回放
+            ping_interval: 已连接时健康检查的间隔（秒）
+            max_reconnect_backoff: 重连指数退避的上限（秒）
+            rollup_path: 关键词/分类指标汇总表的 SQLite 文件路径
         """
         self.connection_string = connection_string
         self.db_name = db_name
+        self.bulk_chunk_size = bulk_chunk_size
+        self.keyword_versions_kept = max(2, keyword_versions_kept)
         self.client = None
         self.db = None
         self.async_client = None
         self.async_db = None
         self.connected = False
+        self.note_store = None
+        self.query_cache = QueryCache(cache_max_entries, cache_ttl_seconds)
+        # 指纹比对的累计计数，用于计算跳过率
+        self.write_metrics = {'notes_seen': 0, 'notes_skipped': 0}
+        self.rollups = RollupStore(rollup_path)
+        self.crawl_log_max_bytes = crawl_log_max_bytes
+        self.crawl_log_ttl_days = crawl_log_ttl_days
+        self.crawl_log_writer = BufferedLogWriter(self._write_crawl_logs, crawl_log_batch_size,
+                                                  crawl_log_flush_interval)
+        self.client_options = {
+            'maxPoolSize': max_pool_size,
+            'socketTimeoutMS': socket_timeout_ms,
+            'connectTimeoutMS': connect_timeout_ms,
+            'serverSelectionTimeoutMS': server_selection_timeout_ms
+        }
+        self.auto_reconnect = auto_reconnect and MONGODB_AVAILABLE
+        self.supervisor = ConnectionSupervisor(self, ping_interval=ping_interval, max_backoff=max_reconnect_backoff)
+        self.write_spool = WriteSpool(os.path.join(os.path.dirname(__file__), 'data', 'write_spool.jsonl'))
         
         # 集合名称
         self.collections = {
@@ -47,39 +129,114 @@ class DatabaseManager:
             'keywords': 'trending_keywords', 
             'users': 'user_profiles',
             'trends': 'trend_analysis',
-            'crawl_logs': 'crawl_logs'
+            'crawl_logs': 'crawl_logs',
+            'statistics': 'statistics',
+            'keyword_versions': 'keyword_versions'
         }
         
-    def connect(self) -> bool:
-        """连接到MongoDB"""
+    def connect(self, start_supervisor: bool = True) -> bool:
+        """
+        连接到MongoDB
+        
+        Args:
+            start_supervisor: 是否启动后台连接监督器（auto_reconnect 关闭时无效）
+        """
         if not MONGODB_AVAILABLE:
             logger.warning("MongoDB不可用，将使用文件存储")
             return False
             
         try:
+            self._close_clients()
+            
             # 同步客户端
-            self.client = MongoClient(self.connection_string, serverSelectionTimeoutMS=5000)
+            self.client = MongoClient(self.connection_string, **self.client_options)
             self.db = self.client[self.db_name]
             
             # 测试连接
             self.client.admin.command('ping')
             
             # 异步客户端
-            self.async_client = motor.motor_asyncio.AsyncIOMotorClient(self.connection_string)
+            self.async_client = motor.motor_asyncio.AsyncIOMotorClient(self.connection_string, **self.client_options)
             self.async_db = self.async_client[self.db_name]
             
-            self.connected = True
-            logger.info(f"✅ 成功连接到MongoDB: {self.db_name}")
-            
             # 创建索引
             self._create_indexes()
             
-            return True
+            # 先回放断开期间暂存的写入再切换到数据库模式，回放期间的新写入继续进入暂存队列，
+            # 旧的暂存写入不会覆盖切换后的新写入
+            self._replay_spool()
+            self.connected = True
+            # 之前缓存的可能是文件模式的结果
+            self.query_cache.invalidate()
+            logger.info(f"✅ 成功连接到MongoDB: {self.db_name}")
+            
+            # 回放最后一轮与切换同时发生的暂存写入（按 crawl_time / 版本时间跳过已被更新的数据）
+            self._replay_spool()
             
         except Exception as e:
             logger.error(f"❌ MongoDB连接失败: {e}")
             self.connected = False
+        
+        if start_supervisor and self.auto_reconnect:
+            self.supervisor.start()
+        return self.connected
+    
+    def _close_clients(self):
+        """关闭旧的客户端，重连时避免连接池泄漏"""
+        for client in (self.client, self.async_client):
+            if client:
+                try:
+                    client.close()
+                except Exception:
+                    pass
+        self.client = self.async_client = None
+    
+    def _mark_disconnected(self, error: Exception):
+        """切换到文件模式，由连接监督器负责重连"""
+        if self.connected:
+            logger.warning(f"⚠️ MongoDB连接断开，暂时使用文件存储: {error}")
+        self.connected = False
+        self.query_cache.invalidate()
+    
+    def _handle_connection_error(self, error: Exception) -> bool:
+        """如果是连接错误则切换到文件模式并通知监督器重连，返回是否为连接错误"""
+        if not MONGODB_AVAILABLE or not isinstance(error, ConnectionFailure):
             return False
+        if self.auto_reconnect:
+            self.supervisor.notify_failure(error)
+        else:
+            self._mark_disconnected(error)
+        return True
+    
+    def _replay_spool(self):
+        """
+        把暂存队列中的写入批量回放到 MongoDB
+        
+        直接写入数据库，不检查 connected（连接时在切换到数据库模式之前调用）；
+        已存储的数据比暂存的更新时跳过。连接错误向上抛出，其他错误只记录，暂存文件保留到下次回放。
+        """
+        if not self.write_spool.has_pending():
+            return
+        
+        def apply(kind: str, data: List[Dict[str, Any]], spooled_at: Optional[datetime]):
+            if kind == 'keywords':
+                self._write_keywords(data, spooled_at=spooled_at)
+            elif kind == 'crawl_logs':
+                for entry in data:
+                    entry['timestamp'] = parse_time(entry.get('timestamp')) or datetime.now()
+                    # 保留写入失败前分配的 _id，部分写入成功的日志回放时按重复键跳过
+                    if isinstance(entry.get('_id'), str) and ObjectId.is_valid(entry['_id']):
+                        entry['_id'] = ObjectId(entry['_id'])
+                self._insert_crawl_logs(data)
+            else:
+                self._write_notes_to_db(data, replay=True)
+        
+        try:
+            self.write_spool.replay(apply)
+        except Exception as e:
+            logger.error(f"❌ 回放暂存写入失败，下次连接时重试: {e}")
+            if MONGODB_AVAILABLE and isinstance(e, ConnectionFailure):
+                raise
     
     def _create_indexes(self):
         """创建数据库索引"""
@@ -88,50 +245,71 @@ class DatabaseManager:
             notes_collection = self.db[self.collections['notes']]
             notes_collection.create_index("note_id", unique=True)
             notes_collection.create_index("author_id")
-            notes_collection.create_index("category")
             notes_collection.create_index("publish_time")
-            notes_collection.create_index("crawl_time")
-            
+            # 时间倒序 + _id 作为并列时的决胜字段，同时服务 get_notes 和游标分页
+            notes_collection.create_index([("crawl_time", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)])
+            # 分类 + 时间窗口查询由同一个复合索引完成过滤和排序
+            notes_collection.create_index([("category", pymongo.ASCENDING), ("crawl_time", pymongo.DESCENDING),
+                                           ("_id", pymongo.DESCENDING)])
+            notes_collection.create_index([("category", pymongo.ASCENDING), ("publish_time", pymongo.DESCENDING)])
+            # 写入前的指纹查询只读取索引即可返回 (note_id, fingerprint)
+            notes_collection.create_index([("note_id", pymongo.ASCENDING), ("fingerprint", pymongo.ASCENDING)])
+
             # 关键词集合索引
             keywords_collection = self.db[self.collections['keywords']]
-            keywords_collection.create_index("keyword", unique=True)
+            # 版本化后同一关键词会有多行，旧的 keyword 唯一索引需要替换
+            if keywords_collection.index_information().get('keyword_1', {}).get('unique'):
+                keywords_collection.drop_index('keyword_1')
+            keywords_collection.update_many(
+                {'valid_from': {'$exists': False}},
+                {'$set': {'valid_from': 0, 'valid_to': None}}
+            )
+            keywords_collection.create_index([("keyword", pymongo.ASCENDING), ("valid_from", pymongo.ASCENDING)], unique=True)
+            keywords_collection.create_index([("valid_from", pymongo.ASCENDING), ("valid_to", pymongo.ASCENDING)])
             keywords_collection.create_index("heat")
             
-            # 爬取日志索引
-            logs_collection = self.db[self.collections['crawl_logs']]
-            logs_collection.create_index("timestamp")
-            logs_collection.create_index("status")
+            # 爬取日志集合及索引
+            self._ensure_crawl_log_collection()
             
             logger.info("✅ 数据库索引创建完成")
             
         except Exception as e:
             logger.error(f"❌ 创建索引失败: {e}")
     
+    def _ensure_crawl_log_collection(self):
+        """crawl_logs 新建为固定大小集合；已存在的普通集合改用 TTL 索引按时间过期"""
+        name = self.collections['crawl_logs']
+        if name not in self.db.list_collection_names():
+            try:
+                self.db.create_collection(name, capped=True, size=self.crawl_log_max_bytes)
+            except CollectionInvalid:
+                pass  # 其他进程已经创建
+        
+        logs_collection = self.db[name]
+        if logs_collection.options().get('capped'):
+            logs_collection.create_index("timestamp")
+        else:
+            ttl_seconds = self.crawl_log_ttl_days * 86400
+            existing = logs_collection.index_information().get('timestamp_1')
+            if existing and existing.get('expireAfterSeconds') != ttl_seconds:
+                # 普通索引不能直接改成 TTL 索引，需要先删除
+                logs_collection.drop_index('timestamp_1')
+            logs_collection.create_index("timestamp", expireAfterSeconds=ttl_seconds)
+        logs_collection.create_index("status")
+    
     def save_notes(self, notes: List[Dict[str, Any]]) -> bool:
         """保存笔记数据"""
         if not self.connected:
             return self._save_to_file(notes, 'notes.json')
         
         try:
-            collection = self.db[self.collections['notes']]
+            summary = self.bulk_save_notes(notes)
             
-            # 批量插入，忽略重复
-            for note in notes:
-                try:
-                    # 添加存储时间戳
-                    note['stored_at'] = datetime.now()
-                    
-                    # 使用upsert避免重复
-                    collection.update_one(
-                        {'note_id': note.get('id', note.get('note_id'))},
-                        {'$set': note},
-                        upsert=True
-                    )
-                except Exception as e:
-                    logger.warning(f"保存笔记失败: {e}")
-                    continue
+            if summary['failed_ids']:
+                logger.warning(f"⚠️ {len(summary['failed_ids'])} 条笔记保存失败: {summary['failed_ids'][:10]}")
             
-            logger.info(f"✅ 成功保存 {len(notes)} 条笔记到数据库")
+            logger.info(f"✅ 成功保存 {len(notes) - len(summary['failed_ids'])} 条笔记到数据库"
+                        f"（未变化跳过 {summary['skipped']} 条, 跳过率 {summary['skip_ratio']:.1%}）")
             
             # 记录爬取日志
             self._log_crawl_activity('notes', len(notes), 'success')
@@ -140,60 +318,473 @@ class DatabaseManager:
             
         except Exception as e:
             logger.error(f"❌ 保存笔记失败: {e}")
+            self._handle_connection_error(e)
             return self._save_to_file(notes, 'notes.json')
     
-    def save_keywords(self, keywords: List[Dict[str, Any]]) -> bool:
-        """保存关键词数据"""
-        if not self.connected:
-            return self._save_to_file(keywords, 'keywords.json')
+    def bulk_save_notes(self, notes: List[Dict[str, Any]], chunk_size: int = None) -> Dict[str, Any]:
+        """
+        批量保存笔记（无序 bulk_write）
         
-        try:
-            collection = self.db[self.collections['keywords']]
+        每个分块先按 note_id 一次性查出已存储的指纹，指纹未变化的笔记直接跳过，
+        其余笔记用一次 bulk_write 写入，单条失败不会中断同一分块内的其余写入。
+        
+        Args:
+            notes: 笔记列表
+            chunk_size: 每次 bulk_write 的笔记数量，默认使用 self.bulk_chunk_size
             
-            # 清空旧数据（关键词数据需要保持最新）
-            collection.delete_many({})
+        Returns:
+            写入摘要: inserted/updated/unchanged/skipped 数量、跳过率、失败的 note_id 以及各分块的错误信息
+        """
+        if not self.connected:
+            summary = self._new_write_summary(notes)
+            if not self._save_to_file(notes, 'notes.json'):
+                summary['failed_ids'] = [note.get('id', note.get('note_id')) for note in notes]
+            return summary
+        
+        return self._write_notes_to_db(notes, chunk_size)
+    
+    def _write_notes_to_db(self, notes: List[Dict[str, Any]], chunk_size: int = None,
+                           replay: bool = False) -> Dict[str, Any]:
+        """
+        bulk_save_notes 的数据库写入部分
+        
+        Args:
+            replay: 回放暂存写入；已存储的 crawl_time 更新的笔记不覆盖，
+                    连接错误直接抛出而不是再次写入暂存队列
+        """
+        chunk_size = chunk_size or self.bulk_chunk_size
+        summary = self._new_write_summary(notes)
+        collection = self.db[self.collections['notes']]
+        
+        for start in range(0, len(notes), chunk_size):
+            chunk = notes[start:start + chunk_size]
+            note_ids = [note.get('id', note.get('note_id')) for note in chunk]
             
-            # 添加时间戳
-            for keyword in keywords:
-                keyword['updated_at'] = datetime.now()
+            try:
+                stored = {
+                    doc['note_id']: doc
+                    for doc in collection.find({'note_id': {'$in': note_ids}}, self._FINGERPRINT_PROJECTION)
+                }
+                if replay:
+                    chunk = self._drop_stale_notes(chunk, stored, summary)
+                chunk = self._select_changed_notes(chunk, stored, summary)
+                if not chunk:
+                    continue
+                note_ids, operations = self._build_note_operations(chunk)
+                result = collection.bulk_write(operations, ordered=False).bulk_api_result
+            except BulkWriteError as e:
+                result = e.details
+                self._record_chunk_error(summary, start, note_ids, e)
+            except Exception as e:
+                if self._handle_connection_error(e):
+                    if replay:
+                        raise
+                    # 连接已断开，剩余笔记转入文件存储和暂存队列，重连后回放
+                    if not self._save_to_file(notes[start:], 'notes.json'):
+                        summary['failed_ids'].extend(n.get('id', n.get('note_id')) for n in notes[start:])
+                    break
+                self._record_chunk_error(summary, start, note_ids, e)
+                continue
             
-            # 批量插入
-            if keywords:
-                collection.insert_many(keywords)
+            self._merge_bulk_result(summary, result)
+            self._increment_statistics(self._statistics_delta(chunk, result))
+            self._record_rollups(chunk, stored, result)
+        
+        self._finish_write_summary(summary)
+        self.query_cache.invalidate('notes', 'statistics')
+        return summary
+    
+    async def async_save_notes(self, notes: List[Dict[str, Any]], chunk_size: int = None) -> Dict[str, Any]:
+        """
+        异步批量保存笔记，与 bulk_save_notes 返回相同的写入摘要
+        
+        使用 motor 客户端的连接池，不阻塞事件循环。
+        """
+        chunk_size = chunk_size or self.bulk_chunk_size
+        summary = self._new_write_summary(notes)
+        
+        if not self.connected:
+            loop = asyncio.get_running_loop()
+            if not await loop.run_in_executor(None, self._save_to_file, notes, 'notes.json'):
+                summary['failed_ids'] = [note.get('id', note.get('note_id')) for note in notes]
+            return summary
+        
+        collection = self.async_db[self.collections['notes']]
+        
+        for start in range(0, len(notes), chunk_size):
+            chunk = notes[start:start + chunk_size]
+            note_ids = [note.get('id', note.get('note_id')) for note in chunk]
             
-            logger.info(f"✅ 成功保存 {len(keywords)} 个关键词到数据库")
+            try:
+                stored = {
+                    doc['note_id']: doc
+                    async for doc in collection.find({'note_id': {'$in': note_ids}}, self._FINGERPRINT_PROJECTION)
+                }
+                chunk = self._select_changed_notes(chunk, stored, summary)
+                if not chunk:
+                    continue
+                note_ids, operations = self._build_note_operations(chunk)
+                result = (await collection.bulk_write(operations, ordered=False)).bulk_api_result
+            except BulkWriteError as e:
+                result = e.details
+                self._record_chunk_error(summary, start, note_ids, e)
+            except Exception as e:
+                if self._handle_connection_error(e):
+                    # 连接已断开，剩余笔记转入文件存储和暂存队列，重连后回放
+                    loop = asyncio.get_running_loop()
+                    if not await loop.run_in_executor(None, self._save_to_file, notes[start:], 'notes.json'):
+                        summary['failed_ids'].extend(n.get('id', n.get('note_id')) for n in notes[start:])
+                    break
+                self._record_chunk_error(summary, start, note_ids, e)
+                continue
             
-            # 记录爬取日志
-            self._log_crawl_activity('keywords', len(keywords), 'success')
+            self._merge_bulk_result(summary, result)
+            await self._async_increment_statistics(self._statistics_delta(chunk, result))
+            await asyncio.get_running_loop().run_in_executor(None, self._record_rollups, chunk, stored, result)
+        
+        self._finish_write_summary(summary)
+        self.query_cache.invalidate('notes', 'statistics')
+        if notes:
+            await self._async_log_crawl_activity('notes', len(notes), 'success')
+        
+        logger.info(f"✅ 异步保存 {len(notes) - len(summary['failed_ids'])} 条笔记到数据库")
+        return summary
+    
+    @staticmethod
+    def _new_write_summary(notes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """创建空的写入摘要"""
+        return {
+            'total': len(notes),
+            'inserted': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'skipped': 0,
+            'skip_ratio': 0.0,
+            'failed_ids': [],
+            'chunk_errors': []
+        }
+    
+    # 写入前读取指纹，以及计算汇总增量所需的旧计数
+    _FINGERPRINT_PROJECTION = {'note_id': 1, FINGERPRINT_FIELD: 1, 'crawl_time': 1, '_id': 0,
+                               **{field: 1 for field in METRIC_FIELDS.values()}}
+    
+    @staticmethod
+    def _drop_stale_notes(chunk: List[Dict[str, Any]], stored: Dict[str, Dict[str, Any]],
+                          summary: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """回放时去掉已存储版本比暂存版本更新（crawl_time 更晚）的笔记"""
+        fresh = []
+        for note in chunk:
+            stored_time = parse_time(stored.get(note.get('id', note.get('note_id')), {}).get('crawl_time'))
+            note_time = parse_time(note.get('crawl_time'))
+            if stored_time and note_time and stored_time > note_time:
+                continue
+            fresh.append(note)
+        summary['skipped'] += len(chunk) - len(fresh)
+        return fresh
+    
+    def _select_changed_notes(self, chunk: List[Dict[str, Any]], stored: Dict[str, Dict[str, Any]],
+                              summary: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        计算分块内每条笔记的指纹，返回与已存储指纹不同（或尚未存储）的笔记
+        
+        跳过的笔记不会刷新 crawl_time/stored_at。
+        """
+        changed = []
+        for note in chunk:
+            # 先统一时间字段格式，同一时间的字符串和 datetime 得到相同指纹
+            self._normalize_time_fields(note)
+            note[FINGERPRINT_FIELD] = note_fingerprint(note)
+            if stored.get(note.get('id', note.get('note_id')), {}).get(FINGERPRINT_FIELD) != note[FINGERPRINT_FIELD]:
+                changed.append(note)
+        
+        skipped = len(chunk) - len(changed)
+        summary['skipped'] += skipped
+        self.write_metrics['notes_seen'] += len(chunk)
+        self.write_metrics['notes_skipped'] += skipped
+        return changed
+    
+    def _record_rollups(self, chunk: List[Dict[str, Any]], stored: Dict[str, Dict[str, Any]], result: Dict[str, Any]):
+        """把分块中写入成功的笔记累加到指标汇总表，失败时只记录警告"""
+        failed = {item['index'] for item in result.get('writeErrors', [])}
+        written = [note for index, note in enumerate(chunk) if index not in failed]
+        try:
+            self.rollups.record(written, {str(note_id): doc for note_id, doc in stored.items()})
+        except Exception as e:
+            logger.warning(f"更新指标汇总失败: {e}")
+    
+    @staticmethod
+    def _finish_write_summary(summary: Dict[str, Any]):
+        """计算本次写入的跳过率"""
+        if summary['total']:
+            summary['skip_ratio'] = summary['skipped'] / summary['total']
+    
+    @staticmethod
+    def _build_note_operations(chunk: List[Dict[str, Any]]):
+        """把一个分块的笔记转换为 upsert 操作，返回 (note_ids, operations)"""
+        note_ids = []
+        operations = []
+        
+        for note in chunk:
+            note_id = note.get('id', note.get('note_id'))
+            # 时间字段统一存储为 BSON 日期
+            DatabaseManager._normalize_time_fields(note)
+            # 添加存储时间戳
+            note['stored_at'] = datetime.now()
+            note_ids.append(note_id)
+            # 使用upsert避免重复
+            operations.append(UpdateOne({'note_id': note_id}, {'$set': note}, upsert=True))
+        
+        return note_ids, operations
+    
+    @staticmethod
+    def _normalize_time_fields(note: Dict[str, Any]):
+        """把 ISO 字符串或时间戳形式的时间字段转换为 datetime，无法解析时保持原值"""
+        for field in NOTE_TIME_FIELDS:
+            value = note.get(field)
+            if value is not None and not isinstance(value, datetime):
+                parsed = parse_time(value)
+                if parsed is not None:
+                    note[field] = parsed
+    
+    def _record_chunk_error(self, summary: Dict[str, Any], start: int, note_ids: List[str], error: Exception):
+        """记录分块写入失败的 note_id；BulkWriteError 只标记真正失败的文档"""
+        if isinstance(error, BulkWriteError):
+            write_errors = error.details.get('writeErrors', [])
+            failed = [note_ids[item['index']] for item in write_errors]
+            messages = [item.get('errmsg', '') for item in write_errors]
+        else:
+            failed = list(note_ids)
+            messages = [str(error)]
+        
+        summary['failed_ids'].extend(failed)
+        summary['chunk_errors'].append({
+            'chunk_start': start,
+            'failed_ids': failed,
+            'errors': messages
+        })
+        logger.warning(f"批量保存笔记失败（分块起点 {start}）: {len(failed)} 条, {messages[:1]}")
+    
+    @staticmethod
+    def _merge_bulk_result(summary: Dict[str, Any], result: Dict[str, Any]):
+        """把 bulk_write 的原始结果累加到写入摘要中"""
+        upserted = result.get('nUpserted', 0)
+        matched = result.get('nMatched', 0)
+        modified = result.get('nModified', 0)
+        
+        summary['inserted'] += upserted
+        summary['updated'] += modified
+        summary['unchanged'] += matched - modified
+    
+    @staticmethod
+    def _statistics_delta(chunk: List[Dict[str, Any]], result: Dict[str, Any]) -> Dict[str, int]:
+        """根据 bulk_write 结果中新插入的文档计算统计文档的 $inc 增量"""
+        delta = {}
+        for item in result.get('upserted', []):
+            note = chunk[item['index']]
+            category = note.get('category') or '未知'
+            day = str(note.get('crawl_time') or note['stored_at'])[:10]
             
+            delta['total_notes'] = delta.get('total_notes', 0) + 1
+            category_field = f'notes_by_category.{stat_key(category)}'
+            day_field = f'notes_by_day.{stat_key(day)}'
+            delta[category_field] = delta.get(category_field, 0) + 1
+            delta[day_field] = delta.get(day_field, 0) + 1
+        
+        return delta
+    
+    def _increment_statistics(self, delta: Dict[str, int]):
+        """把增量写入物化统计文档，失败时留给定期校正任务修复"""
+        if not delta:
+            return
+        try:
+            self.db[self.collections['statistics']].update_one(
+                {'_id': STATISTICS_DOC_ID},
+                {'$inc': delta, '$set': {'updated_at': datetime.now()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"更新统计文档失败: {e}")
+    
+    async def _async_increment_statistics(self, delta: Dict[str, int]):
+        """异步版本的 _increment_statistics"""
+        if not delta:
+            return
+        try:
+            await self.async_db[self.collections['statistics']].update_one(
+                {'_id': STATISTICS_DOC_ID},
+                {'$inc': delta, '$set': {'updated_at': datetime.now()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"更新统计文档失败: {e}")
+    
+    def save_keywords(self, keywords: List[Dict[str, Any]]) -> bool:
+        """
+        保存关键词数据（版本化写入）
+        
+        新版本的行先写入但对读取者不可见，最后通过版本指针一次性切换，读取者始终看到完整的某个版本。
+        heat/trend 没有变化的关键词不会重写，旧版本保留 keyword_versions_kept 个用于计算趋势变化。
+        """
+        if not self.connected:
+            return self._save_to_file(keywords, 'keywords.json')
+        
+        try:
+            self._write_keywords(keywords)
             return True
             
         except Exception as e:
             logger.error(f"❌ 保存关键词失败: {e}")
+            self._handle_connection_error(e)
             return self._save_to_file(keywords, 'keywords.json')
     
-    def get_notes(self, limit: int = 20, category: str = None, days: int = 7) -> List[Dict[str, Any]]:
-        """获取笔记数据"""
+    def _write_keywords(self, keywords: List[Dict[str, Any]], spooled_at: datetime = None):
+        """
+        save_keywords 的数据库写入部分
+        
+        Args:
+            spooled_at: 回放暂存快照时传入暂存时间；当前版本在此之后发布时跳过，旧快照不覆盖新版本
+        """
+        collection = self.db[self.collections['keywords']]
+        if spooled_at is not None:
+            pointer = self.db[self.collections['keyword_versions']].find_one({'_id': 'current'}) or {}
+            published_at = parse_time(pointer.get('updated_at'))
+            if published_at and published_at > spooled_at:
+                logger.info(f"⏭️ 暂存的关键词快照早于当前版本（{published_at}），跳过回放")
+                return
+        
+        current = self._current_keyword_version()
+        new_version = current + 1
+        now = datetime.now()
+        
+        live = {row['keyword']: row for row in collection.find(self._keyword_version_query(current))}
+        operations = []
+        changed = 0
+        
+        for keyword in keywords:
+            old = live.pop(keyword['keyword'], None)
+            if old and old.get('heat') == keyword.get('heat') and old.get('trend') == keyword.get('trend'):
+                continue
+            
+            # 旧行在新版本中失效，新行从新版本开始生效
+            if old:
+                operations.append(UpdateOne({'_id': old['_id']}, {'$set': {'valid_to': new_version}}))
+            row = {k: v for k, v in keyword.items() if k != '_id'}
+            row.update({'valid_from': new_version, 'valid_to': None, 'updated_at': now})
+            operations.append(InsertOne(row))
+            changed += 1
+        
+        # 本次没有出现的关键词在新版本中移除
+        for old in live.values():
+            operations.append(UpdateOne({'_id': old['_id']}, {'$set': {'valid_to': new_version}}))
+        
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+        
+        # 原子切换版本指针；指针已被其他写入者推进时撤销本次写入
+        try:
+            result = self.db[self.collections['keyword_versions']].update_one(
+                {'_id': 'current', 'version': current} if current else {'_id': 'current', 'version': {'$in': [0, None]}},
+                {'$set': {'version': new_version, 'updated_at': now}},
+                upsert=not current
+            )
+            switched = bool(result.modified_count or result.upserted_id)
+        except DuplicateKeyError:
+            switched = False
+        if not switched:
+            self._rollback_keyword_version(new_version)
+            raise RuntimeError(f"关键词版本 {current} 已被并发写入推进")
+        
+        # 清理超出保留数量的旧版本
+        oldest_kept = new_version - self.keyword_versions_kept + 1
+        collection.delete_many({'valid_to': {'$ne': None, '$lte': oldest_kept}})
+        
+        self.db[self.collections['statistics']].update_one(
+            {'_id': STATISTICS_DOC_ID},
+            {'$set': {'total_keywords': len(keywords), 'updated_at': now}},
+            upsert=True
+        )
+        
+        self.query_cache.invalidate('keywords', 'statistics')
+        logger.info(f"✅ 成功保存 {len(keywords)} 个关键词到数据库（版本 {new_version}，变更 {changed}，移除 {len(live)}）")
+        
+        # 记录爬取日志
+        self._log_crawl_activity('keywords', len(keywords), 'success')
+    
+    def _current_keyword_version(self) -> int:
+        """当前对读取者可见的关键词版本，尚未写入过时为 0"""
+        pointer = self.db[self.collections['keyword_versions']].find_one({'_id': 'current'})
+        return (pointer or {}).get('version') or 0
+    
+    @staticmethod
+    def _keyword_version_query(version: int) -> Dict[str, Any]:
+        """某个版本中可见的关键词行: valid_from <= version < valid_to"""
+        return {
+            'valid_from': {'$lte': version},
+            '$or': [{'valid_to': None}, {'valid_to': {'$gt': version}}]
+        }
+    
+    def _rollback_keyword_version(self, version: int):
+        """撤销尚未切换指针的关键词版本"""
+        collection = self.db[self.collections['keywords']]
+        collection.delete_many({'valid_from': version})
+        collection.update_many({'valid_to': version}, {'$set': {'valid_to': None}})
+    
+    def get_keyword_deltas(self, versions_back: int = 1) -> List[Dict[str, Any]]:
+        """
+        对比当前版本与 versions_back 个版本之前的关键词热度变化
+        
+        Returns:
+            按热度排序的关键词，附带 previous_heat、heat_delta 和 is_new
+        """
         if not self.connected:
-            return self._load_from_file('notes.json', limit)
+            return []
         
         try:
-            collection = self.db[self.collections['notes']]
+            collection = self.db[self.collections['keywords']]
+            current = self._current_keyword_version()
+            previous = {
+                row['keyword']: row.get('heat')
+                for row in collection.find(self._keyword_version_query(current - versions_back), {'keyword': 1, 'heat': 1})
+            }
             
-            # 构建查询条件
-            query = {}
+            deltas = []
+            for row in collection.find(self._keyword_version_query(current), {'_id': 0}).sort('heat', -1):
+                previous_heat = previous.get(row['keyword'])
+                row['previous_heat'] = previous_heat
+                row['is_new'] = previous_heat is None
+                row['heat_delta'] = (row.get('heat') or 0) - (previous_heat or 0) if previous_heat is not None else None
+                deltas.append(row)
             
-            # 按分类筛选
-            if category:
-                query['category'] = category
+            return deltas
             
-            # 按时间筛选（最近N天）
-            if days > 0:
-                since_date = datetime.now() - timedelta(days=days)
-                query['crawl_time'] = {'$gte': since_date.isoformat()}
+        except Exception as e:
+            logger.error(f"❌ 获取关键词变化失败: {e}")
+            return []
+    
+    def get_notes(self, limit: int = 20, category: str = None, days: int = 7,
+                  projection: Dict[str, int] = None) -> List[Dict[str, Any]]:
+        """
+        获取笔记数据（经过查询缓存）
+        
+        Args:
+            projection: 字段投影，列表视图可传入 NOTE_LIST_PROJECTION 以跳过正文和图片
+        """
+        key = ('notes', limit, category, days, tuple(sorted(projection.items())) if projection else None)
+        return self.query_cache.get_or_load(key, lambda: self._query_notes(limit, category, days, projection))
+    
+    def _query_notes(self, limit: int, category: str, days: int,
+                     projection: Dict[str, int] = None) -> List[Dict[str, Any]]:
+        """从数据库或文件存储读取笔记"""
+        if not self.connected:
+            notes = self._load_from_file('notes.json', limit, category, days)
+            return [self._apply_projection(note, projection) for note in notes] if projection else notes
+        
+        try:
+            collection = self.db[self.collections['notes']]
+            query = self._build_notes_query(category, days)
             
             # 查询并排序
-            cursor = collection.find(query).sort('crawl_time', -1).limit(limit)
+            cursor = collection.find(query, dict(projection) if projection else None).sort('crawl_time', -1).limit(limit)
             notes = list(cursor)
             
             # 转换ObjectId为字符串
@@ -206,16 +797,274 @@ class DatabaseManager:
             
         except Exception as e:
             logger.error(f"❌ 获取笔记失败: {e}")
-            return self._load_from_file('notes.json', limit)
+            self._handle_connection_error(e)
+            notes = self._load_from_file('notes.json', limit, category, days)
+            return [self._apply_projection(note, projection) for note in notes] if projection else notes
+    
+    @staticmethod
+    def _build_notes_query(category: str = None, days: int = 7) -> Dict[str, Any]:
+        """构建笔记查询条件"""
+        query = {}
+        
+        # 按分类筛选
+        if category:
+            query['category'] = category
+        
+        # 按时间筛选（最近N天）
+        if days > 0:
+            since_date = datetime.now() - timedelta(days=days)
+            query['crawl_time'] = {'$gte': since_date}
+        
+        return query
+    
+    @staticmethod
+    def _apply_projection(note: Dict[str, Any], projection: Dict[str, int]) -> Dict[str, Any]:
+        """在文件模式下按 MongoDB 投影语义裁剪字段"""
+        if any(projection.values()):
+            return {key: value for key, value in note.items() if projection.get(key)}
+        return {key: value for key, value in note.items() if key not in projection}
+    
+    def explain_notes_query(self, category: str = None, days: int = 7) -> Dict[str, Any]:
+        """
+        返回 get_notes 查询的执行计划摘要，用于确认查询命中了复合索引
+        
+        Returns:
+            winning plan 中的阶段、索引名以及扫描的键/文档数量
+        """
+        collection = self.db[self.collections['notes']]
+        query = self._build_notes_query(category, days)
+        explain = collection.find(query, dict(NOTE_LIST_PROJECTION)).sort('crawl_time', -1).limit(20).explain()
+        
+        stages = []
+        index_names = []
+        plan = explain['queryPlanner']['winningPlan']
+        plan = plan.get('queryPlan', plan)  # SBE 引擎把计划包在 queryPlan 中
+        while plan:
+            stages.append(plan.get('stage'))
+            if plan.get('indexName'):
+                index_names.append(plan['indexName'])
+            plan = plan.get('inputStage')
+        
+        execution = explain.get('executionStats', {})
+        return {
+            'stages': stages,
+            'index_names': index_names,
+            'keys_examined': execution.get('totalKeysExamined'),
+            'docs_examined': execution.get('totalDocsExamined')
+        }
+    
+    def migrate_time_fields(self, batch_size: int = 1000) -> int:
+        """
+        一次性迁移：把已有文档中字符串/数字形式的 crawl_time、publish_time 转换为 BSON 日期
+        
+        Returns:
+            被修改的文档数量
+        """
+        collection = self.db[self.collections['notes']]
+        type_filter = {'$or': [{field: {'$type': bson_type}} for field in NOTE_TIME_FIELDS
+                               for bson_type in ('string', 'number')]}
+        projection = {field: 1 for field in NOTE_TIME_FIELDS}
+        last_id = None
+        migrated = 0
+        
+        while True:
+            query = dict(type_filter)
+            if last_id is not None:
+                query = {'$and': [type_filter, {'_id': {'$gt': last_id}}]}
+            batch = list(collection.find(query, projection).sort('_id', 1).limit(batch_size))
+            if not batch:
+                break
+            
+            operations = []
+            for doc in batch:
+                fields = {field: doc[field] for field in NOTE_TIME_FIELDS if field in doc}
+                self._normalize_time_fields(fields)
+                changed = {field: value for field, value in fields.items() if isinstance(value, datetime)
+                           and not isinstance(doc[field], datetime)}
+                if changed:
+                    operations.append(UpdateOne({'_id': doc['_id']}, {'$set': changed}))
+            
+            if operations:
+                migrated += collection.bulk_write(operations, ordered=False).modified_count
+            last_id = batch[-1]['_id']
+        
+        self.query_cache.invalidate('notes')
+        logger.info(f"🔄 时间字段迁移完成: {migrated} 条笔记")
+        return migrated
+    
+    def get_notes_page(self, page_size: int = 20, cursor: str = None, category: str = None, days: int = 7,
+                       projection: Dict[str, int] = None) -> Dict[str, Any]:
+        """
+        基于游标的分页查询（按 crawl_time、_id 倒序）
+        
+        游标编码上一页最后一条笔记的 (crawl_time, id)，下一页直接从索引中的该位置继续，
+        不使用 skip，因此深页和首页的代价相同。
+        数据库模式的 id 为 _id，文件模式为笔记 id，游标中记录了来源，不能跨模式使用。
+        没有可解析 crawl_time 的笔记无法定位，两种模式都不参与分页。
+        
+        Args:
+            page_size: 每页数量
+            cursor: 上一次返回的 next_cursor，首页传 None
+            
+        Returns:
+            {'notes': 当前页笔记, 'next_cursor': 下一页游标，没有更多数据时为 None}
+        
+        Raises:
+            ValueError: 游标无法解析，或游标来自另一种存储模式
+        """
+        position = self._decode_page_cursor(cursor) if cursor else None
+        source = 'db' if self.connected else 'file'
+        if position and position[2] != source:
+            raise ValueError(f"分页游标来自{'数据库' if position[2] == 'db' else '文件存储'}，"
+                             f"当前为{'数据库' if source == 'db' else '文件存储'}模式，请从首页重新分页")
+        
+        if not self.connected:
+            return self._get_file_notes_page(page_size, position, category, days, projection)
+        
+        try:
+            collection = self.db[self.collections['notes']]
+            query = {'$and': [self._build_notes_query(category, days), {'crawl_time': {'$type': 'date'}}]}
+            
+            if position:
+                crawl_time, last_id, _ = position
+                last_id = ObjectId(last_id)
+                query['$and'].append({'$or': [
+                    {'crawl_time': {'$lt': crawl_time}},
+                    {'crawl_time': crawl_time, '_id': {'$lt': last_id}}
+                ]})
+            
+            # 多取一条用于判断是否还有下一页
+            notes = list(
+                collection.find(query, dict(projection) if projection else None)
+                .sort([('crawl_time', -1), ('_id', -1)])
+                .limit(page_size + 1)
+            )
+            has_more = len(notes) > page_size
+            notes = notes[:page_size]
+            
+            next_cursor = None
+            if has_more:
+                next_cursor = self._encode_page_cursor(notes[-1]['crawl_time'], notes[-1]['_id'], 'db')
+            
+            for note in notes:
+                note['_id'] = str(note['_id'])
+            
+            return {'notes': notes, 'next_cursor': next_cursor}
+            
+        except Exception as e:
+            logger.error(f"❌ 分页获取笔记失败: {e}")
+            self._handle_connection_error(e)
+            if position:
+                # 数据库游标在文件存储中没有对应位置，不能换一个数据源继续
+                raise
+            return self._get_file_notes_page(page_size, position, category, days, projection)
+    
+    def _get_file_notes_page(self, page_size: int, position, category: str, days: int,
+                             projection: Dict[str, int] = None) -> Dict[str, Any]:
+        """
+        文件模式的游标分页
+        
+        分段存储按写入顺序而不是 crawl_time 排列，这里流式扫描一遍并用大小为 page_size+1 的堆
+        选出游标之后的下一页，内存占用与页大小相关。
+        """
+        def sort_key(note):
+            return (parse_time(note.get('crawl_time')), str(note.get('id', note.get('note_id'))))
+        
+        notes = take_notes(self._get_note_store().iter_notes(), category=category, days=days)
+        # 与数据库模式相同：没有可解析 crawl_time 的笔记不参与分页
+        notes = (note for note in notes if parse_time(note.get('crawl_time')) is not None)
+        if position:
+            notes = (note for note in notes if sort_key(note) < position[:2])
+        
+        page = heapq.nlargest(page_size + 1, notes, key=sort_key)
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        
+        next_cursor = None
+        if has_more:
+            crawl_time, note_id = sort_key(page[-1])
+            next_cursor = self._encode_page_cursor(crawl_time, note_id, 'file')
+        
+        if projection:
+            page = [self._apply_projection(note, projection) for note in page]
+        
+        return {'notes': page, 'next_cursor': next_cursor}
+    
+    @staticmethod
+    def _encode_page_cursor(crawl_time: Any, note_id: Any, source: str) -> str:
+        """把 (crawl_time, id) 和来源（'db' / 'file'）编码为不透明的分页游标"""
+        payload = json.dumps({'t': parse_time(crawl_time).isoformat(), 'id': str(note_id), 's': source},
+                             separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def _decode_page_cursor(cursor: str):
+        """解析分页游标，返回 (crawl_time, id, 来源)"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            crawl_time, note_id = datetime.fromisoformat(payload['t']), str(payload['id'])
+        except Exception as e:
+            raise ValueError(f"无效的分页游标: {cursor}") from e
+        
+        # 旧版游标没有来源字段，按 id 是否为 ObjectId 判断
+        is_object_id = MONGODB_AVAILABLE and ObjectId.is_valid(note_id)
+        source = payload.get('s') or ('db' if is_object_id else 'file')
+        if source not in ('db', 'file') or (source == 'db' and not is_object_id):
+            raise ValueError(f"无效的分页游标: {cursor}")
+        return crawl_time, note_id, source
+    
+    async def async_get_notes(self, limit: int = 20, category: str = None, days: int = 7,
+                              projection: Dict[str, int] = None) -> List[Dict[str, Any]]:
+        """异步获取笔记数据，与 get_notes 共用查询缓存"""
+        key = ('notes', limit, category, days, tuple(sorted(projection.items())) if projection else None)
+        hit, notes, generation = self.query_cache.get(key)
+        if not hit:
+            notes = await self._async_query_notes(limit, category, days, projection)
+            self.query_cache.put(key, notes, generation)
+        return notes
+    
+    async def _async_query_notes(self, limit: int, category: str, days: int,
+                                 projection: Dict[str, int] = None) -> List[Dict[str, Any]]:
+        """异步从数据库或文件存储读取笔记"""
+        if not self.connected:
+            loop = asyncio.get_running_loop()
+            notes = await loop.run_in_executor(None, self._load_from_file, 'notes.json', limit, category, days)
+            return [self._apply_projection(note, projection) for note in notes] if projection else notes
+        
+        try:
+            collection = self.async_db[self.collections['notes']]
+            query = self._build_notes_query(category, days)
+            
+            cursor = collection.find(query, dict(projection) if projection else None).sort('crawl_time', -1).limit(limit)
+            notes = await cursor.to_list(length=limit)
+            
+            for note in notes:
+                if '_id' in note:
+                    note['_id'] = str(note['_id'])
+            
+            return notes
+            
+        except Exception as e:
+            logger.error(f"❌ 异步获取笔记失败: {e}")
+            self._handle_connection_error(e)
+            loop = asyncio.get_running_loop()
+            notes = await loop.run_in_executor(None, self._load_from_file, 'notes.json', limit, category, days)
+            return [self._apply_projection(note, projection) for note in notes] if projection else notes
     
     def get_keywords(self) -> List[Dict[str, Any]]:
-        """获取关键词数据"""
+        """获取关键词数据（经过查询缓存）"""
+        return self.query_cache.get_or_load(('keywords',), self._query_keywords)
+    
+    def _query_keywords(self) -> List[Dict[str, Any]]:
+        """从数据库或文件读取当前版本的关键词"""
         if not self.connected:
             return self._load_from_file('keywords.json')
         
         try:
             collection = self.db[self.collections['keywords']]
-            cursor = collection.find().sort('heat', -1)
+            query = self._keyword_version_query(self._current_keyword_version())
+            cursor = collection.find(query).sort('heat', -1)
             keywords = list(cursor)
             
             # 转换ObjectId为字符串
@@ -228,77 +1077,292 @@ class DatabaseManager:
             
         except Exception as e:
             logger.error(f"❌ 获取关键词失败: {e}")
+            self._handle_connection_error(e)
             return self._load_from_file('keywords.json')
     
-    def get_statistics(self) -> Dict[str, Any]:
-        """获取数据库统计信息"""
+    async def async_get_keywords(self) -> List[Dict[str, Any]]:
+        """异步获取关键词数据，与 get_keywords 共用查询缓存"""
+        hit, keywords, generation = self.query_cache.get(('keywords',))
+        if not hit:
+            keywords = await self._async_query_keywords()
+            self.query_cache.put(('keywords',), keywords, generation)
+        return keywords
+    
+    async def _async_query_keywords(self) -> List[Dict[str, Any]]:
+        """异步读取当前版本的关键词"""
         if not self.connected:
-            return self._get_file_statistics()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._load_from_file, 'keywords.json')
         
         try:
-            stats = {}
-            
-            # 笔记统计
-            notes_collection = self.db[self.collections['notes']]
-            stats['total_notes'] = notes_collection.count_documents({})
-            
-            # 按分类统计
-            pipeline = [
-                {'$group': {'_id': '$category', 'count': {'$sum': 1}}},
-                {'$sort': {'count': -1}}
-            ]
-            category_stats = list(notes_collection.aggregate(pipeline))
-            stats['notes_by_category'] = {item['_id']: item['count'] for item in category_stats}
+            query = self._keyword_version_query(await self._async_current_keyword_version())
+            collection = self.async_db[self.collections['keywords']]
+            keywords = await collection.find(query).sort('heat', -1).to_list(length=None)
             
-            # 最近7天的笔记数量
-            since_date = datetime.now() - timedelta(days=7)
-            recent_count = notes_collection.count_documents({
-                'crawl_time': {'$gte': since_date.isoformat()}
-            })
-            stats['recent_notes'] = recent_count
+            for keyword in keywords:
+                if '_id' in keyword:
+                    keyword['_id'] = str(keyword['_id'])
             
-            # 关键词统计
-            keywords_collection = self.db[self.collections['keywords']]
-            stats['total_keywords'] = keywords_collection.count_documents({})
+            return keywords
             
-            # 爬取日志统计
-            logs_collection = self.db[self.collections['crawl_logs']]
-            stats['total_crawls'] = logs_collection.count_documents({})
+        except Exception as e:
+            logger.error(f"❌ 异步获取关键词失败: {e}")
+            self._handle_connection_error(e)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._load_from_file, 'keywords.json')
+    
+    async def _async_current_keyword_version(self) -> int:
+        """异步读取当前对读取者可见的关键词版本（同 _current_keyword_version）"""
+        pointer = await self.async_db[self.collections['keyword_versions']].find_one({'_id': 'current'})
+        return (pointer or {}).get('version') or 0
+    
+    def get_statistics(self, fresh: bool = False) -> Dict[str, Any]:
+        """
+        获取数据库统计信息
+        
+        Args:
+            fresh: True 时绕过缓存扫描集合重新计算；默认读取写入时增量维护的统计文档（O(1)）
+        """
+        if fresh:
+            return self._query_statistics(fresh=True)
+        return self.query_cache.get_or_load(('statistics',), self._query_statistics)
+    
+    def _query_statistics(self, fresh: bool = False) -> Dict[str, Any]:
+        """读取物化统计文档或扫描集合计算统计信息"""
+        if not self.connected:
+            return self._get_file_statistics()
+        
+        try:
+            if not fresh:
+                doc = self.db[self.collections['statistics']].find_one({'_id': STATISTICS_DOC_ID})
+                if doc and 'total_notes' in doc:
+                    return self._format_statistics(doc)
+                
+                # 统计文档尚未建立，先完整计算一次
+                return self._format_statistics(self.reconcile_statistics())
             
+            stats = self._compute_statistics()
             logger.info("✅ 获取数据库统计信息成功")
             return stats
             
         except Exception as e:
             logger.error(f"❌ 获取统计信息失败: {e}")
+            self._handle_connection_error(e)
             return self._get_file_statistics()
     
-    def _log_crawl_activity(self, data_type: str, count: int, status: str):
-        """记录爬取活动"""
+    def _compute_statistics(self, include_days: bool = False) -> Dict[str, Any]:
+        """扫描集合计算统计信息"""
+        stats = {}
+        
+        # 笔记统计
+        notes_collection = self.db[self.collections['notes']]
+        stats['total_notes'] = notes_collection.count_documents({})
+        
+        # 按分类统计
+        pipeline = [
+            {'$group': {'_id': '$category', 'count': {'$sum': 1}}},
+            {'$sort': {'count': -1}}
+        ]
+        category_stats = list(notes_collection.aggregate(pipeline))
+        stats['notes_by_category'] = {item['_id']: item['count'] for item in category_stats}
+        
+        # 最近7天的笔记数量
+        since_date = datetime.now() - timedelta(days=7)
+        recent_count = notes_collection.count_documents({
+            'crawl_time': {'$gte': since_date}
+        })
+        stats['recent_notes'] = recent_count
+        
+        # 按爬取日期统计（用于重建物化统计文档）
+        if include_days:
+            pipeline = [
+                {'$group': {
+                    '_id': {'$dateToString': {
+                        'format': '%Y-%m-%d',
+                        'date': {'$convert': {'input': '$crawl_time', 'to': 'date', 'onError': None, 'onNull': None}},
+                        'onNull': '未知'
+                    }},
+                    'count': {'$sum': 1}
+                }}
+            ]
+            stats['notes_by_day'] = {item['_id']: item['count'] for item in notes_collection.aggregate(pipeline)}
+        
+        # 关键词统计
+        keywords_collection = self.db[self.collections['keywords']]
+        stats['total_keywords'] = keywords_collection.count_documents(
+            self._keyword_version_query(self._current_keyword_version())
+        )
+        
+        # 爬取日志统计
+        logs_collection = self.db[self.collections['crawl_logs']]
+        stats['total_crawls'] = logs_collection.count_documents({})
+        
+        return stats
+    
+    def reconcile_statistics(self) -> Dict[str, Any]:
+        """重新扫描集合并覆盖物化统计文档，修复增量维护产生的偏差"""
+        stats = self._compute_statistics(include_days=True)
+        # 与 $inc 增量使用相同的转义键
+        stats['notes_by_category'] = {
+            stat_key(category or '未知'): count for category, count in stats['notes_by_category'].items()
+        }
+        stats['notes_by_day'] = {stat_key(day): count for day, count in stats['notes_by_day'].items()}
+        # crawl_logs 只保留最近的日志，累计爬取次数不能从日志条数倒推
+        current = self.db[self.collections['statistics']].find_one({'_id': STATISTICS_DOC_ID}) or {}
+        stats['total_crawls'] = max(stats['total_crawls'], current.get('total_crawls', 0))
+        stats['updated_at'] = datetime.now()
+        stats['reconciled_at'] = stats['updated_at']
+        
+        self.db[self.collections['statistics']].replace_one({'_id': STATISTICS_DOC_ID}, stats, upsert=True)
+        self.query_cache.invalidate('statistics')
+        logger.info(f"🔧 统计文档已校正: {stats['total_notes']} 条笔记")
+        return stats
+    
+    @staticmethod
+    def _format_statistics(doc: Dict[str, Any]) -> Dict[str, Any]:
+        """把物化统计文档转换为 get_statistics 的返回格式"""
+        since_day = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+        by_category = {unstat_key(category): count for category, count in doc.get('notes_by_category', {}).items()}
+        by_day = {unstat_key(day): count for day, count in doc.get('notes_by_day', {}).items()}
+        
+        return {
+            'total_notes': doc.get('total_notes', 0),
+            'notes_by_category': dict(sorted(by_category.items(), key=lambda item: item[1], reverse=True)),
+            'recent_notes': sum(count for day, count in by_day.items() if day >= since_day),
+            'total_keywords': doc.get('total_keywords', 0),
+            'total_crawls': doc.get('total_crawls', 0),
+            'updated_at': doc.get('updated_at')
+        }
+    
+    async def async_get_statistics(self, fresh: bool = False) -> Dict[str, Any]:
+        """异步获取数据库统计信息；fresh=True 时绕过缓存，各项统计并发执行"""
+        if fresh:
+            return await self._async_query_statistics(fresh=True)
+        hit, stats, generation = self.query_cache.get(('statistics',))
+        if not hit:
+            stats = await self._async_query_statistics()
+            self.query_cache.put(('statistics',), stats, generation)
+        return stats
+    
+    async def _async_query_statistics(self, fresh: bool = False) -> Dict[str, Any]:
+        """异步读取物化统计文档或并发扫描集合"""
         if not self.connected:
-            return
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._get_file_statistics)
         
         try:
-            collection = self.db[self.collections['crawl_logs']]
-            log_entry = {
-                'timestamp': datetime.now(),
-                'data_type': data_type,
-                'count': count,
-                'status': status
+            if not fresh:
+                doc = await self.async_db[self.collections['statistics']].find_one({'_id': STATISTICS_DOC_ID})
+                if doc and 'total_notes' in doc:
+                    return self._format_statistics(doc)
+            
+            notes_collection = self.async_db[self.collections['notes']]
+            since_date = datetime.now() - timedelta(days=7)
+            pipeline = [
+                {'$group': {'_id': '$category', 'count': {'$sum': 1}}},
+                {'$sort': {'count': -1}}
+            ]
+            
+            # 只统计已发布版本的关键词，暂存中的新版本不计入（与 _compute_statistics 相同）
+            keyword_query = self._keyword_version_query(await self._async_current_keyword_version())
+            total_notes, category_stats, recent_count, total_keywords, total_crawls = await asyncio.gather(
+                notes_collection.count_documents({}),
+                notes_collection.aggregate(pipeline).to_list(length=None),
+                notes_collection.count_documents({'crawl_time': {'$gte': since_date}}),
+                self.async_db[self.collections['keywords']].count_documents(keyword_query),
+                self.async_db[self.collections['crawl_logs']].count_documents({})
+            )
+            
+            return {
+                'total_notes': total_notes,
+                'notes_by_category': {item['_id']: item['count'] for item in category_stats},
+                'recent_notes': recent_count,
+                'total_keywords': total_keywords,
+                'total_crawls': total_crawls
             }
-            collection.insert_one(log_entry)
             
         except Exception as e:
-            logger.warning(f"记录爬取日志失败: {e}")
+            logger.error(f"❌ 异步获取统计信息失败: {e}")
+            self._handle_connection_error(e)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._get_file_statistics)
+    
+    def _log_crawl_activity(self, data_type: str, count: int, status: str):
+        """记录爬取活动（先写入内存缓冲区，由后台线程批量落库，断开期间写入暂存队列）"""
+        self.crawl_log_writer.add({
+            'timestamp': datetime.now(),
+            'data_type': data_type,
+            'count': count,
+            'status': status
+        })
+    
+    async def _async_log_crawl_activity(self, data_type: str, count: int, status: str):
+        """异步记录爬取活动；缓冲区追加不涉及 I/O，不会阻塞事件循环"""
+        self._log_crawl_activity(data_type, count, status)
+    
+    def _write_crawl_logs(self, entries: List[Dict[str, Any]]):
+        """把一批爬取日志写入 crawl_logs，并累加统计文档中的爬取次数；未连接时写入暂存队列，重连后回放"""
+        if not self.connected:
+            self.write_spool.append('crawl_logs', entries)
+            return
+        try:
+            self._insert_crawl_logs(entries)
+        except Exception as e:
+            if not self._handle_connection_error(e):
+                raise
+            self.write_spool.append('crawl_logs', entries)
+    
+    def _insert_crawl_logs(self, entries: List[Dict[str, Any]]):
+        """写入 crawl_logs 并累加爬取次数（不检查连接状态，回放暂存日志时直接调用）"""
+        try:
+            self.db[self.collections['crawl_logs']].insert_many(entries, ordered=False)
+        except BulkWriteError as e:
+            # 上一次写入部分成功后重试时，已写入的日志带着相同的 _id 会报重复键
+            if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                raise
+        self._increment_statistics({'total_crawls': len(entries)})
+        self.query_cache.invalidate('statistics')
+    
+    def _get_note_store(self) -> SegmentedNoteStore:
+        """获取文件模式下的笔记存储（首次使用时创建，并导入旧版 notes.json）"""
+        if self.note_store is None:
+            data_dir = os.path.join(os.path.dirname(__file__), 'data')
+            self.note_store = SegmentedNoteStore(os.path.join(data_dir, 'notes_store'))
+            
+            legacy_path = os.path.join(data_dir, 'notes.json')
+            if os.path.exists(legacy_path):
+                imported = 0
+                notes = iter_json_array(legacy_path)
+                while True:
+                    batch = list(itertools.islice(notes, self.bulk_chunk_size))
+                    if not batch:
+                        break
+                    imported += self.note_store.append(batch)
+                os.replace(legacy_path, legacy_path + '.imported')
+                logger.info(f"📦 已把旧版 notes.json 导入分段存储: {imported} 条")
+        
+        return self.note_store
     
     def _save_to_file(self, data: Any, filename: str) -> bool:
-        """备用：保存到文件"""
+        """备用：保存到文件（笔记追加到分段存储，其他数据整体写入JSON文件）"""
         try:
+            if self.auto_reconnect and filename in ('notes.json', 'keywords.json'):
+                # 先写入暂存队列，重新连接 MongoDB 后回放
+                self.write_spool.append(filename[:-len('.json')], data)
+            
+            if filename == 'notes.json':
+                written = self._get_note_store().append(data)
+                self.query_cache.invalidate('notes', 'statistics')
+                logger.info(f"💾 {written} 条笔记已追加到文件存储")
+                return True
+            
             data_dir = os.path.join(os.path.dirname(__file__), 'data')
             os.makedirs(data_dir, exist_ok=True)
             
             filepath = os.path.join(data_dir, filename)
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+            self.query_cache.invalidate()
             
             logger.info(f"💾 数据已保存到文件: {filepath}")
             return True
@@ -307,37 +1371,45 @@ class DatabaseManager:
             logger.error(f"❌ 保存到文件失败: {e}")
             return False
     
-    def _load_from_file(self, filename: str, limit: int = None) -> List[Dict[str, Any]]:
-        """备用：从文件加载"""
+    def _load_from_file(self, filename: str, limit: int = None, category: str = None,
+                        days: int = 0) -> List[Dict[str, Any]]:
+        """备用：从文件流式加载，满足 limit 后立即停止读取（笔记从分段存储中按最新写入顺序读取）"""
         try:
+            if filename == 'notes.json':
+                notes = self._get_note_store().iter_notes(newest_first=True)
+                return list(take_notes(notes, limit, category, days))
+            
             data_dir = os.path.join(os.path.dirname(__file__), 'data')
             filepath = os.path.join(data_dir, filename)
             
             if not os.path.exists(filepath):
                 return []
             
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            if isinstance(data, list) and limit:
-                data = data[:limit]
+            data = list(self.iter_note_dump(filepath, limit, category, days))
             
             logger.info(f"📁 从文件加载数据: {filepath}")
-            return data if isinstance(data, list) else []
+            return data
             
         except Exception as e:
             logger.error(f"❌ 从文件加载失败: {e}")
             return []
     
+    def iter_note_dump(self, filepath: str, limit: int = None, category: str = None,
+                       days: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        流式读取笔记导出文件（如 data/mass_real_notes_*.json）
+        
+        内存占用与文件大小无关；满足 limit 后停止读取，分类/时间条件在读取过程中过滤。
+        """
+        return take_notes(iter_json_array(filepath), limit, category, days)
+    
     def _get_file_statistics(self) -> Dict[str, Any]:
         """备用：获取文件统计"""
         try:
-            data_dir = os.path.join(os.path.dirname(__file__), 'data')
             stats = {}
             
-            # 统计文件中的数据
-            notes = self._load_from_file('notes.json')
-            stats['total_notes'] = len(notes)
+            # 笔记数量直接来自存储索引，不读取记录
+            stats['total_notes'] = self._get_note_store().count()
             
             keywords = self._load_from_file('keywords.json')
             stats['total_keywords'] = len(keywords)
@@ -348,21 +1420,82 @@ class DatabaseManager:
             logger.error(f"❌ 获取文件统计失败: {e}")
             return {}
     
+    def get_note(self, note_id: str) -> Optional[Dict[str, Any]]:
+        """按 note_id 获取单条笔记"""
+        if not self.connected:
+            return self._get_note_store().get(note_id)
+        
+        try:
+            note = self.db[self.collections['notes']].find_one({'note_id': note_id})
+            if note and '_id' in note:
+                note['_id'] = str(note['_id'])
+            return note
+            
+        except Exception as e:
+            logger.error(f"❌ 获取笔记失败: {e}")
+            self._handle_connection_error(e)
+            return None
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """查询缓存的命中/未命中/淘汰计数"""
+        return self.query_cache.stats()
+    
+    def get_write_metrics(self) -> Dict[str, Any]:
+        """指纹比对的累计计数：比对笔记数、跳过数和跳过率"""
+        seen = self.write_metrics['notes_seen']
+        skipped = self.write_metrics['notes_skipped']
+        return {
+            'notes_seen': seen,
+            'notes_skipped': skipped,
+            'notes_written': seen - skipped,
+            'skip_ratio': round(skipped / seen, 4) if seen else 0.0
+        }
+    
+    def get_rollup_metrics(self, dimension: str = 'category', days: int = 7, limit: int = None) -> List[Dict[str, Any]]:
+        """从汇总表读取最近 days 天每个分类（或关键词）的笔记数和互动数"""
+        try:
+            return self.rollups.query(dimension, days, limit=limit)
+        except Exception as e:
+            logger.error(f"❌ 读取指标汇总失败: {e}")
+            return []
+    
+    def get_connection_status(self) -> Dict[str, Any]:
+        """连接监督器的重连统计和连接池配置"""
+        status = self.supervisor.stats()
+        status['client_options'] = dict(self.client_options)
+        status['spool_pending'] = self.write_spool.has_pending()
+        status['spool'] = self.write_spool.stats()
+        return status
+    
     def close(self):
-        """关闭数据库连接"""
-        if self.client:
-            self.client.close()
-        if self.async_client:
-            self.async_client.close()
+        """写完缓冲的爬取日志（未连接时写入暂存队列）并关闭数据库连接"""
+        self.supervisor.stop()
+        self.crawl_log_writer.close()
+        self._close_clients()
+        self.rollups.close()
+        self.connected = False
         
         logger.info("🔒 数据库连接已关闭")
 
-# 全局数据库管理器实例
-db_manager = DatabaseManager()
+_db_manager = None
+
+def get_db_manager() -> DatabaseManager:
+    """全局数据库管理器实例（首次使用时创建）"""
+    global _db_manager
+    if _db_manager is None:
+        _db_manager = DatabaseManager()
+    return _db_manager
+
+def __getattr__(name):
+    # 兼容 from database_manager import db_manager，导入本模块时不再创建实例
+    if name == 'db_manager':
+        return get_db_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def main():
     """测试数据库功能"""
     print("🚀 测试数据库管理器...")
+    db_manager = get_db_manager()
     
     # 尝试连接数据库
     if db_manager.connect():
@@ -383,8 +1516,15 @@ def main():
         db_manager.save_notes(test_notes)
         
         # 测试获取数据
-        notes = db_manager.get_notes(limit=5)
+        notes = db_manager.get_notes(limit=5, projection=NOTE_LIST_PROJECTION)
         print(f"📊 获取到 {len(notes)} 条笔记")
+        assert all('content' not in note for note in notes)
+        
+        # 分类 + 时间窗口查询应由复合索引完成，不需要内存排序
+        plan = db_manager.explain_notes_query(category='测试', days=7)
+        print(f"🔎 查询计划: {plan}")
+        assert 'category_1_crawl_time_-1__id_-1' in plan['index_names']
+        assert 'SORT' not in plan['stages']
         
         # 获取统计信息
         stats = db_manager.get_statistics()
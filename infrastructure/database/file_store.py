@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分段 JSONL 笔记存储 - MongoDB 不可用时的文件存储引擎
+
+目录结构:
+    segments/segment_000001.jsonl   追加写入的笔记记录，超过大小上限后滚动到新分段
+    index.log                       追加写入的索引日志: note_id -> (分段, 偏移, 长度)
+
+同一条笔记重复写入时只追加新记录并更新索引，旧记录变为死数据，
+由后台压缩线程把存活记录搬到新分段后删除旧分段。
+"""
+
+import json
+import os
+import threading
+import logging
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = 'segment_'
+SEGMENT_SUFFIX = '.jsonl'
+TOMBSTONE = '-'
+
+
+class SegmentedNoteStore:
+    def __init__(self, root_dir: str, segment_max_bytes: int = 16 * 1024 * 1024,
+                 compaction_threshold: float = 0.5, auto_compact: bool = True):
+        """
+        初始化分段存储
+
+        Args:
+            root_dir: 存储目录
+            segment_max_bytes: 单个分段的大小上限，超过后滚动到新分段
+            compaction_threshold: 已封存分段的死数据比例超过该值时触发压缩
+            auto_compact: 写入后是否自动在后台线程中压缩
+        """
+        self.root_dir = root_dir
+        self.segments_dir = os.path.join(root_dir, 'segments')
+        self.index_path = os.path.join(root_dir, 'index.log')
+        self.segment_max_bytes = segment_max_bytes
+        self.compaction_threshold = compaction_threshold
+        self.auto_compact = auto_compact
+
+        # note_id -> (segment, offset, length)
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        # segment -> 存活记录字节数
+        self._live_bytes: Dict[int, int] = {}
+        self._segments: List[int] = []
+        self._index_log_entries = 0
+        self._lock = threading.RLock()
+        self._compaction_thread: Optional[threading.Thread] = None
+
+        os.makedirs(self.segments_dir, exist_ok=True)
+        self._load()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.segments_dir, f"{SEGMENT_PREFIX}{segment:06d}{SEGMENT_SUFFIX}")
+
+    def _load(self):
+        """从磁盘加载分段列表和索引日志"""
+        for name in os.listdir(self.segments_dir):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                self._segments.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+        self._segments.sort()
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) != 4:
+                        continue  # 崩溃时写了一半的索引行
+                    self._index_log_entries += 1
+                    note_id, segment = parts[0], parts[1]
+                    if segment == TOMBSTONE:
+                        self._index.pop(note_id, None)
+                    else:
+                        self._index[note_id] = (int(segment), int(parts[2]), int(parts[3]))
+
+        # 丢弃指向已删除分段的索引项（压缩中断时可能出现）
+        existing = set(self._segments)
+        for note_id in [k for k, v in self._index.items() if v[0] not in existing]:
+            del self._index[note_id]
+
+        for segment, _, length in self._index.values():
+            self._live_bytes[segment] = self._live_bytes.get(segment, 0) + length
+
+        if not self._segments:
+            self._segments.append(1)
+            open(self._segment_path(1), 'ab').close()
+
+    def count(self) -> int:
+        """存活笔记数量"""
+        return len(self._index)
+
+    def contains(self, note_id: str) -> bool:
+        return note_id in self._index
+
+    def append(self, notes: List[Dict[str, Any]]) -> int:
+        """
+        追加写入笔记，同一 note_id 的旧记录会被新记录覆盖
+
+        Returns:
+            写入的笔记数量
+        """
+        with self._lock:
+            written = self._append_locked(notes)
+
+        if self.auto_compact and self._compaction_candidates():
+            self.compact_in_background()
+
+        return written
+
+    def _append_locked(self, notes: List[Dict[str, Any]]) -> int:
+        segment = self._segments[-1]
+        path = self._segment_path(segment)
+        offset = os.path.getsize(path)
+        f = open(path, 'ab')
+        index_lines = []
+        written = 0
+
+        try:
+            for note in notes:
+                note_id = note.get('id', note.get('note_id'))
+                if note_id is None:
+                    continue
+                note_id = str(note_id)
+
+                if offset >= self.segment_max_bytes:
+                    f.close()
+                    segment = segment + 1
+                    self._segments.append(segment)
+                    path = self._segment_path(segment)
+                    offset = 0
+                    f = open(path, 'ab')
+
+                line = (json.dumps(note, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+                f.write(line)
+
+                previous = self._index.get(note_id)
+                if previous:
+                    self._live_bytes[previous[0]] -= previous[2]
+                self._index[note_id] = (segment, offset, len(line))
+                self._live_bytes[segment] = self._live_bytes.get(segment, 0) + len(line)
+                index_lines.append(f"{note_id}\t{segment}\t{offset}\t{len(line)}\n")
+
+                offset += len(line)
+                written += 1
+
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+
+        self._append_index_log(index_lines)
+        return written
+
+    def _append_index_log(self, lines: List[str]):
+        if not lines:
+            return
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.writelines(lines)
+        self._index_log_entries += len(lines)
+
+    def delete(self, note_ids: List[str]) -> int:
+        """删除笔记（写入墓碑索引项），空间在压缩时回收"""
+        lines = []
+        with self._lock:
+            for note_id in note_ids:
+                entry = self._index.pop(str(note_id), None)
+                if entry:
+                    self._live_bytes[entry[0]] -= entry[2]
+                    lines.append(f"{note_id}\t{TOMBSTONE}\t0\t0\n")
+            self._append_index_log(lines)
+
+        if self.auto_compact and self._compaction_candidates():
+            self.compact_in_background()
+
+        return len(lines)
+
+    def get(self, note_id: str) -> Optional[Dict[str, Any]]:
+        """按 note_id 点查，只读取一条记录"""
+        entry = self._index.get(str(note_id))
+        if not entry:
+            return None
+
+        segment, offset, length = entry
+        try:
+            with open(self._segment_path(segment), 'rb') as f:
+                f.seek(offset)
+                return json.loads(f.read(length))
+        except (OSError, ValueError):
+            # 读取期间分段被压缩，按新位置重试一次
+            if self._index.get(str(note_id)) != entry:
+                return self.get(note_id)
+            raise
+
+    def iter_notes(self, newest_first: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        逐条遍历存活笔记，不会把全部记录加载到内存
+
+        Args:
+            newest_first: 按写入顺序倒序遍历（最新写入的笔记在前）
+        """
+        with self._lock:
+            index = dict(self._index)
+            handles = []
+            for segment in self._segments:
+                try:
+                    handles.append((segment, open(self._segment_path(segment), 'rb')))
+                except OSError:
+                    continue
+
+        if newest_first:
+            handles.reverse()
+
+        try:
+            for segment, f in handles:
+                lines = _iter_lines_reversed(f) if newest_first else _iter_lines(f)
+                for offset, line in lines:
+                    try:
+                        note = json.loads(line)
+                    except ValueError:
+                        continue  # 崩溃时写了一半的记录
+                    note_id = str(note.get('id', note.get('note_id')))
+                    entry = index.get(note_id)
+                    if entry and entry[0] == segment and entry[1] == offset:
+                        yield note
+        finally:
+            for _, f in handles:
+                f.close()
+
+    def _compaction_candidates(self) -> List[int]:
+        """死数据比例超过阈值的已封存分段"""
+        candidates = []
+        for segment in self._segments[:-1]:
+            try:
+                size = os.path.getsize(self._segment_path(segment))
+            except OSError:
+                continue
+            if size and (size - self._live_bytes.get(segment, 0)) / size >= self.compaction_threshold:
+                candidates.append(segment)
+        return candidates
+
+    def compact_in_background(self):
+        """在后台线程中压缩，已有压缩在运行时直接返回"""
+        with self._lock:
+            if self._compaction_thread and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(target=self.compact, name='note-store-compaction', daemon=True)
+            self._compaction_thread.start()
+
+    def compact(self) -> Dict[str, int]:
+        """
+        压缩已封存分段：把存活记录重新追加到活动分段，然后删除旧分段
+
+        Returns:
+            压缩的分段数和回收的字节数
+        """
+        result = {'segments': 0, 'reclaimed_bytes': 0}
+
+        for segment in self._compaction_candidates():
+            with self._lock:
+                path = self._segment_path(segment)
+                size = os.path.getsize(path)
+                live = []
+                with open(path, 'rb') as f:
+                    for offset, line in _iter_lines(f):
+                        try:
+                            note = json.loads(line)
+                        except ValueError:
+                            continue
+                        entry = self._index.get(str(note.get('id', note.get('note_id'))))
+                        if entry and entry[0] == segment and entry[1] == offset:
+                            live.append(note)
+
+                self._append_locked(live)
+                self._segments.remove(segment)
+                self._live_bytes.pop(segment, None)
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    # Windows 上有读取者打开文件时无法删除，加载时会忽略孤立分段
+                    logger.warning(f"删除已压缩分段失败: {e}")
+
+                result['segments'] += 1
+                result['reclaimed_bytes'] += size - sum(self._index[str(n.get('id', n.get('note_id')))][2] for n in live)
+
+        with self._lock:
+            if self._index_log_entries > 2 * len(self._index) + 1000:
+                self._rewrite_index_log()
+
+        if result['segments']:
+            logger.info(f"🗜️ 笔记存储压缩完成: {result}")
+        return result
+
+    def _rewrite_index_log(self):
+        """用当前索引重写索引日志，去掉被覆盖和删除的历史项"""
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for note_id, (segment, offset, length) in self._index.items():
+                f.write(f"{note_id}\t{segment}\t{offset}\t{length}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+        self._index_log_entries = len(self._index)
+
+
+def _iter_lines(f) -> Iterator[Tuple[int, bytes]]:
+    """顺序读取 (偏移, 行)"""
+    f.seek(0)
+    offset = 0
+    for line in f:
+        yield offset, line
+        offset += len(line)
+
+
+def _iter_lines_reversed(f, block_size: int = 64 * 1024) -> Iterator[Tuple[int, bytes]]:
+    """从文件末尾按块倒序读取 (偏移, 行)，内存占用与块大小相关"""
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    tail = b''
+
+    while position > 0:
+        read_size = min(block_size, position)
+        position -= read_size
+        f.seek(position)
+        buffer = f.read(read_size) + tail
+        lines = buffer.split(b'\n')
+        # 第一段可能是不完整的行，留到下一个块拼接
+        tail = lines.pop(0)
+        cursor = position + len(buffer)
+        for line in reversed(lines):
+            start = cursor - len(line)
+            if line:
+                yield start, line
+            cursor = start - 1
+
+    if tail:
+        yield 0, tail
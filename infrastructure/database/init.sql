@@ -25,6 +25,7 @@ CREATE TABLE IF NOT EXISTS xhs_notes (
     video_url VARCHAR(500) COMMENT '视频链接',
     category VARCHAR(50) COMMENT '分类',
     location VARCHAR(100) COMMENT '地理位置',
+    content_hash CHAR(32) COMMENT '内容和互动数据指纹，未变化时跳过写入',
     is_deleted BOOLEAN DEFAULT FALSE COMMENT '是否删除',
     INDEX idx_user_id (user_id),
     INDEX idx_publish_time (publish_time),
@@ -77,6 +78,15 @@ CREATE TABLE IF NOT EXISTS xhs_topics (
     INDEX idx_category (category)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='话题趋势数据表';
 
+-- 3.1 热门关键词快照表（存储后端每次整体替换）
+CREATE TABLE IF NOT EXISTS xhs_keywords (
+    keyword VARCHAR(100) PRIMARY KEY COMMENT '关键词',
+    heat DECIMAL(12,2) DEFAULT 0 COMMENT '热度',
+    data JSON NOT NULL COMMENT '关键词完整数据',
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '更新时间',
+    INDEX idx_heat (heat)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='热门关键词快照表';
+
 -- 4. 平台统计表
 CREATE TABLE IF NOT EXISTS xhs_platform_stats (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -225,6 +235,7 @@ DELIMITER ;
 -- 创建索引优化查询性能
 CREATE INDEX idx_notes_title_fulltext ON xhs_notes(title);
 CREATE INDEX idx_notes_publish_category ON xhs_notes(publish_time, category);
+CREATE INDEX idx_notes_category_crawl_time ON xhs_notes(category, crawl_time);
 CREATE INDEX idx_users_location_gender ON xhs_users(location, gender);
 
 -- 设置数据库字符集
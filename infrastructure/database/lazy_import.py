@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+延迟导入 - 重量级依赖在第一次使用时才导入，缩短命令行调用的启动时间
+
+    mysql_connector = lazy_module('mysql.connector')   # 此时不导入
+    MYSQL_AVAILABLE = module_available('mysql.connector')   # 只查找模块，不执行
+    mysql_connector.connect(...)   # 第一次访问属性时导入
+
+module_available 只检查顶层包能否找到，不会发现包内部的导入错误；
+这类错误在第一次使用时抛出，与直接 import 的报错相同。
+"""
+
+import sys
+import importlib
+import importlib.util
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """模块代理，第一次访问属性时导入真正的模块"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            module = self.__dict__['_module'] = importlib.import_module(self.__name__)
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    """返回延迟导入的模块代理；模块已导入时直接返回该模块"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+def module_available(name: str) -> bool:
+    """顶层包是否已安装（不执行包的代码）"""
+    top_level = name.partition('.')[0]
+    try:
+        return importlib.util.find_spec(top_level) is not None
+    except (ImportError, ValueError):
+        return False
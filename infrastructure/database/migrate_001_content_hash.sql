@@ -0,0 +1,22 @@
+-- 迁移 001: 为已存在的 xhs_notes 表补上 content_hash 列
+-- init.sql 只在建表时包含该列，之前创建的数据库需要执行本脚本（可重复执行）
+-- MySQLBackend 初始化时也会做同样的检查
+
+USE xiaohongshu_data;
+
+DELIMITER //
+DROP PROCEDURE IF EXISTS migrate_001_content_hash //
+CREATE PROCEDURE migrate_001_content_hash()
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'xhs_notes' AND COLUMN_NAME = 'content_hash'
+    ) THEN
+        ALTER TABLE xhs_notes
+            ADD COLUMN content_hash CHAR(32) COMMENT '内容和互动数据指纹，未变化时跳过写入' AFTER location;
+    END IF;
+END //
+DELIMITER ;
+
+CALL migrate_001_content_hash();
+DROP PROCEDURE migrate_001_content_hash;
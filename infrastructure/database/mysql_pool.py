@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MySQL 连接池 - 同一进程内的 MySQL 读写共用一组有上限的长连接
+
+mysql.connector 自带的连接池在连接用尽时直接报错，也不会淘汰过期连接，这里补上:
+    - borrow_timeout: 连接用尽时最多等待多久，超时抛出 PoolTimeout
+    - max_lifetime: 连接存活超过该时间后在归还时关闭，避免被服务端 wait_timeout 断开
+    - health_check_interval: 空闲超过该时间的连接在借出前先 ping 一次，失效则重建
+借出的连接对象与普通连接用法相同，调用 close() 即归还连接池，已有代码不需要改动。
+通过 get_pool(db_config) 获取按连接配置共享的连接池。
+"""
+
+import time
+import threading
+import logging
+from collections import deque
+from typing import Dict, Any, Callable, Optional
+
+from lazy_import import lazy_module, module_available
+
+# 驱动在第一次建立连接时才导入
+mysql_connector = lazy_module('mysql.connector')
+MYSQL_AVAILABLE = module_available('mysql.connector')
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(RuntimeError):
+    """在 borrow_timeout 内没有可用连接"""
+
+
+class PooledConnection:
+    """借出的连接；close() 把底层连接归还连接池，其余属性直接转发"""
+
+    def __init__(self, pool: 'MySQLConnectionPool', conn, created_at: float):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise AttributeError(f"连接已归还连接池: {name}")
+        return getattr(conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool._release(conn, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MySQLConnectionPool:
+    def __init__(self, db_config: Dict[str, Any], max_size: int = 10, borrow_timeout: float = 5.0,
+                 max_lifetime: float = 1800, health_check_interval: float = 30,
+                 connect_fn: Optional[Callable[..., Any]] = None):
+        """
+        初始化连接池（连接在首次借出时才建立）
+
+        Args:
+            db_config: mysql.connector.connect 的参数
+            max_size: 最多同时存在的连接数（借出 + 空闲）
+            borrow_timeout: 连接用尽时的最长等待时间（秒）
+            max_lifetime: 连接的最长存活时间（秒）
+            health_check_interval: 空闲超过该时间的连接借出前先检查是否可用（秒）
+            connect_fn: 建立连接的函数，默认 mysql.connector.connect
+        """
+        if connect_fn is None and not MYSQL_AVAILABLE:
+            raise RuntimeError("MySQL驱动未安装，请运行: pip install mysql-connector-python")
+        self.db_config = dict(db_config)
+        self.max_size = max_size
+        self.borrow_timeout = borrow_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.connect_fn = connect_fn or mysql_connector.connect
+
+        # 空闲连接: (连接, 创建时间, 归还时间)，后进先出，常用连接保持活跃
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._available = threading.Condition(threading.Lock())
+        self._waits = deque(maxlen=1024)
+        self._counters = {'borrowed': 0, 'created': 0, 'discarded': 0, 'health_check_failures': 0,
+                          'timeouts': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0}
+
+    def get_connection(self, timeout: float = None) -> PooledConnection:
+        """
+        借出一个连接，用完后调用 close() 归还
+
+        Args:
+            timeout: 本次借出的最长等待时间，默认 borrow_timeout
+        """
+        timeout = self.borrow_timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._available:
+                while not self._idle and self._size >= self.max_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters['timeouts'] += 1
+                        raise PoolTimeout(f"{timeout:.1f} 秒内没有可用的 MySQL 连接（上限 {self.max_size}）")
+                    self._available.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("MySQL 连接池已关闭")
+
+                if self._idle:
+                    conn, created_at, released_at = self._idle.pop()
+                else:
+                    conn, created_at, released_at = None, None, None
+                    self._size += 1  # 先占住名额，在锁外建立连接
+
+            if conn is None:
+                try:
+                    conn = self.connect_fn(**self.db_config)
+                except Exception:
+                    self._discard(None)
+                    raise
+                created_at = time.monotonic()
+                with self._available:
+                    self._counters['created'] += 1
+            elif time.monotonic() - released_at > self.health_check_interval and not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+
+            self._record_wait((time.perf_counter() - start) * 1000)
+            return PooledConnection(self, conn, created_at)
+
+    def _is_healthy(self, conn) -> bool:
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logger.warning(f"MySQL 空闲连接已失效，重新建立: {e}")
+            with self._available:
+                self._counters['health_check_failures'] += 1
+            return False
+
+    def _release(self, conn, created_at: float):
+        """归还连接；超过存活时间或状态无法重置的连接直接关闭"""
+        if self._closed or time.monotonic() - created_at > self.max_lifetime:
+            self._discard(conn)
+            return
+        try:
+            # 丢弃未读取的结果并回滚未提交的事务，下一个借用者拿到干净的会话
+            if getattr(conn, 'unread_result', False):
+                conn.consume_results()
+            if getattr(conn, 'in_transaction', False):
+                conn.rollback()
+        except Exception as e:
+            logger.warning(f"重置 MySQL 连接失败，关闭该连接: {e}")
+            self._discard(conn)
+            return
+
+        with self._available:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._available.notify()
+
+    def _discard(self, conn):
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        with self._available:
+            self._size -= 1
+            if conn is not None:
+                self._counters['discarded'] += 1
+            self._available.notify()
+
+    def _record_wait(self, wait_ms: float):
+        with self._available:
+            self._waits.append(wait_ms)
+            self._counters['borrowed'] += 1
+            self._counters['wait_ms_total'] += wait_ms
+            self._counters['wait_ms_max'] = max(self._counters['wait_ms_max'], wait_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        """连接数和借出等待时间（毫秒，p50/p95 基于最近 1024 次借出）"""
+        with self._available:
+            stats = dict(self._counters)
+            waits = sorted(self._waits)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            stats['max_size'] = self.max_size
+
+        borrowed = stats['borrowed']
+        stats['wait_ms_avg'] = round(stats.pop('wait_ms_total') / borrowed, 3) if borrowed else 0.0
+        stats['wait_ms_max'] = round(stats['wait_ms_max'], 3)
+        stats['wait_ms_p50'] = round(waits[len(waits) // 2], 3) if waits else 0.0
+        stats['wait_ms_p95'] = round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0
+        return stats
+
+    def close(self):
+        """关闭全部空闲连接；借出中的连接在归还时关闭"""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+
+_pools: Dict[tuple, MySQLConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_config: Dict[str, Any], **options) -> MySQLConnectionPool:
+    """
+    获取与连接配置对应的共享连接池，同一进程内相同配置只创建一个
+
+    Args:
+        options: 首次创建时传给 MySQLConnectionPool 的参数
+    """
+    key = tuple(sorted((k, str(v)) for k, v in db_config.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = _pools[key] = MySQLConnectionPool(db_config, **options)
+        return pool
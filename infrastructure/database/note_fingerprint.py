@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+笔记指纹 - 判断重新爬取的笔记内容或互动数据是否发生变化
+
+指纹是除爬取/存储时间等易变字段外全部字段的哈希，与记录一起保存。
+写入前按批次一次性查出已存储的指纹，只写入指纹不同的笔记。
+"""
+
+import hashlib
+import json
+from typing import Dict, Any
+
+FINGERPRINT_FIELD = 'fingerprint'
+
+# 每次爬取都会变化、但不代表笔记本身变化的字段
+VOLATILE_FIELDS = frozenset({'_id', 'stored_at', 'crawl_time', 'update_time', FINGERPRINT_FIELD, 'content_hash'})
+
+
+def note_fingerprint(note: Dict[str, Any]) -> str:
+    """计算笔记指纹（32 位十六进制），字段顺序不影响结果"""
+    payload = {key: value for key, value in note.items() if key not in VOLATILE_FIELDS}
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str, separators=(',', ':'))
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式笔记读取 - 增量解析 JSON 数组文件
+
+data/mass_real_notes_*.json 这类导出文件是一个巨大的 JSON 数组，json.load 会把整个文件
+读进内存。这里按块读取并用 raw_decode 逐个解析数组元素，内存占用只与单条记录和块大小相关。
+"""
+
+import json
+import itertools
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, Iterable, Optional, Callable
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(filepath: str, chunk_size: int = 1024 * 1024) -> Iterator[Any]:
+    """
+    惰性遍历 JSON 数组文件中的元素
+
+    Args:
+        filepath: JSON 文件路径，顶层必须是数组
+        chunk_size: 每次读取的字符数
+
+    Raises:
+        ValueError: 文件不是 JSON 数组或格式错误
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+        started = False
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof
+            if eof:
+                return False
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            # 丢弃已解析的部分，保持缓冲区大小稳定
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_whitespace() -> Optional[str]:
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not fill():
+                    return None
+
+        first = skip_whitespace()
+        if first == '\ufeff':
+            pos += 1
+            first = skip_whitespace()
+        if first != '[':
+            raise ValueError(f"{filepath} 不是 JSON 数组")
+        pos += 1
+
+        while True:
+            char = skip_whitespace()
+            if char is None:
+                raise ValueError(f"{filepath} 意外结束")
+            if char == ']':
+                return
+            if started:
+                if char != ',':
+                    raise ValueError(f"{filepath} 在位置 {pos} 缺少逗号")
+                pos += 1
+                skip_whitespace()
+            started = True
+
+            while True:
+                try:
+                    item, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # 元素跨越了块边界，继续读取后重试
+                    if not fill():
+                        raise
+                    continue
+                # 数字等标量可能恰好在块边界被截断，确认后面还有分隔符
+                if end == len(buffer) and not eof and not isinstance(item, (dict, list, str)):
+                    if fill():
+                        continue
+                break
+
+            pos = end
+            yield item
+
+
+def parse_time(value: Any) -> Optional[datetime]:
+    """把 ISO 字符串、时间戳或 datetime 统一解析为 datetime，无法解析时返回 None"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        # 小红书接口返回毫秒时间戳
+        return datetime.fromtimestamp(value / 1000 if value > 1e11 else value)
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+        except ValueError:
+            return None
+    return None
+
+
+def make_note_filter(category: str = None, days: int = 0,
+                     time_field: str = 'crawl_time') -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """
+    构建笔记过滤条件，语义与 DatabaseManager.get_notes 的 MongoDB 查询一致
+
+    Returns:
+        过滤函数；没有任何条件时返回 None
+    """
+    since = datetime.now() - timedelta(days=days) if days and days > 0 else None
+    if not category and since is None:
+        return None
+
+    def predicate(note: Dict[str, Any]) -> bool:
+        if category and note.get('category') != category:
+            return False
+        if since is not None:
+            note_time = parse_time(note.get(time_field))
+            if note_time is None or note_time < since:
+                return False
+        return True
+
+    return predicate
+
+
+def take_notes(notes: Iterable[Dict[str, Any]], limit: int = None, category: str = None,
+               days: int = 0) -> Iterator[Dict[str, Any]]:
+    """在流上应用分类/时间过滤，满足 limit 后立即停止读取"""
+    predicate = make_note_filter(category, days)
+    if predicate:
+        notes = filter(predicate, notes)
+    return itertools.islice(notes, limit) if limit else iter(notes)
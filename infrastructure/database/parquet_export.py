@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parquet 快照导出 - 把笔记写成按爬取日期分区的列式文件
+
+目录结构（hive 分区）:
+    notes_parquet/crawl_date=2025-07-18/part-20250718194838-1a2b3c4d.parquet
+
+每次 append 只新增文件，不改写已有文件，适合每个爬取批次结束后增量导出；
+compact() 会把同一分区内的多个小文件按 id 去重后合并成一个。
+读取时可以只加载需要的列，并通过内存映射读取文件，按日期过滤时只打开相关分区。
+"""
+
+import os
+import uuid
+import logging
+from datetime import datetime, date
+from typing import List, Dict, Any, Iterable, Optional
+
+from note_stream import iter_json_array, parse_time
+
+from lazy_import import lazy_module, module_available
+
+# pyarrow 导入较慢，第一次读写快照时才导入
+pa = lazy_module('pyarrow')
+pc = lazy_module('pyarrow.compute')
+ds = lazy_module('pyarrow.dataset')
+pafs = lazy_module('pyarrow.fs')
+pq = lazy_module('pyarrow.parquet')
+PYARROW_AVAILABLE = module_available('pyarrow')
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARQUET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'notes_parquet')
+PARTITION_FIELD = 'crawl_date'
+
+# 与 NOTE_SCHEMA 中的整数/浮点列一致
+_INT_FIELDS = ('like_count', 'comment_count', 'share_count', 'collect_count', 'view_count')
+_FLOAT_FIELDS = ('engagement_rate', 'quality_score')
+
+_note_schema = None
+
+
+def note_schema():
+    """笔记列类型：低基数字符串使用字典编码，计数使用整数，时间使用原生时间戳"""
+    global _note_schema
+    if _note_schema is None:
+        dict_string = pa.dictionary(pa.int32(), pa.string())
+        _note_schema = pa.schema([
+            ('id', pa.string()),
+            ('title', pa.string()),
+            ('content', pa.string()),
+            ('author', pa.string()),
+            ('category', dict_string),
+            ('keyword', dict_string),
+            ('data_source', dict_string),
+            ('note_type', dict_string),
+            ('tags', pa.list_(pa.string())),
+            ('like_count', pa.int64()),
+            ('comment_count', pa.int32()),
+            ('share_count', pa.int32()),
+            ('collect_count', pa.int32()),
+            ('view_count', pa.int64()),
+            ('engagement_rate', pa.float32()),
+            ('quality_score', pa.float32()),
+            ('publish_time', pa.timestamp('ms')),
+            ('crawl_time', pa.timestamp('ms')),
+        ])
+    return _note_schema
+
+
+def __getattr__(name):
+    # 兼容 from parquet_export import NOTE_SCHEMA，访问时才构建
+    if name == 'NOTE_SCHEMA':
+        return note_schema()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow未安装，请运行: pip install pyarrow")
+
+
+def _note_to_row(note: Dict[str, Any]) -> Dict[str, Any]:
+    """把任意来源的笔记转换为 NOTE_SCHEMA 的一行，多余字段丢弃"""
+    row = {
+        'id': str(note.get('id', note.get('note_id'))),
+        'title': note.get('title'),
+        'content': note.get('content'),
+        'author': note.get('author', note.get('user_nickname')),
+        'category': note.get('category'),
+        'keyword': note.get('keyword'),
+        'data_source': note.get('data_source'),
+        'note_type': note.get('note_type', note.get('type')),
+        'tags': [str(tag) for tag in note.get('tags') or []],
+        'publish_time': parse_time(note.get('publish_time')),
+        'crawl_time': parse_time(note.get('crawl_time')) or datetime.now(),
+    }
+    for field in _INT_FIELDS:
+        value = note.get(field)
+        row[field] = int(value) if value not in (None, '') else None
+    for field in _FLOAT_FIELDS:
+        value = note.get(field)
+        row[field] = float(value) if value not in (None, '') else None
+    return row
+
+
+class ParquetNoteExporter:
+    def __init__(self, root_dir: str = DEFAULT_PARQUET_DIR, row_group_size: int = 64 * 1024,
+                 compression: str = 'zstd'):
+        """
+        初始化导出器
+
+        Args:
+            root_dir: 快照根目录
+            row_group_size: 每个行组的行数，读取时按行组跳过不需要的数据
+            compression: Parquet 压缩算法
+        """
+        _require_pyarrow()
+        self.root_dir = root_dir
+        self.row_group_size = row_group_size
+        self.compression = compression
+
+    def append(self, notes: Iterable[Dict[str, Any]], batch_size: int = 50000) -> Dict[str, int]:
+        """
+        增量追加一批笔记，每个 batch_size 的批次在每个日期分区各写一个新文件
+
+        Returns:
+            写入的行数、文件数和涉及的分区数
+        """
+        result = {'rows': 0, 'files': 0, 'partitions': 0}
+        partitions = set()
+        batch = []
+
+        for note in notes:
+            batch.append(_note_to_row(note))
+            if len(batch) >= batch_size:
+                self._write_batch(batch, result, partitions)
+                batch = []
+        if batch:
+            self._write_batch(batch, result, partitions)
+
+        result['partitions'] = len(partitions)
+        logger.info(f"📦 Parquet 快照追加完成: {result}")
+        return result
+
+    def export_json_dump(self, filepath: str, batch_size: int = 50000) -> Dict[str, int]:
+        """把 data/mass_real_notes_*.json 这类导出文件流式转换为快照"""
+        return self.append(iter_json_array(filepath), batch_size)
+
+    def _write_batch(self, rows: List[Dict[str, Any]], result: Dict[str, int], partitions: set):
+        by_day: Dict[date, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_day.setdefault(row['crawl_time'].date(), []).append(row)
+
+        batch_id = f"{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        for day, day_rows in by_day.items():
+            table = pa.Table.from_pylist(day_rows, schema=note_schema())
+            self._write_partition_file(day, table, f"part-{batch_id}.parquet")
+            partitions.add(day)
+            result['rows'] += len(day_rows)
+            result['files'] += 1
+
+    def _partition_dir(self, day: date) -> str:
+        return os.path.join(self.root_dir, f"{PARTITION_FIELD}={day.isoformat()}")
+
+    def _write_partition_file(self, day: date, table: 'pa.Table', filename: str):
+        """先写以 . 开头的临时文件再改名，读取者不会看到写了一半的文件"""
+        directory = self._partition_dir(day)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f".{filename}.tmp")
+        pq.write_table(table, tmp_path, row_group_size=self.row_group_size,
+                       compression=self.compression, use_dictionary=True)
+        os.replace(tmp_path, os.path.join(directory, filename))
+
+    def compact(self) -> Dict[str, int]:
+        """把每个分区的多个文件合并为一个，同一 id 只保留最后写入的记录"""
+        result = {'partitions': 0, 'files_removed': 0}
+        if not os.path.isdir(self.root_dir):
+            return result
+
+        for name in sorted(os.listdir(self.root_dir)):
+            if not name.startswith(f"{PARTITION_FIELD}="):
+                continue
+            directory = os.path.join(self.root_dir, name)
+            files = sorted(f for f in os.listdir(directory) if f.startswith('part-') and f.endswith('.parquet'))
+            if len(files) < 2:
+                continue
+
+            # 文件名以写入时间开头，倒序读取后保留每个 id 第一次出现的行
+            tables = [pq.read_table(os.path.join(directory, f), schema=note_schema(), memory_map=True)
+                      for f in reversed(files)]
+            table = pa.concat_tables(tables)
+            table = table.append_column('_row', pa.array(range(table.num_rows), pa.int64()))
+            first_rows = table.group_by('id', use_threads=False).aggregate([('_row', 'min')])['_row_min']
+            table = table.take(first_rows.take(pc.sort_indices(first_rows))).drop_columns(['_row'])
+
+            day = date.fromisoformat(name.split('=', 1)[1])
+            self._write_partition_file(day, table, f"part-{datetime.now():%Y%m%d%H%M%S}-compacted.parquet")
+            for f in files:
+                os.remove(os.path.join(directory, f))
+
+            result['partitions'] += 1
+            result['files_removed'] += len(files)
+
+        if result['partitions']:
+            logger.info(f"🗜️ Parquet 快照压缩完成: {result}")
+        return result
+
+
+def load_notes_table(root_dir: str = DEFAULT_PARQUET_DIR, columns: Optional[List[str]] = None,
+                     start: datetime = None, end: datetime = None, category: str = None,
+                     memory_map: bool = True) -> 'pa.Table':
+    """
+    读取快照
+
+    Args:
+        columns: 需要的列，None 表示全部
+        start/end: crawl_time 范围 [start, end)，同时用于裁剪日期分区
+        category: 只读取该分类
+        memory_map: 通过内存映射读取文件，避免把整个文件复制到堆上
+    """
+    _require_pyarrow()
+    if not os.path.isdir(root_dir):
+        return note_schema().empty_table().select(columns) if columns else note_schema().empty_table()
+
+    dataset = ds.dataset(
+        root_dir, schema=note_schema().append(pa.field(PARTITION_FIELD, pa.date32())),
+        format='parquet', filesystem=pafs.LocalFileSystem(use_mmap=memory_map),
+        partitioning=ds.partitioning(pa.schema([(PARTITION_FIELD, pa.date32())]), flavor='hive')
+    )
+
+    conditions = []
+    if start is not None:
+        conditions.append(ds.field(PARTITION_FIELD) >= pa.scalar(start.date(), pa.date32()))
+        conditions.append(ds.field('crawl_time') >= pa.scalar(start, pa.timestamp('ms')))
+    if end is not None:
+        conditions.append(ds.field(PARTITION_FIELD) <= pa.scalar(end.date(), pa.date32()))
+        conditions.append(ds.field('crawl_time') < pa.scalar(end, pa.timestamp('ms')))
+    if category:
+        conditions.append(ds.field('category') == category)
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns or note_schema().names, filter=expression)
+
+
+def load_notes_frame(root_dir: str = DEFAULT_PARQUET_DIR, columns: Optional[List[str]] = None,
+                     start: datetime = None, end: datetime = None, category: str = None):
+    """读取快照为 pandas DataFrame，字典编码列转换为 category 类型"""
+    return load_notes_table(root_dir, columns, start, end, category).to_pandas()
+
+
+def snapshot_exists(root_dir: str = DEFAULT_PARQUET_DIR) -> bool:
+    """快照目录中是否已有分区"""
+    return PYARROW_AVAILABLE and os.path.isdir(root_dir) and any(
+        name.startswith(f"{PARTITION_FIELD}=") for name in os.listdir(root_dir)
+    )
+
+
+def main():
+    """把 JSON 导出文件转换为 Parquet 快照"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='导出笔记 Parquet 快照')
+    parser.add_argument('files', nargs='+', help='JSON 数组格式的笔记导出文件')
+    parser.add_argument('--root', default=DEFAULT_PARQUET_DIR)
+    parser.add_argument('--compact', action='store_true', help='导出后合并每个分区的小文件')
+    args = parser.parse_args()
+
+    exporter = ParquetNoteExporter(args.root)
+    for filepath in args.files:
+        print(f"📦 {filepath}: {exporter.export_json_dump(filepath)}")
+    if args.compact:
+        print(f"🗜️ {exporter.compact()}")
+
+
+if __name__ == "__main__":
+    main()
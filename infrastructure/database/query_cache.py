@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+查询缓存 - DatabaseManager 读取接口前的进程内 TTL/LRU 缓存
+
+数据只在调度器写入时变化，读取接口按查询参数缓存结果，写入时按命名空间显式失效。
+缓存可被多个调度线程共享，返回给调用方的始终是副本。
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+_MISSING = object()
+
+
+class QueryCache:
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 60):
+        """
+        初始化查询缓存
+
+        Args:
+            max_entries: 最多缓存的查询结果数量，超过后淘汰最久未使用的项
+            ttl_seconds: 缓存项的存活时间
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 每个命名空间的失效代数；加载期间发生失效时，加载结果不再写入缓存
+        self._generations: Dict[str, int] = {}
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key: Tuple) -> Tuple[bool, Any, int]:
+        """
+        查询缓存
+
+        Args:
+            key: 以命名空间开头的元组，例如 ('notes', limit, category, days)
+
+        Returns:
+            (是否命中, 值的副本, 当前失效代数)；未命中时把代数传给 put
+        """
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generations.get(key[0], 0)
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return True, copy.deepcopy(value), generation
+                del self._entries[key]
+                self._counters['expirations'] += 1
+            self._counters['misses'] += 1
+            return False, None, generation
+
+    def put(self, key: Tuple, value: Any, generation: int):
+        """写入缓存；如果加载期间该命名空间已失效则丢弃"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            if self._generations.get(key[0], 0) != generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def get_or_load(self, key: Tuple, loader: Callable[[], Any]) -> Any:
+        """读穿缓存：命中直接返回，否则调用 loader 并缓存结果"""
+        hit, value, generation = self.get(key)
+        if hit:
+            return value
+        value = loader()
+        self.put(key, value, generation)
+        return value
+
+    def invalidate(self, *namespaces: str):
+        """使指定命名空间（不传则全部）的缓存失效"""
+        with self._lock:
+            if not namespaces:
+                namespaces = tuple({key[0] for key in self._entries} | set(self._generations))
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] in namespaces]:
+                    del self._entries[key]
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._counters['invalidations'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中/淘汰等计数"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
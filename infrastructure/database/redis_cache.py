@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步 Redis 缓存 - 在协程中读写缓存而不阻塞事件循环
+
+使用 redis.asyncio 的连接池，多键读写通过 MGET / 非事务管道在一次往返内完成。
+缓存值用 msgpack 编码（未安装时退化为 JSON），超过 compress_threshold 字节的值再用 zlib 压缩，
+首字节标记编码方式，读取时自动识别。
+
+Redis 不可用时自动切换到进程内 TTL/LRU 缓存，retry_interval 秒后再尝试 Redis；
+降级期间写入的数据只在本进程内有效。
+
+get_or_refresh 提供防击穿的读取方式:
+    - 单飞: 同一个键同时只有一个刷新在执行，其余调用者等待同一个结果；
+      跨进程用 Redis SET NX 锁协调，没抢到锁的进程等待对方写入缓存；
+      对方释放锁却没有写入或等待超过 refresh_wait_timeout 秒时自己加载
+    - 过期后仍可读(stale-while-revalidate): 新鲜期过后的 stale_ttl 秒内直接返回旧值，
+      同时在后台刷新
+"""
+
+import json
+import time
+import uuid
+import asyncio
+import zlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, date
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from lazy_import import lazy_module, module_available
+
+# redis.asyncio 在第一次连接时才导入
+aioredis = lazy_module('redis.asyncio')
+REDIS_AVAILABLE = module_available('redis')
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 编码标记
+_MSGPACK = b'm'
+_MSGPACK_ZLIB = b'z'
+_JSON = b'j'
+_JSON_ZLIB = b'J'
+
+# 只有持锁者才能释放刷新锁，避免锁过期后误删其他进程的锁
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _default(value):
+    """msgpack/JSON 无法直接编码的类型"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def encode_value(value: Any, compress_threshold: int = 512) -> bytes:
+    """把缓存值编码为带标记的字节串"""
+    if MSGPACK_AVAILABLE:
+        payload, plain, compressed = msgpack.packb(value, default=_default, use_bin_type=True), _MSGPACK, _MSGPACK_ZLIB
+    else:
+        payload = json.dumps(value, ensure_ascii=False, default=_default, separators=(',', ':')).encode('utf-8')
+        plain, compressed = _JSON, _JSON_ZLIB
+    if len(payload) > compress_threshold:
+        return compressed + zlib.compress(payload, 6)
+    return plain + payload
+
+
+def decode_value(data: bytes) -> Any:
+    """解码 encode_value 的结果；兼容旧版本写入的 JSON 字符串"""
+    marker, payload = data[:1], data[1:]
+    if marker in (_MSGPACK_ZLIB, _JSON_ZLIB):
+        payload = zlib.decompress(payload)
+    if marker in (_MSGPACK, _MSGPACK_ZLIB):
+        return msgpack.unpackb(payload, raw=False)
+    if marker in (_JSON, _JSON_ZLIB):
+        return json.loads(payload)
+    return json.loads(data)
+
+
+class LocalCache:
+    """进程内的按键 TTL + LRU 缓存，作为 Redis 不可用时的降级存储"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return data
+
+    def set(self, key: str, data: bytes, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class AsyncCache:
+    def __init__(self, url: str = 'redis://localhost:6379/0', max_connections: int = 20,
+                 socket_timeout: float = 1.0, retry_interval: float = 30,
+                 local_max_entries: int = 1024, compress_threshold: int = 512,
+                 refresh_lock_ttl: float = 30, refresh_wait_timeout: float = 5):
+        """
+        初始化缓存（首次读写时才建立连接）
+
+        Args:
+            url: Redis 地址
+            max_connections: 连接池上限
+            socket_timeout: 单次命令和建立连接的超时（秒），超时视为 Redis 不可用
+            retry_interval: 降级后多久再尝试 Redis（秒）
+            local_max_entries: 进程内降级缓存的最大条目数
+            compress_threshold: 编码后超过该字节数的值使用 zlib 压缩
+            refresh_lock_ttl: get_or_refresh 跨进程刷新锁的过期时间（秒）
+            refresh_wait_timeout: 等待其他进程刷新的上限（秒），应明显小于调用方的超时
+        """
+        self.url = url
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self.retry_interval = retry_interval
+        self.compress_threshold = compress_threshold
+        self.refresh_lock_ttl = refresh_lock_ttl
+        self.refresh_wait_timeout = refresh_wait_timeout
+        self.local = LocalCache(local_max_entries)
+        self._client = None
+        self._down_until = 0.0
+        self._counters = {'hits': 0, 'misses': 0, 'local_hits': 0, 'redis_errors': 0,
+                          'bytes_written': 0, 'round_trips': 0,
+                          'refreshes': 0, 'refresh_errors': 0, 'coalesced': 0, 'lock_contended': 0,
+                          'peer_wait_abandoned': 0,
+                          'stale_served': 0, 'stale_age_s_total': 0.0, 'stale_age_s_max': 0.0,
+                          'stale_age_s_last': 0.0}
+        # 进程内正在执行的刷新: 键 -> Task
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _redis(self):
+        """可用时返回 Redis 客户端；降级期间返回 None"""
+        if not REDIS_AVAILABLE or time.monotonic() < self._down_until:
+            return None
+        if self._client is None:
+            pool = aioredis.ConnectionPool.from_url(
+                self.url, max_connections=self.max_connections,
+                socket_timeout=self.socket_timeout, socket_connect_timeout=self.socket_timeout
+            )
+            self._client = aioredis.Redis(connection_pool=pool)
+        return self._client
+
+    def _mark_down(self, error: Exception):
+        if time.monotonic() >= self._down_until:
+            logger.warning(f"⚠️ Redis 不可用，{self.retry_interval:.0f} 秒内使用进程内缓存: {error}")
+        self._down_until = time.monotonic() + self.retry_interval
+        self._counters['redis_errors'] += 1
+
+    @property
+    def degraded(self) -> bool:
+        """当前是否处于进程内缓存降级模式"""
+        return not REDIS_AVAILABLE or time.monotonic() < self._down_until
+
+    async def get(self, key: str) -> Optional[Any]:
+        """读取单个键，未命中返回 None"""
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """一次 MGET 读取多个键，只返回命中的键"""
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        raw: List[Optional[bytes]] = [None] * len(keys)
+        client = self._redis()
+        if client is not None:
+            try:
+                raw = await client.mget(keys)
+                self._counters['round_trips'] += 1
+            except Exception as e:
+                self._mark_down(e)
+                client = None
+        if client is None:
+            raw = [self.local.get(key) for key in keys]
+
+        result = {}
+        for key, data in zip(keys, raw):
+            if data is None:
+                self._counters['misses'] += 1
+                continue
+            try:
+                result[key] = decode_value(data)
+            except Exception as e:
+                logger.warning(f"缓存值无法解码，忽略 {key}: {e}")
+                self._counters['misses'] += 1
+                continue
+            self._counters['local_hits' if client is None else 'hits'] += 1
+        return result
+
+    async def set(self, key: str, value: Any, ttl: float):
+        """写入单个键，ttl 秒后过期"""
+        await self.set_many({key: value}, ttl)
+
+    async def set_many(self, mapping: Dict[str, Any], ttl: float):
+        """通过非事务管道一次往返写入多个键"""
+        if not mapping:
+            return
+        encoded = {key: encode_value(value, self.compress_threshold) for key, value in mapping.items()}
+        self._counters['bytes_written'] += sum(len(data) for data in encoded.values())
+
+        client = self._redis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for key, data in encoded.items():
+                        pipe.set(key, data, px=int(ttl * 1000))
+                    await pipe.execute()
+                self._counters['round_trips'] += 1
+                return
+            except Exception as e:
+                self._mark_down(e)
+        for key, data in encoded.items():
+            self.local.set(key, data, ttl)
+
+    async def delete(self, *keys: str):
+        """删除键（同时清理进程内缓存）"""
+        for key in keys:
+            self.local.delete(key)
+        client = self._redis()
+        if client is not None and keys:
+            try:
+                await client.delete(*keys)
+                self._counters['round_trips'] += 1
+            except Exception as e:
+                self._mark_down(e)
+
+    async def get_or_refresh(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: float,
+                             stale_ttl: float = None,
+                             should_cache: Callable[[Any], bool] = None) -> Any:
+        """
+        读取缓存，未命中或已过新鲜期时通过 loader 刷新
+
+        Args:
+            key: 缓存键
+            loader: 无参协程函数，返回新的缓存值
+            ttl: 新鲜期（秒），期内直接返回缓存值
+            stale_ttl: 新鲜期过后仍可返回旧值的时间（秒），期间后台刷新；默认与 ttl 相同
+            should_cache: 判断 loader 的结果是否写入缓存，默认全部写入
+
+        Returns:
+            缓存值或 loader 的结果；未命中时 loader 的异常原样抛出
+        """
+        stale_ttl = ttl if stale_ttl is None else stale_ttl
+        entry = await self.get(key)
+        if isinstance(entry, dict) and 'stored_at' in entry:
+            age = time.time() - entry['stored_at']
+            if age < ttl:
+                return entry['value']
+            self._record_stale(age)
+            self._start_refresh(key, loader, ttl, stale_ttl, should_cache, background=True)
+            return entry['value']
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._counters['coalesced'] += 1
+        else:
+            task = self._start_refresh(key, loader, ttl, stale_ttl, should_cache, background=False)
+        # shield: 某个调用者被取消时不影响其他等待者和刷新本身
+        return await asyncio.shield(task)
+
+    def _record_stale(self, age: float):
+        self._counters['stale_served'] += 1
+        self._counters['stale_age_s_total'] += age
+        self._counters['stale_age_s_max'] = max(self._counters['stale_age_s_max'], age)
+        self._counters['stale_age_s_last'] = age
+
+    def _start_refresh(self, key, loader, ttl, stale_ttl, should_cache, background: bool) -> asyncio.Task:
+        """启动刷新；同一个键已有刷新在执行时复用它"""
+        task = self._inflight.get(key)
+        if task is not None:
+            if background:
+                self._counters['coalesced'] += 1
+            return task
+        task = asyncio.ensure_future(self._refresh(key, loader, ttl, stale_ttl, should_cache, background))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._refresh_done(key, done, background))
+        return task
+
+    def _refresh_done(self, key: str, task: asyncio.Task, background: bool):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 后台刷新没有等待者，在这里取走异常，避免 "exception was never retrieved"
+        if background and not task.cancelled() and task.exception() is not None:
+            logger.warning(f"⚠️ 后台刷新缓存失败，继续使用旧值 {key}: {task.exception()}")
+
+    async def _refresh(self, key, loader, ttl, stale_ttl, should_cache, background: bool) -> Any:
+        lock_key = f"lock:{key}"
+        token = await self._acquire_lock(lock_key)
+        if token is None:
+            # 其他进程正在刷新：有旧值时直接放弃，没有时等它写入缓存；
+            # 对方释放锁却没有写入（结果被 should_cache 拒绝或刷新失败）时自己加载
+            self._counters['lock_contended'] += 1
+            if background:
+                return None
+            entry = await self._wait_for_peer(key, lock_key)
+            if entry is not None:
+                return entry['value']
+
+        try:
+            value = await loader()
+            self._counters['refreshes'] += 1
+        except Exception:
+            self._counters['refresh_errors'] += 1
+            raise
+        else:
+            if should_cache is None or should_cache(value):
+                await self.set(key, {'value': value, 'stored_at': time.time()}, ttl + stale_ttl)
+            return value
+        finally:
+            if token is not None:
+                await self._release_lock(lock_key, token)
+
+    async def _acquire_lock(self, lock_key: str) -> Optional[str]:
+        """抢占跨进程刷新锁，成功返回令牌；Redis 不可用时只依赖进程内单飞，视为成功"""
+        token = uuid.uuid4().hex
+        client = self._redis()
+        if client is None:
+            return token
+        try:
+            acquired = await client.set(lock_key, token, nx=True, px=int(self.refresh_lock_ttl * 1000))
+            self._counters['round_trips'] += 1
+        except Exception as e:
+            self._mark_down(e)
+            return token
+        return token if acquired else None
+
+    async def _release_lock(self, lock_key: str, token: str):
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            await client.eval(_RELEASE_LOCK, 1, lock_key, token)
+            self._counters['round_trips'] += 1
+        except Exception as e:
+            self._mark_down(e)
+
+    async def _lock_holder(self, lock_key: str) -> Optional[bytes]:
+        """当前持锁者的令牌，锁不存在或 Redis 不可用时返回 None"""
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            holder = await client.get(lock_key)
+            self._counters['round_trips'] += 1
+            return holder
+        except Exception as e:
+            self._mark_down(e)
+            return None
+
+    async def _wait_for_peer(self, key: str, lock_key: str,
+                             poll_interval: float = 0.1) -> Optional[Dict[str, Any]]:
+        """
+        等待持锁进程写入缓存
+
+        锁被释放、换了持锁者或等待超过 refresh_wait_timeout 秒时返回 None，由调用者自己加载
+        """
+        peer = await self._lock_holder(lock_key)
+        if peer is None:
+            return None
+        deadline = time.monotonic() + min(self.refresh_wait_timeout, self.refresh_lock_ttl)
+        while time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            entry = await self.get(key)
+            if isinstance(entry, dict) and 'stored_at' in entry:
+                return entry
+            if await self._lock_holder(lock_key) != peer:
+                # 对方可能在两次读取之间写入后释放锁，再读一次缓存
+                entry = await self.get(key)
+                if isinstance(entry, dict) and 'stored_at' in entry:
+                    return entry
+                break
+        self._counters['peer_wait_abandoned'] += 1
+        return None
+
+    async def drain(self):
+        """等待进行中的后台刷新完成（命令行模式退出前调用，避免刷新被中途取消）"""
+        if self._inflight:
+            await asyncio.gather(*self._inflight.values(), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中、降级状态、写入字节数，以及单飞合并次数和返回旧值的数据年龄（秒）"""
+        stats = dict(self._counters)
+        stale_served = stats['stale_served']
+        stats['stale_age_s_avg'] = round(stats.pop('stale_age_s_total') / stale_served, 3) if stale_served else 0.0
+        stats['stale_age_s_max'] = round(stats['stale_age_s_max'], 3)
+        stats['stale_age_s_last'] = round(stats['stale_age_s_last'], 3)
+        stats['inflight_refreshes'] = len(self._inflight)
+        stats['degraded'] = self.degraded
+        stats['local_entries'] = len(self.local)
+        stats['encoding'] = 'msgpack' if MSGPACK_AVAILABLE else 'json'
+        return stats
+
+    async def close(self):
+        """关闭连接池"""
+        if self._client is not None:
+            try:
+                # redis-py 5 起 close() 更名为 aclose()
+                await getattr(self._client, 'aclose', self._client.close)()
+            except Exception:
+                pass
+            self._client = None
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据保留引擎 - 分批、限速地删除过期笔记和爬取日志
+
+一次性 delete_many 会长时间占用数据库，这里按时间顺序每次只取 batch_size 条，
+先（可选）追加到按日期分区的 gzip JSONL 归档，再按 _id 删除，批次之间按 max_rows_per_second 限速。
+每个批次完成后写入检查点，中断后再次运行会沿用原来的截止时间继续，已归档的记录不会重复归档
+（数据库模式记录归档到的 (时间, _id) 位置，文件模式记录已归档但尚未删除的笔记 id）。
+不归档时只读取删除和统计需要的字段，文档大小由服务端 $bsonSize 计算。
+"""
+
+import gzip
+import json
+import os
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+from note_stream import parse_time
+from database_manager import stat_key
+
+try:
+    import bson
+    BSON_AVAILABLE = True
+except ImportError:
+    BSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+# 不归档时读取的字段：排序键、统计文档减量需要的字段和服务端计算的文档大小
+_SIZE_FIELD = '_bson_size'
+_PURGE_PROJECTION = {'crawl_time': 1, 'timestamp': 1, 'stored_at': 1, 'category': 1,
+                     _SIZE_FIELD: {'$bsonSize': '$$ROOT'}}
+
+
+class RetentionEngine:
+    def __init__(self, manager, archive_dir: Optional[str] = None, batch_size: int = 1000,
+                 max_rows_per_second: float = 5000, checkpoint_path: Optional[str] = None):
+        """
+        初始化保留引擎
+
+        Args:
+            manager: DatabaseManager 实例，未连接时清理文件存储
+            archive_dir: 归档目录，为 None 时不归档直接删除
+            batch_size: 每批删除的记录数
+            max_rows_per_second: 删除速率上限，<= 0 表示不限速
+            checkpoint_path: 检查点文件路径
+        """
+        self.manager = manager
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self.max_rows_per_second = max_rows_per_second
+        self.checkpoint_path = checkpoint_path or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'data', 'retention_checkpoint.json'
+        )
+
+    def run(self, note_days: int = 30, log_days: int = 30) -> Dict[str, Any]:
+        """
+        执行一次清理
+
+        Args:
+            note_days: 笔记保留天数（按 crawl_time）
+            log_days: 爬取日志保留天数（按 timestamp）
+
+        Returns:
+            各集合的删除/归档条数、回收字节数、耗时和速率
+        """
+        checkpoint = self._load_checkpoint()
+        resumed = checkpoint is not None
+        if checkpoint is None:
+            now = datetime.now()
+            checkpoint = {
+                'started_at': now.isoformat(),
+                'notes_cutoff': (now - timedelta(days=note_days)).isoformat(),
+                'logs_cutoff': (now - timedelta(days=log_days)).isoformat(),
+                'notes': self._new_progress(),
+                'logs': self._new_progress()
+            }
+        else:
+            logger.info(f"♻️ 从检查点继续清理（开始于 {checkpoint['started_at']}）")
+
+        start = time.perf_counter()
+        if self.manager.connected:
+            self._purge_collection(checkpoint, 'notes', 'crawl_time', archive=self.archive_dir is not None)
+            self._purge_collection(checkpoint, 'logs', 'timestamp', archive=False)
+        else:
+            self._purge_file_store(checkpoint)
+        elapsed = time.perf_counter() - start
+
+        self._clear_checkpoint()
+        self.manager.query_cache.invalidate('notes', 'statistics')
+
+        deleted = checkpoint['notes']['deleted'] + checkpoint['logs']['deleted']
+        report = {
+            'notes': checkpoint['notes'],
+            'logs': checkpoint['logs'],
+            'resumed': resumed,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(deleted / elapsed, 1) if elapsed > 0 else 0.0,
+            'bytes_reclaimed': checkpoint['notes']['bytes'] + checkpoint['logs']['bytes']
+        }
+        logger.info(f"🧹 清理完成: 删除 {deleted} 条, {report['rows_per_second']} 条/秒, "
+                    f"回收约 {report['bytes_reclaimed'] / 1024 / 1024:.1f} MB")
+        return report
+
+    @staticmethod
+    def _new_progress() -> Dict[str, Any]:
+        return {'deleted': 0, 'archived': 0, 'bytes': 0, 'batches': 0, 'archived_through': None,
+                'archived_ids': []}
+
+    def _purge_collection(self, checkpoint: Dict[str, Any], kind: str, time_field: str, archive: bool):
+        """按 (时间, _id) 升序分批删除截止时间之前的文档"""
+        collection_key = 'notes' if kind == 'notes' else 'crawl_logs'
+        collection = self.manager.db[self.manager.collections[collection_key]]
+        if kind == 'logs' and collection.options().get('capped'):
+            return  # 固定大小集合自动淘汰旧日志
+
+        progress = checkpoint[kind]
+        cutoff = datetime.fromisoformat(checkpoint[f'{kind}_cutoff'])
+        query = {time_field: {'$lt': cutoff}}
+        sort = [(time_field, 1), ('_id', 1)]
+
+        while True:
+            batch_start = time.perf_counter()
+            docs = list(collection.find(query, None if archive else _PURGE_PROJECTION).sort(sort).limit(self.batch_size))
+            if not docs:
+                break
+
+            if archive:
+                through = progress['archived_through']
+                pending = [doc for doc in docs if through is None or
+                           (doc.get(time_field), str(doc['_id'])) > (datetime.fromisoformat(through[0]), through[1])]
+                progress['archived'] += self._archive(pending, time_field)
+                last = docs[-1]
+                progress['archived_through'] = [last[time_field].isoformat(), str(last['_id'])]
+                # 归档先于删除落盘，删除前中断时不会重复归档
+                self._save_checkpoint(checkpoint)
+
+            result = collection.delete_many({'_id': {'$in': [doc['_id'] for doc in docs]}})
+            progress['deleted'] += result.deleted_count
+            progress['bytes'] += sum(doc.get(_SIZE_FIELD) or self._document_size(doc) for doc in docs)
+            progress['batches'] += 1
+            if kind == 'notes':
+                self.manager._increment_statistics(self._statistics_delta(docs))
+            self._save_checkpoint(checkpoint)
+
+            self._throttle(len(docs), batch_start)
+
+    def _purge_file_store(self, checkpoint: Dict[str, Any]):
+        """文件模式：从分段存储中删除过期笔记，空间由存储压缩回收"""
+        store = self.manager._get_note_store()
+        progress = checkpoint['notes']
+        cutoff = datetime.fromisoformat(checkpoint['notes_cutoff'])
+
+        batch = []
+        for note in store.iter_notes():
+            note_time = parse_time(note.get('crawl_time'))
+            if note_time is not None and note_time < cutoff:
+                batch.append(note)
+            if len(batch) >= self.batch_size:
+                self._delete_file_batch(store, batch, progress, checkpoint)
+                batch = []
+        if batch:
+            self._delete_file_batch(store, batch, progress, checkpoint)
+
+        progress['reclaimed_on_disk'] = store.compact()['reclaimed_bytes']
+
+    def _delete_file_batch(self, store, notes: List[Dict[str, Any]], progress: Dict[str, Any],
+                           checkpoint: Dict[str, Any]):
+        batch_start = time.perf_counter()
+        note_ids = [str(n.get('id', n.get('note_id'))) for n in notes]
+        if self.archive_dir is not None:
+            # 上次中断在归档之后、删除之前时，这些笔记已经在归档中
+            archived = set(progress.setdefault('archived_ids', []))
+            progress['archived'] += self._archive([n for n, note_id in zip(notes, note_ids) if note_id not in archived],
+                                                  'crawl_time')
+            progress['archived_ids'] = note_ids
+            # 归档先于删除落盘，删除前中断时不会重复归档
+            self._save_checkpoint(checkpoint)
+        progress['deleted'] += store.delete(note_ids)
+        progress['bytes'] += sum(len(json.dumps(n, ensure_ascii=False, default=str).encode('utf-8')) + 1 for n in notes)
+        progress['batches'] += 1
+        progress['archived_ids'] = []
+        self._save_checkpoint(checkpoint)
+        self._throttle(len(notes), batch_start)
+
+    def _archive(self, docs: List[Dict[str, Any]], time_field: str) -> int:
+        """按日期追加到 archive_dir/notes/YYYY-MM-DD.jsonl.gz，每次追加是一个独立的 gzip 成员"""
+        if not docs:
+            return 0
+        partitions: Dict[str, List[str]] = {}
+        for doc in docs:
+            day = str(doc.get(time_field) or 'unknown')[:10]
+            partitions.setdefault(day, []).append(json.dumps(doc, ensure_ascii=False, default=str) + '\n')
+
+        notes_dir = os.path.join(self.archive_dir, 'notes')
+        os.makedirs(notes_dir, exist_ok=True)
+        for day, lines in partitions.items():
+            with open(os.path.join(notes_dir, f"{day}.jsonl.gz"), 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                    f.write(''.join(lines).encode('utf-8'))
+                raw.flush()
+                os.fsync(raw.fileno())
+        return len(docs)
+
+    def _throttle(self, rows: int, batch_start: float):
+        """批次耗时不足 rows / max_rows_per_second 时补足睡眠"""
+        if self.max_rows_per_second <= 0:
+            return
+        remaining = rows / self.max_rows_per_second - (time.perf_counter() - batch_start)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    @staticmethod
+    def _statistics_delta(docs: List[Dict[str, Any]]) -> Dict[str, int]:
+        """被删除笔记对应的统计文档 $inc 减量"""
+        delta = {}
+        for doc in docs:
+            category = doc.get('category') or '未知'
+            day = str(doc.get('crawl_time') or doc.get('stored_at'))[:10]
+            delta['total_notes'] = delta.get('total_notes', 0) - 1
+            category_field = f'notes_by_category.{stat_key(category)}'
+            day_field = f'notes_by_day.{stat_key(day)}'
+            delta[category_field] = delta.get(category_field, 0) - 1
+            delta[day_field] = delta.get(day_field, 0) - 1
+        return delta
+
+    @staticmethod
+    def _document_size(doc: Dict[str, Any]) -> int:
+        """文档的 BSON 大小，用于估算回收的空间"""
+        if BSON_AVAILABLE:
+            return len(bson.encode(doc))
+        return len(json.dumps(doc, default=str).encode('utf-8'))
+
+    def _load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning(f"检查点文件损坏，重新开始清理: {e}")
+            return None
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]):
+        """写临时文件后原子替换，避免中断时留下半个检查点"""
+        os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _clear_checkpoint(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指标汇总表 - 写入笔记时按关键词和分类维护小时/天两级的时间桶
+
+每个桶记录 notes / likes / comments / shares / views 五个累加指标：
+新笔记计入 1 条笔记和它的全部互动数，已有笔记只计入互动数的增量，
+因此任意时间范围内各桶之和就是这段时间内新增的笔记和互动。
+
+小时桶只保留最近 hourly_retention_days 天，downsample() 把更早的小时桶合并进天桶后删除；
+早于合并水位线的数据直接写入天桶，同一时间段不会同时存在两级桶，查询时无需去重。
+笔记被保留策略删除后汇总数据保持不变，可以查询比原始数据更长的历史。
+
+汇总表存放在独立的 SQLite 文件中（WAL 模式），所有存储后端写入同一份汇总。
+"""
+
+import os
+import sqlite3
+import threading
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from note_stream import parse_time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROLLUP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'rollups.sqlite3')
+
+DIMENSIONS = ('category', 'keyword')
+METRICS = ('notes', 'likes', 'comments', 'shares', 'views')
+# 指标对应的笔记计数字段
+METRIC_FIELDS = {
+    'likes': 'like_count',
+    'comments': 'comment_count',
+    'shares': 'share_count',
+    'views': 'view_count'
+}
+
+HOUR_FORMAT = '%Y-%m-%d %H:00'
+DAY_FORMAT = '%Y-%m-%d'
+
+
+def _count(value) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def rollup_deltas(notes: Iterable[Dict[str, Any]],
+                  previous: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[Tuple[str, str, str], Dict[str, int]]:
+    """
+    计算一批笔记对小时桶的增量
+
+    Args:
+        notes: 本批实际写入的笔记（同一 id 只取最后一条）
+        previous: note_id -> 写入前已存储的计数字段；不在其中的笔记视为新笔记
+
+    Returns:
+        (维度, 取值, 小时桶) -> 各指标增量
+    """
+    previous = previous or {}
+    latest = {str(note.get('id', note.get('note_id'))): note for note in notes}
+
+    deltas: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+    for note_id, note in latest.items():
+        old = previous.get(note_id)
+        values = {'notes': 0 if old is not None else 1}
+        for metric, field in METRIC_FIELDS.items():
+            values[metric] = _count(note.get(field)) - (_count(old.get(field)) if old is not None else 0)
+        if not any(values.values()):
+            continue
+
+        # 已有笔记的增量记在本次爬取所在的小时
+        bucket = (parse_time(note.get('crawl_time')) or datetime.now()).strftime(HOUR_FORMAT)
+        for dimension in DIMENSIONS:
+            value = note.get(dimension) or ('未知' if dimension == 'category' else None)
+            if value is None:
+                continue
+            total = deltas.setdefault((dimension, str(value), bucket), dict.fromkeys(METRICS, 0))
+            for metric in METRICS:
+                total[metric] += values[metric]
+    return deltas
+
+
+class RollupStore:
+    SCHEMA = f"""
+        CREATE TABLE IF NOT EXISTS rollup_hourly (
+            dimension TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            value TEXT NOT NULL,
+            {', '.join(f'{m} INTEGER NOT NULL DEFAULT 0' for m in METRICS)},
+            PRIMARY KEY (dimension, bucket, value)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS rollup_daily (
+            dimension TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            value TEXT NOT NULL,
+            {', '.join(f'{m} INTEGER NOT NULL DEFAULT 0' for m in METRICS)},
+            PRIMARY KEY (dimension, bucket, value)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS rollup_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    UPSERT = """
+        INSERT INTO {table} (dimension, bucket, value, {metrics})
+        VALUES (?, ?, ?, {placeholders})
+        ON CONFLICT (dimension, bucket, value) DO UPDATE SET {updates}
+    """
+
+    def __init__(self, path: str = DEFAULT_ROLLUP_PATH, hourly_retention_days: int = 7):
+        """
+        初始化汇总存储（首次读写时才打开数据库文件）
+
+        Args:
+            path: SQLite 文件路径
+            hourly_retention_days: 小时桶保留天数，更早的数据只保留天桶
+        """
+        self.path = path
+        self.hourly_retention_days = hourly_retention_days
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # 由 _lock 串行化访问；事务显式使用 BEGIN IMMEDIATE，与其他进程的写入互斥
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _upsert_sql(self, table: str) -> str:
+        return self.UPSERT.format(
+            table=table,
+            metrics=', '.join(METRICS),
+            placeholders=', '.join('?' for _ in METRICS),
+            updates=', '.join(f'{m} = {m} + excluded.{m}' for m in METRICS)
+        )
+
+    @staticmethod
+    def _watermark(conn: sqlite3.Connection) -> str:
+        """早于该日期的数据只存在于天桶中"""
+        row = conn.execute("SELECT value FROM rollup_meta WHERE key = 'hourly_watermark'").fetchone()
+        return row['value'] if row else ''
+
+    def record(self, notes: Iterable[Dict[str, Any]], previous: Optional[Dict[str, Dict[str, Any]]] = None) -> int:
+        """
+        把一批已写入的笔记累加到汇总表
+
+        Args:
+            notes: 本批实际写入的笔记
+            previous: note_id -> 写入前已存储的计数字段（like_count 等），新笔记不在其中
+
+        Returns:
+            更新的桶数量
+        """
+        deltas = rollup_deltas(notes, previous)
+        if not deltas:
+            return 0
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                watermark = self._watermark(conn)
+                hourly, daily = [], []
+                for (dimension, value, bucket), values in deltas.items():
+                    day = bucket[:10]
+                    if day < watermark:
+                        daily.append((dimension, day, value, *(values[m] for m in METRICS)))
+                    else:
+                        hourly.append((dimension, bucket, value, *(values[m] for m in METRICS)))
+                conn.executemany(self._upsert_sql('rollup_hourly'), hourly)
+                conn.executemany(self._upsert_sql('rollup_daily'), daily)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return len(deltas)
+
+    def downsample(self, now: datetime = None) -> Dict[str, Any]:
+        """把 hourly_retention_days 天之前的小时桶合并进天桶，在同一个事务中完成合并、删除和水位线推进"""
+        now = now or datetime.now()
+        new_watermark = (now - timedelta(days=self.hourly_retention_days)).strftime(DAY_FORMAT)
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if new_watermark <= self._watermark(conn):
+                    conn.execute("COMMIT")
+                    return {'folded_rows': 0, 'watermark': new_watermark}
+
+                conn.execute(f"""
+                    INSERT INTO rollup_daily (dimension, bucket, value, {', '.join(METRICS)})
+                    SELECT dimension, substr(bucket, 1, 10), value, {', '.join(f'SUM({m})' for m in METRICS)}
+                    FROM rollup_hourly WHERE bucket < ?
+                    GROUP BY dimension, substr(bucket, 1, 10), value
+                    ON CONFLICT (dimension, bucket, value) DO UPDATE SET
+                        {', '.join(f'{m} = {m} + excluded.{m}' for m in METRICS)}
+                """, (new_watermark,))
+                folded = conn.execute("DELETE FROM rollup_hourly WHERE bucket < ?", (new_watermark,)).rowcount
+                conn.execute("INSERT OR REPLACE INTO rollup_meta (key, value) VALUES ('hourly_watermark', ?)",
+                             (new_watermark,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        if folded:
+            logger.info(f"📉 小时汇总已合并到天汇总: {folded} 个小时桶, 水位线 {new_watermark}")
+        return {'folded_rows': folded, 'watermark': new_watermark}
+
+    @staticmethod
+    def _since_day(days: int, now: datetime = None) -> str:
+        """最近 days 天（含今天）的起始日期"""
+        return ((now or datetime.now()) - timedelta(days=max(days, 1) - 1)).strftime(DAY_FORMAT)
+
+    def query(self, dimension: str = 'category', days: int = 7, values: List[str] = None,
+              limit: int = None, order_by: str = 'notes') -> List[Dict[str, Any]]:
+        """
+        最近 days 天每个取值的指标合计，不读取原始笔记
+
+        Args:
+            dimension: 'category' 或 'keyword'
+            values: 只返回这些取值
+            limit: 返回条数上限
+            order_by: 排序指标（倒序）
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"未知的汇总维度: {dimension}，可选: {', '.join(DIMENSIONS)}")
+        if order_by not in METRICS:
+            raise ValueError(f"未知的汇总指标: {order_by}，可选: {', '.join(METRICS)}")
+
+        condition, params = "dimension = ? AND bucket >= ?", [dimension, self._since_day(days)]
+        if values:
+            condition += f" AND value IN ({', '.join('?' for _ in values)})"
+            params.extend(values)
+
+        sql = f"""
+            SELECT value, {', '.join(f'SUM({m}) AS {m}' for m in METRICS)} FROM (
+                SELECT value, {', '.join(METRICS)} FROM rollup_daily WHERE {condition}
+                UNION ALL
+                SELECT value, {', '.join(METRICS)} FROM rollup_hourly WHERE {condition}
+            ) GROUP BY value ORDER BY {order_by} DESC
+        """
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._lock:
+            rows = self._connection().execute(sql, params * 2).fetchall()
+        return [dict(row) for row in rows]
+
+    def series(self, dimension: str = 'category', value: str = None, days: int = 7,
+               granularity: str = 'day') -> List[Dict[str, Any]]:
+        """
+        按时间桶返回指标序列
+
+        Args:
+            value: 只返回该取值，None 表示该维度下全部取值
+            granularity: 'day' 或 'hour'；小时粒度只覆盖小时桶保留期内的数据
+        """
+        if granularity not in ('day', 'hour'):
+            raise ValueError(f"未知的时间粒度: {granularity}")
+
+        condition, params = "dimension = ? AND bucket >= ?", [dimension, self._since_day(days)]
+        if value is not None:
+            condition += " AND value = ?"
+            params.append(value)
+
+        if granularity == 'hour':
+            sql = f"""
+                SELECT bucket, value, {', '.join(METRICS)} FROM rollup_hourly
+                WHERE {condition} ORDER BY bucket, value
+            """
+        else:
+            sql = f"""
+                SELECT bucket, value, {', '.join(f'SUM({m}) AS {m}' for m in METRICS)} FROM (
+                    SELECT bucket, value, {', '.join(METRICS)} FROM rollup_daily WHERE {condition}
+                    UNION ALL
+                    SELECT substr(bucket, 1, 10) AS bucket, value, {', '.join(METRICS)}
+                    FROM rollup_hourly WHERE {condition}
+                ) GROUP BY bucket, value ORDER BY bucket, value
+            """
+            params = params * 2
+
+        with self._lock:
+            rows = self._connection().execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def rebuild(self, notes: Iterable[Dict[str, Any]], batch_size: int = 5000) -> int:
+        """清空汇总表后用全部原始笔记重新计算（首次启用或数据修复时使用），返回处理的笔记数"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM rollup_hourly")
+            conn.execute("DELETE FROM rollup_daily")
+            conn.execute("DELETE FROM rollup_meta")
+            conn.execute("COMMIT")
+
+        total = 0
+        batch = []
+        for note in notes:
+            batch.append(note)
+            if len(batch) >= batch_size:
+                self.record(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.record(batch)
+            total += len(batch)
+
+        self.downsample()
+        logger.info(f"🔧 汇总表已重建: {total} 条笔记")
+        return total
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,774 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+存储后端 - 笔记、话题、关键词和统计数据的统一存储接口
+
+目前有三种实现:
+    MongoBackend   基于 DatabaseManager（MongoDB，不可用时使用文件存储）
+    MySQLBackend   基于 init.sql 中的 xhs_notes / xhs_topics / xhs_keywords 表
+    SQLiteBackend  嵌入式单机存储（WAL 模式），不需要外部数据库
+
+所有后端读写同一种规范化的笔记格式（字段与 xhs_notes 表一致），
+每行带有 content_hash 指纹，重复爬取到内容和互动数据都没有变化的笔记不会重写，
+实际写入的笔记同时累加到 rollups.RollupStore 的关键词/分类指标汇总表，
+话题按 (keyword, date) 唯一，关键词每次保存都是完整快照。
+通过 create_backend('sqlite' | 'mysql' | 'mongo', **options) 创建。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, date as date_type
+from typing import List, Dict, Any, Optional, Iterator, Callable
+
+from note_stream import parse_time
+from note_fingerprint import note_fingerprint
+from mysql_pool import get_pool, MYSQL_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+# 规范化笔记的字段，与 init.sql 中的 xhs_notes 表一致
+NOTE_COLUMNS = (
+    'id', 'title', 'content', 'note_type', 'user_id', 'user_nickname', 'user_avatar',
+    'like_count', 'collect_count', 'comment_count', 'share_count', 'view_count',
+    'publish_time', 'crawl_time', 'tags', 'images', 'category', 'content_hash'
+)
+COUNT_COLUMNS = ('like_count', 'collect_count', 'comment_count', 'share_count', 'view_count')
+JSON_COLUMNS = ('tags', 'images')
+# 指纹变化时覆盖的列；作者、发布时间和首次爬取时间保持不变
+UPDATE_COLUMNS = COUNT_COLUMNS + ('title', 'content', 'tags', 'images', 'content_hash')
+TOPIC_COLUMNS = ('keyword', 'heat_score', 'note_count', 'total_likes', 'total_comments', 'category', 'date')
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'xhs_data.sqlite3')
+
+
+def normalize_note(note: Dict[str, Any]) -> Dict[str, Any]:
+    """把笔记转换为规范化格式；兼容 DatabaseManager 使用的 author 等字段"""
+    row = {
+        'id': str(note.get('id', note.get('note_id'))),
+        'title': note.get('title') or '',
+        'content': note.get('content', note.get('desc')),
+        'note_type': note.get('note_type', note.get('type')) or 'normal',
+        'user_id': note.get('user_id', note.get('author_id')),
+        'user_nickname': note.get('user_nickname', note.get('author')),
+        'user_avatar': note.get('user_avatar'),
+        'publish_time': parse_time(note.get('publish_time')),
+        'crawl_time': parse_time(note.get('crawl_time')) or datetime.now(),
+        'tags': note.get('tags') or [],
+        'images': note.get('images') or [],
+        'category': note.get('category')
+    }
+    for column in COUNT_COLUMNS:
+        row[column] = int(note.get(column) or 0)
+    row['content_hash'] = note_fingerprint(row)
+    return row
+
+
+def normalize_topic(topic: Dict[str, Any], day: date_type) -> Dict[str, Any]:
+    """把 RealCrawlerService 生成的话题（title/trendScore/...）转换为 xhs_topics 行"""
+    return {
+        'keyword': topic['title'],
+        'heat_score': float(topic.get('trendScore', 0)),
+        'note_count': int(topic.get('noteCount', 0)),
+        'total_likes': int(topic.get('likeCount', 0)),
+        'total_comments': int(topic.get('commentCount', 0)),
+        'category': topic.get('category'),
+        'date': day
+    }
+
+
+class StorageBackend(ABC):
+    """存储后端接口"""
+
+    name = 'base'
+    # 指标汇总表（rollups.RollupStore），为 None 时不维护汇总
+    rollups = None
+    # 笔记和话题每批写入的行数
+    batch_size = 500
+    # 最近一次 save_notes / save_topics 的分批耗时，见 _write_in_batches
+    last_write_report = None
+
+    @abstractmethod
+    def save_notes(self, notes: List[Dict[str, Any]]) -> int:
+        """按 id 插入或更新笔记，返回写入条数"""
+
+    @abstractmethod
+    def get_notes(self, limit: int = 20, category: str = None, days: int = 7) -> List[Dict[str, Any]]:
+        """按 crawl_time 倒序获取最近 days 天的笔记（days <= 0 不限时间）"""
+
+    @abstractmethod
+    def scan_notes(self, start: datetime, end: datetime = None, category: str = None,
+                   time_field: str = 'crawl_time') -> Iterator[Dict[str, Any]]:
+        """按时间升序流式遍历 [start, end) 内的笔记"""
+
+    @abstractmethod
+    def save_topics(self, topics: List[Dict[str, Any]], day: date_type = None) -> int:
+        """保存某一天的话题统计，同一 (keyword, date) 覆盖"""
+
+    @abstractmethod
+    def scan_topics(self, days: int = 7) -> List[Dict[str, Any]]:
+        """最近 days 天的全部话题行，按日期倒序、热度倒序"""
+
+    @abstractmethod
+    def save_keywords(self, keywords: List[Dict[str, Any]]) -> int:
+        """用新的关键词快照整体替换旧快照"""
+
+    @abstractmethod
+    def get_keywords(self) -> List[Dict[str, Any]]:
+        """当前关键词快照"""
+
+    @abstractmethod
+    def get_statistics(self) -> Dict[str, Any]:
+        """total_notes / notes_by_category / recent_notes / total_keywords / total_topics"""
+
+    def get_topics(self, limit: int = 20, days: int = 7) -> List[Dict[str, Any]]:
+        """最近 days 天热度最高的话题"""
+        return sorted(self.scan_topics(days), key=lambda row: row['heat_score'], reverse=True)[:limit]
+
+    def get_write_metrics(self) -> Dict[str, Any]:
+        """save_notes 的累计计数：比对笔记数、因指纹未变化跳过的条数和跳过率"""
+        counts = self.__dict__.get('_write_counts', {'notes_seen': 0, 'notes_skipped': 0})
+        seen, skipped = counts['notes_seen'], counts['notes_skipped']
+        return {
+            'notes_seen': seen,
+            'notes_skipped': skipped,
+            'notes_written': seen - skipped,
+            'skip_ratio': round(skipped / seen, 4) if seen else 0.0
+        }
+
+    def _changed_rows(self, rows: List[Dict[str, Any]], stored: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """过滤掉 content_hash 与已存储值相同的行，并累计跳过计数"""
+        changed = [row for row in rows if stored.get(row['id'], {}).get('content_hash') != row['content_hash']]
+        counts = self.__dict__.setdefault('_write_counts', {'notes_seen': 0, 'notes_skipped': 0})
+        counts['notes_seen'] += len(rows)
+        counts['notes_skipped'] += len(rows) - len(changed)
+        return changed
+
+    def _write_in_batches(self, table: str, rows: List[tuple],
+                          write_batch: Callable[[List[tuple]], None]) -> Dict[str, Any]:
+        """按 batch_size 分批调用 write_batch，记录每批的行数和耗时（毫秒）"""
+        report = {'table': table, 'rows': len(rows), 'batches': []}
+        start = time.perf_counter()
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i:i + self.batch_size]
+            batch_start = time.perf_counter()
+            write_batch(batch)
+            report['batches'].append({'rows': len(batch), 'ms': round((time.perf_counter() - batch_start) * 1000, 3)})
+        report['ms'] = round((time.perf_counter() - start) * 1000, 3)
+        self.last_write_report = report
+        return report
+
+    def _record_rollups(self, rows: List[Dict[str, Any]], stored: Dict[str, Dict[str, Any]]):
+        """把已写入的行累加到指标汇总表，失败时只记录警告"""
+        if self.rollups is None or not rows:
+            return
+        try:
+            self.rollups.record(rows, stored)
+        except Exception as e:
+            logger.warning(f"更新指标汇总失败: {e}")
+
+    def close(self):
+        """释放连接"""
+
+
+class SQLiteBackend(StorageBackend):
+    """嵌入式 SQLite 存储，WAL 模式下读写互不阻塞，每个线程使用独立连接"""
+
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS xhs_notes (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL DEFAULT '',
+            content TEXT,
+            note_type TEXT DEFAULT 'normal',
+            user_id TEXT,
+            user_nickname TEXT,
+            user_avatar TEXT,
+            like_count INTEGER DEFAULT 0,
+            collect_count INTEGER DEFAULT 0,
+            comment_count INTEGER DEFAULT 0,
+            share_count INTEGER DEFAULT 0,
+            view_count INTEGER DEFAULT 0,
+            publish_time TEXT,
+            crawl_time TEXT,
+            tags TEXT,
+            images TEXT,
+            category TEXT,
+            content_hash TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_notes_crawl_time ON xhs_notes (crawl_time);
+        CREATE INDEX IF NOT EXISTS idx_notes_category_crawl_time ON xhs_notes (category, crawl_time);
+        CREATE INDEX IF NOT EXISTS idx_notes_publish_time ON xhs_notes (publish_time);
+
+        CREATE TABLE IF NOT EXISTS xhs_topics (
+            keyword TEXT NOT NULL,
+            date TEXT NOT NULL,
+            heat_score REAL DEFAULT 0,
+            note_count INTEGER DEFAULT 0,
+            total_likes INTEGER DEFAULT 0,
+            total_comments INTEGER DEFAULT 0,
+            category TEXT,
+            PRIMARY KEY (keyword, date)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_topics_date_heat ON xhs_topics (date, heat_score);
+
+        CREATE TABLE IF NOT EXISTS xhs_keywords (
+            keyword TEXT PRIMARY KEY,
+            heat REAL DEFAULT 0,
+            data TEXT NOT NULL,
+            updated_at TEXT
+        );
+    """
+
+    INSERT_NOTE = f"""
+        INSERT INTO xhs_notes ({', '.join(NOTE_COLUMNS)})
+        VALUES ({', '.join('?' for _ in NOTE_COLUMNS)})
+        ON CONFLICT (id) DO UPDATE SET
+            {', '.join(f'{c} = excluded.{c}' for c in UPDATE_COLUMNS)}
+    """
+    INSERT_TOPIC = f"""
+        INSERT INTO xhs_topics ({', '.join(TOPIC_COLUMNS)})
+        VALUES ({', '.join('?' for _ in TOPIC_COLUMNS)})
+        ON CONFLICT (keyword, date) DO UPDATE SET
+            heat_score = excluded.heat_score,
+            note_count = excluded.note_count,
+            total_likes = excluded.total_likes,
+            total_comments = excluded.total_comments
+    """
+    SELECT_NOTES = f"SELECT {', '.join(NOTE_COLUMNS)} FROM xhs_notes"
+    # 写入前读取指纹和计算汇总增量所需的旧计数
+    SELECT_STORED = f"SELECT id, content_hash, {', '.join(COUNT_COLUMNS)} FROM xhs_notes"
+    # 单条语句的绑定参数上限在旧版本 SQLite 中是 999
+    HASH_LOOKUP_SIZE = 500
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, cache_size_mb: int = 64, rollups=None,
+                 batch_size: int = 500):
+        """
+        Args:
+            path: 数据库文件路径，':memory:' 仅用于测试（每个线程各自一份）
+            cache_size_mb: 每个连接的页缓存大小
+            rollups: 指标汇总表（rollups.RollupStore）
+            batch_size: 每个写事务包含的行数
+        """
+        self.path = path
+        self.rollups = rollups
+        self.batch_size = batch_size
+        self.cache_size_mb = cache_size_mb
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.executescript(self.SCHEMA)
+        # 旧数据文件没有 content_hash 列，补上后这些行在下次爬取时会被重写一次
+        if 'content_hash' not in {row['name'] for row in conn.execute("PRAGMA table_info(xhs_notes)")}:
+            conn.execute("ALTER TABLE xhs_notes ADD COLUMN content_hash TEXT")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # 相同 SQL 文本的语句会被缓存复用，不会重复编译
+            conn = sqlite3.connect(self.path, timeout=30, cached_statements=256,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute(f"PRAGMA cache_size = -{self.cache_size_mb * 1024}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _format_time(value: Optional[datetime]) -> Optional[str]:
+        return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+    @staticmethod
+    def _note_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        note = dict(row)
+        for column in JSON_COLUMNS:
+            note[column] = json.loads(note[column]) if note[column] else []
+        return note
+
+    def _stored_rows(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        conn = self._connection()
+        stored = {}
+        for i in range(0, len(ids), self.HASH_LOOKUP_SIZE):
+            batch = ids[i:i + self.HASH_LOOKUP_SIZE]
+            cursor = conn.execute(
+                f"{self.SELECT_STORED} WHERE id IN ({', '.join('?' for _ in batch)})", batch
+            )
+            stored.update((row['id'], dict(row)) for row in cursor)
+        return stored
+
+    def save_notes(self, notes: List[Dict[str, Any]]) -> int:
+        normalized = [normalize_note(note) for note in notes]
+        stored = self._stored_rows([row['id'] for row in normalized])
+        changed = self._changed_rows(normalized, stored)
+
+        rows = []
+        for row in changed:
+            row['publish_time'] = self._format_time(row['publish_time'])
+            row['crawl_time'] = self._format_time(row['crawl_time'])
+            for column in JSON_COLUMNS:
+                row[column] = json.dumps(row[column], ensure_ascii=False)
+            rows.append(tuple(row[c] for c in NOTE_COLUMNS))
+
+        self._write_in_batches('xhs_notes', rows, self._executemany(self.INSERT_NOTE))
+        self._record_rollups(changed, stored)
+        return len(rows)
+
+    def _executemany(self, sql: str) -> Callable[[List[tuple]], None]:
+        """每批一个事务；预编译语句由连接缓存复用"""
+        conn = self._connection()
+
+        def write_batch(batch: List[tuple]):
+            with conn:
+                conn.executemany(sql, batch)
+        return write_batch
+
+    def get_notes(self, limit: int = 20, category: str = None, days: int = 7) -> List[Dict[str, Any]]:
+        conditions, params = [], []
+        if category:
+            conditions.append("category = ?")
+            params.append(category)
+        if days and days > 0:
+            conditions.append("crawl_time >= ?")
+            params.append(self._format_time(datetime.now() - timedelta(days=days)))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        params.append(limit)
+
+        cursor = self._connection().execute(
+            f"{self.SELECT_NOTES}{where} ORDER BY crawl_time DESC LIMIT ?", params
+        )
+        return [self._note_from_row(row) for row in cursor]
+
+    def scan_notes(self, start: datetime, end: datetime = None, category: str = None,
+                   time_field: str = 'crawl_time') -> Iterator[Dict[str, Any]]:
+        if time_field not in ('crawl_time', 'publish_time'):
+            raise ValueError(f"不支持的时间字段: {time_field}")
+        sql = f"{self.SELECT_NOTES} WHERE {time_field} >= ? AND {time_field} < ?"
+        params = [self._format_time(start), self._format_time(end or datetime.now())]
+        if category:
+            sql += " AND category = ?"
+            params.append(category)
+
+        for row in self._connection().execute(f"{sql} ORDER BY {time_field}", params):
+            yield self._note_from_row(row)
+
+    def save_topics(self, topics: List[Dict[str, Any]], day: date_type = None) -> int:
+        day = day or datetime.now().date()
+        rows = []
+        for topic in topics:
+            row = normalize_topic(topic, day)
+            row['date'] = day.isoformat()
+            rows.append(tuple(row[c] for c in TOPIC_COLUMNS))
+
+        self._write_in_batches('xhs_topics', rows, self._executemany(self.INSERT_TOPIC))
+        return len(rows)
+
+    def scan_topics(self, days: int = 7) -> List[Dict[str, Any]]:
+        since = (datetime.now().date() - timedelta(days=days)).isoformat()
+        cursor = self._connection().execute(
+            f"SELECT {', '.join(TOPIC_COLUMNS)} FROM xhs_topics WHERE date >= ? "
+            f"ORDER BY date DESC, heat_score DESC", (since,)
+        )
+        topics = []
+        for row in cursor:
+            topic = dict(row)
+            topic['date'] = date_type.fromisoformat(topic['date'])
+            topics.append(topic)
+        return topics
+
+    def save_keywords(self, keywords: List[Dict[str, Any]]) -> int:
+        now = self._format_time(datetime.now())
+        rows = [(k['keyword'], float(k.get('heat', 0)), json.dumps(k, ensure_ascii=False, default=str), now)
+                for k in keywords]
+        conn = self._connection()
+        # 删除和插入在同一个事务里，读取者只会看到旧快照或新快照
+        with conn:
+            conn.execute("DELETE FROM xhs_keywords")
+            conn.executemany("INSERT INTO xhs_keywords (keyword, heat, data, updated_at) VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def get_keywords(self) -> List[Dict[str, Any]]:
+        cursor = self._connection().execute("SELECT data FROM xhs_keywords ORDER BY heat DESC")
+        return [json.loads(row['data']) for row in cursor]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        conn = self._connection()
+        since = self._format_time(datetime.now() - timedelta(days=7))
+        return {
+            'total_notes': conn.execute("SELECT COUNT(*) FROM xhs_notes").fetchone()[0],
+            'notes_by_category': {
+                (row[0] or '未知'): row[1] for row in conn.execute(
+                    "SELECT category, COUNT(*) AS n FROM xhs_notes GROUP BY category ORDER BY n DESC")
+            },
+            'recent_notes': conn.execute("SELECT COUNT(*) FROM xhs_notes WHERE crawl_time >= ?", (since,)).fetchone()[0],
+            'total_keywords': conn.execute("SELECT COUNT(*) FROM xhs_keywords").fetchone()[0],
+            'total_topics': conn.execute("SELECT COUNT(*) FROM xhs_topics").fetchone()[0]
+        }
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class MySQLBackend(StorageBackend):
+    """MySQL 存储，表结构见 init.sql"""
+
+    name = 'mysql'
+
+    # 多行 INSERT 的 (前缀, 每行占位符, 后缀)，一批 N 行拼成 VALUES (...), (...), ... 一条语句
+    INSERT_NOTE = (
+        f"INSERT INTO xhs_notes ({', '.join(NOTE_COLUMNS)}) VALUES ",
+        f"({', '.join('%s' for _ in NOTE_COLUMNS)})",
+        f" ON DUPLICATE KEY UPDATE {', '.join(f'{c} = VALUES({c})' for c in UPDATE_COLUMNS)}"
+    )
+    INSERT_TOPIC = (
+        f"INSERT INTO xhs_topics ({', '.join(TOPIC_COLUMNS)}) VALUES ",
+        f"({', '.join('%s' for _ in TOPIC_COLUMNS)})",
+        " ON DUPLICATE KEY UPDATE heat_score = VALUES(heat_score), note_count = VALUES(note_count),"
+        " total_likes = VALUES(total_likes), total_comments = VALUES(total_comments)"
+    )
+    SELECT_NOTES = f"SELECT {', '.join(NOTE_COLUMNS)} FROM xhs_notes"
+    # 写入前读取指纹和计算汇总增量所需的旧计数
+    SELECT_STORED = f"SELECT id, content_hash, {', '.join(COUNT_COLUMNS)} FROM xhs_notes"
+
+    def __init__(self, db_config: Dict[str, Any], rollups=None, pool_options: Dict[str, Any] = None,
+                 batch_size: int = 500):
+        """
+        Args:
+            db_config: mysql.connector.connect 的参数
+            rollups: 指标汇总表（rollups.RollupStore）
+            pool_options: 传给共享连接池的参数（max_size / borrow_timeout / max_lifetime 等）
+            batch_size: 每条多行 INSERT 语句包含的行数，受服务端 max_allowed_packet 限制
+        """
+        if not MYSQL_AVAILABLE:
+            raise RuntimeError("MySQL驱动未安装，请运行: pip install mysql-connector-python")
+        self.db_config = db_config
+        self.rollups = rollups
+        self.batch_size = batch_size
+        self.pool = get_pool(db_config, **(pool_options or {}))
+        self._schema_checked = False
+        try:
+            self._ensure_schema()
+        except Exception as e:
+            logger.warning(f"⚠️ 检查 xhs_notes 表结构失败，首次使用时重试: {e}")
+
+    def _ensure_schema(self):
+        """
+        旧数据库的 xhs_notes 没有 content_hash 列，补上后这些行在下次爬取时会被重写一次
+        （与 migrate_001_content_hash.sql 相同）
+        """
+        conn = self.pool.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'xhs_notes' AND COLUMN_NAME = 'content_hash'"
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute("ALTER TABLE xhs_notes ADD COLUMN content_hash CHAR(32) "
+                               "COMMENT '内容和互动数据指纹，未变化时跳过写入' AFTER location")
+                logger.info("🔧 已为 xhs_notes 添加 content_hash 列")
+            cursor.close()
+            self._schema_checked = True
+        finally:
+            conn.close()
+
+    def _connect(self):
+        """从共享连接池借出连接，close() 时归还"""
+        if not self._schema_checked:
+            self._ensure_schema()
+        return self.pool.get_connection()
+
+    @staticmethod
+    def _note_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        for column in JSON_COLUMNS:
+            if isinstance(row.get(column), (str, bytes)):
+                row[column] = json.loads(row[column])
+            row[column] = row.get(column) or []
+        return row
+
+    def _upsert_batches(self, table: str, statement: tuple, rows: List[tuple]) -> Dict[str, Any]:
+        """用同一个连接按批执行多行 INSERT ... ON DUPLICATE KEY UPDATE，每批提交一次"""
+        prefix, placeholder, suffix = statement
+        statements = {}
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+
+            def write_batch(batch: List[tuple]):
+                # 除最后一批外行数相同，语句文本只拼接一次
+                sql = statements.get(len(batch))
+                if sql is None:
+                    sql = statements[len(batch)] = prefix + ', '.join([placeholder] * len(batch)) + suffix
+                cursor.execute(sql, [value for row in batch for value in row])
+                conn.commit()
+
+            report = self._write_in_batches(table, rows, write_batch)
+            cursor.close()
+            return report
+        finally:
+            conn.close()
+
+    def _fetch_all(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+        finally:
+            conn.close()
+
+    def _stored_rows(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        stored = {}
+        for i in range(0, len(ids), 1000):
+            batch = ids[i:i + 1000]
+            rows = self._fetch_all(
+                f"{self.SELECT_STORED} WHERE id IN ({', '.join('%s' for _ in batch)})", tuple(batch)
+            )
+            stored.update((row['id'], row) for row in rows)
+        return stored
+
+    def save_notes(self, notes: List[Dict[str, Any]]) -> int:
+        normalized = [normalize_note(note) for note in notes]
+        stored = self._stored_rows([row['id'] for row in normalized])
+        changed = self._changed_rows(normalized, stored)
+
+        rows = []
+        for row in changed:
+            for column in JSON_COLUMNS:
+                row[column] = json.dumps(row[column], ensure_ascii=False)
+            rows.append(tuple(row[c] for c in NOTE_COLUMNS))
+        if not rows:
+            self.last_write_report = {'table': 'xhs_notes', 'rows': 0, 'batches': [], 'ms': 0.0}
+            return 0
+        self._upsert_batches('xhs_notes', self.INSERT_NOTE, rows)
+        self._record_rollups(changed, stored)
+        return len(rows)
+
+    def get_notes(self, limit: int = 20, category: str = None, days: int = 7) -> List[Dict[str, Any]]:
+        conditions, params = ["is_deleted = FALSE"], []
+        if category:
+            conditions.append("category = %s")
+            params.append(category)
+        if days and days > 0:
+            conditions.append("crawl_time >= %s")
+            params.append(datetime.now() - timedelta(days=days))
+        where = f" WHERE {' AND '.join(conditions)}"
+        params.append(limit)
+
+        rows = self._fetch_all(f"{self.SELECT_NOTES}{where} ORDER BY crawl_time DESC LIMIT %s", tuple(params))
+        return [self._note_from_row(row) for row in rows]
+
+    def scan_notes(self, start: datetime, end: datetime = None, category: str = None,
+                   time_field: str = 'crawl_time') -> Iterator[Dict[str, Any]]:
+        if time_field not in ('crawl_time', 'publish_time'):
+            raise ValueError(f"不支持的时间字段: {time_field}")
+        sql = f"{self.SELECT_NOTES} WHERE {time_field} >= %s AND {time_field} < %s AND is_deleted = FALSE"
+        params = [start, end or datetime.now()]
+        if category:
+            sql += " AND category = %s"
+            params.append(category)
+
+        conn = self._connect()
+        try:
+            # 非缓冲游标逐行从服务器读取，不会一次把结果集放进内存
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            cursor.execute(f"{sql} ORDER BY {time_field}", tuple(params))
+            for row in cursor:
+                yield self._note_from_row(row)
+            cursor.close()
+        finally:
+            conn.close()
+
+    def save_topics(self, topics: List[Dict[str, Any]], day: date_type = None) -> int:
+        day = day or datetime.now().date()
+        rows = [tuple(normalize_topic(topic, day)[c] for c in TOPIC_COLUMNS) for topic in topics]
+        if rows:
+            self._upsert_batches('xhs_topics', self.INSERT_TOPIC, rows)
+        return len(rows)
+
+    def scan_topics(self, days: int = 7) -> List[Dict[str, Any]]:
+        rows = self._fetch_all(f"""
+            SELECT {', '.join(TOPIC_COLUMNS)}
+            FROM xhs_topics
+            WHERE date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+            ORDER BY date DESC, heat_score DESC
+        """, (days,))
+        for row in rows:
+            row['heat_score'] = float(row['heat_score'])
+        return rows
+
+    def get_topics(self, limit: int = 20, days: int = 7) -> List[Dict[str, Any]]:
+        rows = self._fetch_all(f"""
+            SELECT {', '.join(TOPIC_COLUMNS)}
+            FROM xhs_topics
+            WHERE date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+            ORDER BY heat_score DESC
+            LIMIT %s
+        """, (days, limit))
+        for row in rows:
+            row['heat_score'] = float(row['heat_score'])
+        return rows
+
+    def save_keywords(self, keywords: List[Dict[str, Any]]) -> int:
+        now = datetime.now()
+        rows = [(k['keyword'], float(k.get('heat', 0)), json.dumps(k, ensure_ascii=False, default=str), now)
+                for k in keywords]
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            # 删除和插入在同一个事务里，读取者只会看到旧快照或新快照
+            conn.start_transaction()
+            cursor.execute("DELETE FROM xhs_keywords")
+            cursor.executemany(
+                "INSERT INTO xhs_keywords (keyword, heat, data, updated_at) VALUES (%s, %s, %s, %s)", rows
+            )
+            conn.commit()
+            cursor.close()
+            return len(rows)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def get_keywords(self) -> List[Dict[str, Any]]:
+        rows = self._fetch_all("SELECT data FROM xhs_keywords ORDER BY heat DESC")
+        return [json.loads(row['data']) for row in rows]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            stats = {}
+            cursor.execute("SELECT COUNT(*) FROM xhs_notes")
+            stats['total_notes'] = cursor.fetchone()[0]
+            cursor.execute("SELECT category, COUNT(*) AS n FROM xhs_notes GROUP BY category ORDER BY n DESC")
+            stats['notes_by_category'] = {(category or '未知'): n for category, n in cursor.fetchall()}
+            cursor.execute("SELECT COUNT(*) FROM xhs_notes WHERE crawl_time >= %s",
+                           (datetime.now() - timedelta(days=7),))
+            stats['recent_notes'] = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM xhs_keywords")
+            stats['total_keywords'] = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM xhs_topics")
+            stats['total_topics'] = cursor.fetchone()[0]
+            cursor.close()
+            return stats
+        finally:
+            conn.close()
+
+
+class MongoBackend(StorageBackend):
+    """基于 DatabaseManager 的存储；MongoDB 不可用时笔记和关键词落到文件存储"""
+
+    name = 'mongo'
+
+    def __init__(self, manager=None):
+        if manager is None:
+            from database_manager import db_manager as manager
+            if not manager.connected:
+                manager.connect()
+        self.manager = manager
+        self.rollups = manager.rollups
+
+    def save_notes(self, notes: List[Dict[str, Any]]) -> int:
+        summary = self.manager.bulk_save_notes([dict(note) for note in notes])
+        return len(notes) - len(summary['failed_ids']) - summary['skipped']
+
+    def get_notes(self, limit: int = 20, category: str = None, days: int = 7) -> List[Dict[str, Any]]:
+        return self.manager.get_notes(limit=limit, category=category, days=days)
+
+    def scan_notes(self, start: datetime, end: datetime = None, category: str = None,
+                   time_field: str = 'crawl_time') -> Iterator[Dict[str, Any]]:
+        end = end or datetime.now()
+        if not self.manager.connected:
+            for note in self.manager._get_note_store().iter_notes():
+                note_time = parse_time(note.get(time_field))
+                if note_time and start <= note_time < end and (not category or note.get('category') == category):
+                    yield note
+            return
+
+        query = {time_field: {'$gte': start, '$lt': end}}
+        if category:
+            query['category'] = category
+        collection = self.manager.db[self.manager.collections['notes']]
+        for note in collection.find(query, {'_id': 0}).sort(time_field, 1):
+            yield note
+
+    def save_topics(self, topics: List[Dict[str, Any]], day: date_type = None) -> int:
+        if not self.manager.connected:
+            logger.warning("MongoDB未连接，话题数据未保存")
+            return 0
+        from pymongo import UpdateOne
+
+        day = day or datetime.now().date()
+        operations = []
+        for topic in topics:
+            row = normalize_topic(topic, day)
+            row['date'] = day.isoformat()
+            operations.append(UpdateOne({'keyword': row['keyword'], 'date': row['date']}, {'$set': row}, upsert=True))
+        if operations:
+            self.manager.db[self.manager.collections['trends']].bulk_write(operations, ordered=False)
+        return len(operations)
+
+    def scan_topics(self, days: int = 7) -> List[Dict[str, Any]]:
+        if not self.manager.connected:
+            return []
+        since = (datetime.now().date() - timedelta(days=days)).isoformat()
+        cursor = self.manager.db[self.manager.collections['trends']].find(
+            {'date': {'$gte': since}}, {'_id': 0}
+        ).sort([('date', -1), ('heat_score', -1)])
+        topics = []
+        for topic in cursor:
+            topic['date'] = date_type.fromisoformat(topic['date'])
+            topics.append(topic)
+        return topics
+
+    def save_keywords(self, keywords: List[Dict[str, Any]]) -> int:
+        return len(keywords) if self.manager.save_keywords(keywords) else 0
+
+    def get_keywords(self) -> List[Dict[str, Any]]:
+        return self.manager.get_keywords()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        stats = dict(self.manager.get_statistics())
+        stats['total_topics'] = (self.manager.db[self.manager.collections['trends']].count_documents({})
+                                 if self.manager.connected else 0)
+        return stats
+
+    def get_write_metrics(self) -> Dict[str, Any]:
+        return self.manager.get_write_metrics()
+
+    def close(self):
+        self.manager.close()
+
+
+def create_backend(kind: str = 'sqlite', **options) -> StorageBackend:
+    """
+    创建存储后端
+
+    Args:
+        kind: 'sqlite' | 'mysql' | 'mongo'
+        options: 传给对应后端构造函数的参数（sqlite: path, rollups；mysql: db_config, rollups, pool_options；mongo: manager）
+    """
+    backends = {'sqlite': SQLiteBackend, 'mysql': MySQLBackend, 'mongo': MongoBackend, 'mongodb': MongoBackend}
+    if kind not in backends:
+        raise ValueError(f"未知的存储后端: {kind}，可选: sqlite / mysql / mongo")
+    return backends[kind](**options)
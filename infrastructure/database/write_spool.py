@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+写入暂存队列 - MongoDB 断开期间的持久化写入日志
+
+断开期间的写入以 JSONL 追加到暂存文件并 fsync，重新连接后按写入顺序批量回放。
+回放前先把文件改名为 .replaying，回放期间的新写入进入新的暂存文件；
+回放中途失败时 .replaying 文件保留，下次回放时优先处理。
+
+暂存文件超过 max_bytes 时就地压缩：同一篇笔记只保留最新一次写入，关键词只保留最后一份快照；
+压缩后仍超过 max_bytes 的 3/4 时从最旧的记录开始丢弃，丢弃条数记入 stats() 并输出警告。
+"""
+
+import json
+import os
+import threading
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WriteSpool:
+    def __init__(self, path: str, replay_batch_size: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        """
+        初始化暂存队列
+
+        Args:
+            path: 暂存文件路径
+            replay_batch_size: 回放时每批交给处理函数的笔记数量
+            max_bytes: 暂存文件的大小上限，超过后压缩，压缩后仍过大时丢弃最旧的记录
+        """
+        self.path = path
+        self.replaying_path = path + '.replaying'
+        self.replay_batch_size = replay_batch_size
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._counters = {'compactions': 0, 'compacted_notes': 0, 'dropped_entries': 0, 'dropped_records': 0}
+
+    def append(self, kind: str, data: List[Dict[str, Any]]):
+        """追加一次写入；kind 为 'notes'、'keywords' 或 'crawl_logs'"""
+        line = json.dumps({'kind': kind, 'spooled_at': datetime.now().isoformat(), 'data': data},
+                          ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            if self.max_bytes and size > self.max_bytes:
+                self._compact()
+
+    def _compact(self):
+        """压缩暂存文件（调用方持有 self._lock）"""
+        entries = list(self._iter_entries(self.path))
+
+        # 每篇笔记最后一次出现的位置，关键词只保留最后一份快照
+        latest: Dict[Any, int] = {}
+        last_keywords = None
+        for index, entry in enumerate(entries):
+            if entry['kind'] == 'keywords':
+                last_keywords = index
+            elif entry['kind'] == 'notes':
+                for note in entry['data']:
+                    note_id = note.get('id', note.get('note_id'))
+                    if note_id is not None:
+                        latest[note_id] = index
+
+        kept = []
+        for index, entry in enumerate(entries):
+            if entry['kind'] == 'keywords':
+                if index != last_keywords:
+                    continue
+            elif entry['kind'] == 'notes':
+                data = [note for note in entry['data']
+                        if latest.get(note.get('id', note.get('note_id')), index) == index]
+                self._counters['compacted_notes'] += len(entry['data']) - len(data)
+                if not data:
+                    continue
+                entry = {**entry, 'data': data}
+            kept.append(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+
+        # 仍然过大时从最旧的记录开始丢弃（保留最后一份关键词快照）
+        target = self.max_bytes * 3 // 4
+        size = sum(len(line.encode('utf-8')) for line in kept)
+        dropped_entries = dropped_records = 0
+        index = 0
+        while size > target and index < len(kept):
+            entry = json.loads(kept[index])
+            if entry['kind'] != 'keywords':
+                size -= len(kept[index].encode('utf-8'))
+                dropped_entries += 1
+                dropped_records += len(entry['data'])
+                kept[index] = None
+            index += 1
+        kept = [line for line in kept if line is not None]
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(kept)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        self._counters['compactions'] += 1
+        if dropped_entries:
+            self._counters['dropped_entries'] += dropped_entries
+            self._counters['dropped_records'] += dropped_records
+            logger.warning(f"⚠️ 暂存队列超过 {self.max_bytes / 1024 / 1024:.1f} MB，丢弃最旧的 {dropped_entries} 次写入"
+                           f"（{dropped_records} 条记录，累计丢弃 {self._counters['dropped_records']} 条）")
+        logger.info(f"🗜️ 暂存队列已压缩: {len(entries)} -> {len(kept)} 次写入，{size / 1024 / 1024:.1f} MB")
+
+    def stats(self) -> Dict[str, int]:
+        """压缩次数、压缩掉的重复笔记数和因超过上限丢弃的写入/记录数"""
+        with self._lock:
+            stats = dict(self._counters)
+        try:
+            stats['bytes'] = os.path.getsize(self.path)
+        except OSError:
+            stats['bytes'] = 0
+        return stats
+
+    def has_pending(self) -> bool:
+        return os.path.exists(self.path) or os.path.exists(self.replaying_path)
+
+    def replay(self, handler: Callable[[str, List[Dict[str, Any]], Optional[datetime]], None]) -> Dict[str, int]:
+        """
+        回放暂存的写入
+
+        笔记和爬取日志按批次交给 handler('notes', notes, spooled_at) / handler('crawl_logs', entries, spooled_at)；
+        关键词每次保存都是完整快照，只回放最后一次。spooled_at 为该批最后一条记录的暂存时间。
+
+        Returns:
+            回放的笔记条数、爬取日志条数和关键词快照数
+        """
+        result = {'notes': 0, 'crawl_logs': 0, 'keyword_snapshots': 0}
+        with self._replay_lock:
+            while True:
+                path = self._claim_file()
+                if path is None:
+                    break
+                keywords = None
+                batches: Dict[str, List[Dict[str, Any]]] = {'notes': [], 'crawl_logs': []}
+                spooled_at: Dict[str, Optional[datetime]] = {}
+
+                for entry in self._iter_entries(path):
+                    kind = entry['kind']
+                    spooled_at[kind] = self._spooled_at(entry)
+                    if kind == 'keywords':
+                        keywords = entry['data']
+                        continue
+                    batch = batches.setdefault(kind, [])
+                    batch.extend(entry['data'])
+                    if len(batch) >= self.replay_batch_size:
+                        handler(kind, batch, spooled_at[kind])
+                        result[kind] = result.get(kind, 0) + len(batch)
+                        batches[kind] = []
+
+                for kind, batch in batches.items():
+                    if batch:
+                        handler(kind, batch, spooled_at[kind])
+                        result[kind] = result.get(kind, 0) + len(batch)
+                if keywords is not None:
+                    handler('keywords', keywords, spooled_at['keywords'])
+                    result['keyword_snapshots'] += 1
+
+                os.remove(path)
+
+        if any(result.values()):
+            logger.info(f"📤 暂存写入回放完成: {result}")
+        return result
+
+    def _claim_file(self) -> Optional[str]:
+        """取出待回放的文件：先是上次未完成的 .replaying，再是当前暂存文件"""
+        with self._lock:
+            if os.path.exists(self.replaying_path):
+                return self.replaying_path
+            if not os.path.exists(self.path):
+                return None
+            os.replace(self.path, self.replaying_path)
+            return self.replaying_path
+
+    @staticmethod
+    def _spooled_at(entry: Dict[str, Any]) -> Optional[datetime]:
+        try:
+            return datetime.fromisoformat(entry['spooled_at'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _iter_entries(path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # 崩溃时写了一半的记录
@@ -4,7 +4,9 @@
 AI分析服务 - 智能数据分析和处理
 """
 
+import os
 import re
+import sys
 import json
 import math
 import random
@@ -12,6 +14,15 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Any, Tuple
 from collections import Counter, defaultdict
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'infrastructure', 'database'))
+
+from parquet_export import load_notes_table, snapshot_exists
+from category_classifier import get_classifier
+
+# generate_insights 用到的笔记字段
+INSIGHT_COLUMNS = ['title', 'content', 'category', 'like_count', 'comment_count',
+                   'share_count', 'view_count', 'publish_time']
+
 class AIAnalysisService:
     def __init__(self):
         """初始化AI分析服务"""
@@ -28,17 +39,8 @@ class AIAnalysisService:
             '不值', '坑', '翻车', '避雷', '慎买', '别买', '退货', '投诉'
         }
         
-        # 分类关键词
-        self.category_keywords = {
-            '美妆': ['口红', '粉底', '眼影', '睫毛膏', '腮红', '化妆', '彩妆', '美妆', '护肤品'],
-            '护肤': ['面膜', '精华', '乳液', '洁面', '防晒', '护肤', '保养', '抗老', '补水'],
-            '穿搭': ['穿搭', '搭配', '衣服', '裙子', '外套', '鞋子', '包包', '时尚', '风格'],
-            '美食': ['美食', '食谱', '烘焙', '餐厅', '小吃', '甜品', '料理', '做饭', '好吃'],
-            '旅行': ['旅行', '旅游', '攻略', '景点', '酒店', '机票', '签证', '游记', '打卡'],
-            '健身': ['健身', '运动', '瑜伽', '减肥', '塑形', '锻炼', '跑步', '健康', '体重'],
-            '数码': ['手机', '电脑', '相机', '耳机', '数码', '科技', '测评', '开箱', '配置'],
-            '家居': ['家居', '装修', '收纳', '家具', '装饰', '清洁', '整理', '布置', '设计']
-        }
+        # 分类关键词与爬虫共用同一个分类器和分类表
+        self.classifier = get_classifier()
         
     def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """情感分析"""
@@ -86,35 +88,15 @@ class AIAnalysisService:
         if not text:
             return {'category': '其他', 'confidence': 0.0, 'keywords': []}
         
-        text = text.lower()
-        category_scores = {}
-        matched_keywords = {}
-        
-        # 计算每个分类的匹配分数
-        for category, keywords in self.category_keywords.items():
-            score = 0
-            matched = []
-            for keyword in keywords:
-                if keyword in text:
-                    score += 1
-                    matched.append(keyword)
-            
-            if score > 0:
-                category_scores[category] = score
-                matched_keywords[category] = matched
-        
-        # 确定最佳分类
-        if not category_scores:
+        result = self.classifier.classify(text)
+        if not result['all_scores']:
             return {'category': '其他', 'confidence': 0.0, 'keywords': []}
         
-        best_category = max(category_scores.items(), key=lambda x: x[1])
-        confidence = min(1.0, best_category[1] / 3)  # 最多3个关键词匹配为满分
-        
         return {
-            'category': best_category[0],
-            'confidence': confidence,
-            'keywords': matched_keywords.get(best_category[0], []),
-            'all_scores': category_scores
+            'category': result['category'],
+            'confidence': result['confidence'],
+            'keywords': result['keywords'],
+            'all_scores': result['all_scores']
         }
     
     def calculate_engagement_score(self, data: Dict[str, Any]) -> float:
@@ -273,6 +255,28 @@ class AIAnalysisService:
             'daily_stats': {str(k): v for k, v in daily_stats.items()}
         }
     
+    def load_snapshot_notes(self, days: int = None, category: str = None,
+                            columns: List[str] = None) -> List[Dict[str, Any]]:
+        """
+        从 Parquet 快照加载笔记，只读取需要的列；没有快照时返回空列表
+        
+        Args:
+            days: 只加载最近 N 天爬取的笔记，None 表示全部
+            category: 只加载该分类
+            columns: 需要的列，默认为 generate_insights 用到的列
+        """
+        if not snapshot_exists():
+            return []
+        start = datetime.now() - timedelta(days=days) if days else None
+        table = load_notes_table(columns=columns or INSIGHT_COLUMNS, start=start, category=category)
+        notes = table.to_pylist()
+        for note in notes:
+            # 与 JSON 数据保持一致，时间使用 ISO 字符串
+            for field in ('publish_time', 'crawl_time'):
+                if isinstance(note.get(field), datetime):
+                    note[field] = note[field].isoformat()
+        return notes
+    
     def generate_insights(self, notes: List[Dict[str, Any]]) -> Dict[str, Any]:
         """生成智能洞察"""
         if not notes:
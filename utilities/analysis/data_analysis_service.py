@@ -5,18 +5,29 @@
 实现真实的数据分析算法：热度趋势、用户画像、内容分析等
 """
 
+# pandas 延迟导入，类型注解不在定义时求值
+from __future__ import annotations
+
 import sys
+import os
 import json
-import mysql.connector
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import logging
 from collections import Counter
-import jieba
 import re
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'infrastructure', 'database'))
+
+from lazy_import import lazy_module
+from storage_backends import create_backend
+from parquet_export import load_notes_frame, snapshot_exists
+from rollups import RollupStore
+from mysql_pool import get_pool
+
+# pandas 导入约需数百毫秒，第一次分析时才导入
+pd = lazy_module('pandas')
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,33 +42,51 @@ class DataAnalysisService:
             'database': 'xiaohongshu_data',
             'charset': 'utf8mb4'
         }
+        # 存储后端: mysql（默认）/ sqlite / mongo，与 RealCrawlerService 使用同一个环境变量
+        self.storage_kind = os.environ.get('XHS_STORAGE_BACKEND', 'mysql')
+        self.storage = None
+        # 写入时维护的关键词/分类指标汇总，所有存储后端共用
+        self.rollups = RollupStore()
+    
+    def get_storage(self):
+        """获取存储后端（首次使用时创建）"""
+        if self.storage is None:
+            if self.storage_kind == 'mysql':
+                self.storage = create_backend('mysql', db_config=self.db_config)
+            else:
+                self.storage = create_backend(self.storage_kind)
+        return self.storage
+    
+    def load_notes_snapshot(self, columns: List[str], days: int = None) -> pd.DataFrame:
+        """
+        从 Parquet 快照只读取需要的列（内存映射），没有快照时返回 None
+        
+        Args:
+            columns: 需要的列
+            days: 只读取最近 N 天爬取的笔记，None 表示全部
+        """
+        if not snapshot_exists():
+            return None
+        start = datetime.now() - timedelta(days=days) if days else None
+        return load_notes_frame(columns=columns, start=start)
     
     def get_db_connection(self):
-        """获取数据库连接"""
+        """从共享连接池借出数据库连接，close() 时归还"""
         try:
-            return mysql.connector.connect(**self.db_config)
+            return get_pool(self.db_config).get_connection()
         except Exception as e:
             logger.error(f"数据库连接失败: {e}")
             return None
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """MySQL 连接池的连接数和借出等待时间"""
+        return get_pool(self.db_config).stats()
+    
     def analyze_trending_topics(self, days: int = 7) -> Dict[str, Any]:
         """分析热门话题趋势"""
         try:
-            conn = self.get_db_connection()
-            if not conn:
-                return self._generate_mock_trend_analysis()
-            
             # 获取最近N天的话题数据
-            query = """
-                SELECT keyword, heat_score, note_count, total_likes, 
-                       total_comments, category, date
-                FROM xhs_topics 
-                WHERE date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
-                ORDER BY date DESC, heat_score DESC
-            """
-            
-            df = pd.read_sql(query, conn, params=(days,))
-            conn.close()
+            df = pd.DataFrame(self.get_storage().scan_topics(days))
             
             if df.empty:
                 return self._generate_mock_trend_analysis()
@@ -68,7 +97,9 @@ class DataAnalysisService:
                 "topGrowingTopics": self._analyze_topic_growth(df),
                 "engagementAnalysis": self._analyze_engagement_patterns(df),
                 "timeSeriesData": self._generate_time_series(df),
-                "predictedTrends": self._predict_future_trends(df)
+                "predictedTrends": self._predict_future_trends(df),
+                "categoryMetrics": self._rollup_metrics('category', days),
+                "keywordMetrics": self._rollup_metrics('keyword', days, limit=20)
             }
             
             return {
@@ -141,27 +172,27 @@ class DataAnalysisService:
     def analyze_content_performance(self) -> Dict[str, Any]:
         """分析内容表现"""
         try:
-            conn = self.get_db_connection()
-            if not conn:
-                return self._generate_mock_content_analysis()
-            
-            # 获取内容数据
-            query = """
-                SELECT title, content, category, like_count, comment_count, 
-                       share_count, view_count, publish_time, note_type,
-                       HOUR(publish_time) as publish_hour,
-                       DAYOFWEEK(publish_time) as publish_day
-                FROM xhs_notes 
-                WHERE publish_time >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-                AND is_deleted = FALSE
-            """
-            
-            df = pd.read_sql(query, conn)
-            conn.close()
+            # 获取最近30天发布的内容数据
+            columns = ['title', 'content', 'category', 'like_count', 'comment_count',
+                       'share_count', 'view_count', 'publish_time', 'note_type']
+            since = datetime.now() - timedelta(days=30)
+            df = self.load_notes_snapshot(columns)
+            if df is not None:
+                df = df[df['publish_time'] >= since].reset_index(drop=True)
+                df['category'] = df['category'].astype(str)
+                df['note_type'] = df['note_type'].astype(object).fillna('normal')
+            else:
+                notes = self.get_storage().scan_notes(since, time_field='publish_time')
+                df = pd.DataFrame(({c: note.get(c) for c in columns} for note in notes), columns=columns)
             
             if df.empty:
                 return self._generate_mock_content_analysis()
             
+            publish_time = pd.to_datetime(df['publish_time'])
+            df['publish_hour'] = publish_time.dt.hour
+            # 与 MySQL DAYOFWEEK 一致: 1 = 周日
+            df['publish_day'] = (publish_time.dt.dayofweek + 1) % 7 + 1
+            
             # 内容分析
             analysis = {
                 "performanceMetrics": self._analyze_performance_metrics(df),
@@ -185,6 +216,23 @@ class DataAnalysisService:
                 "data": self._generate_mock_content_analysis()
             }
     
+    def _rollup_metrics(self, dimension: str, days: int, limit: int = None) -> List[Dict[str, Any]]:
+        """从汇总表读取最近 days 天的笔记数和互动数，不扫描原始笔记"""
+        try:
+            rows = self.rollups.query(dimension, days, limit=limit)
+        except Exception as e:
+            logger.warning(f"读取指标汇总失败: {e}")
+            return []
+        
+        return [{
+            dimension: row['value'],
+            "notes": row['notes'],
+            "likes": row['likes'],
+            "comments": row['comments'],
+            "shares": row['shares'],
+            "views": row['views']
+        } for row in rows]
+    
     def _analyze_category_trends(self, df: pd.DataFrame) -> Dict[str, Any]:
         """分析分类趋势"""
         category_stats = df.groupby('category').agg({
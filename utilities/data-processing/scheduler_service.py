@@ -4,19 +4,18 @@
 定时任务调度器 - 实现数据的实时更新
 """
 
-import time
+import os
 import threading
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any, Callable
-import schedule
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from apscheduler.triggers.cron import CronTrigger
+from datetime import datetime
+from typing import Dict, Any
 
 # 导入我们的模块
 from real_xhs_crawler import RealXhsCrawler
-from database_manager import db_manager
+from crawl_orchestrator import CrawlOrchestrator
+from database_manager import get_db_manager
+from retention_engine import RetentionEngine
+from parquet_export import ParquetNoteExporter, PYARROW_AVAILABLE
 
 # 配置日志
 logging.basicConfig(
@@ -28,8 +27,19 @@ logger = logging.getLogger(__name__)
 class SchedulerService:
     def __init__(self):
         """初始化调度器服务"""
+        # apscheduler 在创建调度器时才导入，只导入本模块的命令不需要它
+        from apscheduler.schedulers.background import BackgroundScheduler
+
         self.scheduler = BackgroundScheduler()
+        self.db_manager = get_db_manager()
         self.crawler = RealXhsCrawler()
+        # 过期笔记删除前归档到 data/archive/notes/YYYY-MM-DD.jsonl.gz
+        self.retention_engine = RetentionEngine(
+            self.db_manager,
+            archive_dir=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'archive')
+        )
+        # 每批新爬取的笔记追加到 Parquet 快照，分析服务按列读取
+        self.snapshot_exporter = ParquetNoteExporter() if PYARROW_AVAILABLE else None
         self.running = False
         self.stats = {
             'total_runs': 0,
@@ -44,6 +54,8 @@ class SchedulerService:
     
     def setup_jobs(self):
         """设置定时任务"""
+        from apscheduler.triggers.interval import IntervalTrigger
+        from apscheduler.triggers.cron import CronTrigger
         
         # 1. 每30分钟更新热门话题
         self.scheduler.add_job(
@@ -85,7 +97,17 @@ class SchedulerService:
             replace_existing=True
         )
         
-        # 5. 每分钟检查系统状态（用于演示）
+        # 5. 每小时校正物化统计文档
+        self.scheduler.add_job(
+            func=self.reconcile_statistics,
+            trigger=IntervalTrigger(hours=1),
+            id='reconcile_statistics',
+            name='校正统计数据',
+            max_instances=1,
+            replace_existing=True
+        )
+        
+        # 6. 每分钟检查系统状态（用于演示）
         self.scheduler.add_job(
             func=self.health_check,
             trigger=IntervalTrigger(minutes=5),
@@ -105,17 +127,20 @@ class SchedulerService:
             # 获取热门关键词
             keywords = self.crawler.get_trending_keywords()
             
-            # 爬取每个关键词的热门内容
+            # 并发爬取每个关键词的热门内容，请求速率由共享令牌桶控制
             all_notes = []
-            for keyword_data in keywords[:5]:  # 只爬取前5个关键词
-                keyword = keyword_data['keyword']
-                notes = self.crawler.search_notes(keyword, limit=10)
-                all_notes.extend(notes)
-                time.sleep(2)  # 避免请求过快
+            orchestrator = CrawlOrchestrator(lambda keyword: self.crawler.search_notes(keyword, limit=10))
+            for result in orchestrator.run(k['keyword'] for k in keywords[:5]):  # 只爬取前5个关键词
+                # 记录来源关键词，用于按关键词汇总指标
+                for note in result['notes']:
+                    note.setdefault('keyword', result['keyword'])
+                all_notes.extend(result['notes'])
+            logger.info(f"🕸️ 关键词爬取: {orchestrator.last_run}")
             
             # 保存到数据库
-            if db_manager.connected or True:  # 总是尝试保存
-                db_manager.save_notes(all_notes)
+            if self.db_manager.connected or True:  # 总是尝试保存
+                self.db_manager.save_notes(all_notes)
+            self.export_snapshot(all_notes)
             
             self.stats['successful_runs'] += 1
             self.stats['last_run'] = datetime.now()
@@ -128,6 +153,15 @@ class SchedulerService:
         
         self.stats['total_runs'] += 1
     
+    def export_snapshot(self, notes):
+        """把新爬取的笔记追加到 Parquet 快照"""
+        if not self.snapshot_exporter or not notes:
+            return
+        try:
+            self.snapshot_exporter.append(notes)
+        except Exception as e:
+            logger.error(f"❌ 导出 Parquet 快照失败: {e}")
+    
     def update_trending_keywords(self):
         """更新热门关键词"""
         try:
@@ -137,8 +171,8 @@ class SchedulerService:
             keywords = self.crawler.get_trending_keywords()
             
             # 保存到数据库
-            if db_manager.connected or True:
-                db_manager.save_keywords(keywords)
+            if self.db_manager.connected or True:
+                self.db_manager.save_keywords(keywords)
             
             logger.info(f"✅ 热门关键词更新完成，获取 {len(keywords)} 个关键词")
             
@@ -150,28 +184,41 @@ class SchedulerService:
         try:
             logger.info("🧹 开始清理旧数据...")
             
-            # 这里可以实现清理逻辑
-            # 例如：删除30天前的数据
-            cutoff_date = datetime.now() - timedelta(days=30)
+            # 删除30天前的笔记和爬取日志，分批限速执行，中断后下次运行从检查点继续
+            report = self.retention_engine.run(note_days=30, log_days=30)
+            self.stats['last_cleanup'] = report
+            
+            # 合并快照中每天累积的小文件
+            if self.snapshot_exporter:
+                self.snapshot_exporter.compact()
             
-            # 如果使用MongoDB，可以删除旧数据
-            # if db_manager.connected:
-            #     db_manager.db[db_manager.collections['notes']].delete_many({
-            #         'crawl_time': {'$lt': cutoff_date.isoformat()}
-            #     })
+            # 超过保留期的小时汇总合并为天汇总
+            self.db_manager.rollups.downsample()
             
-            logger.info("✅ 旧数据清理完成")
+            logger.info(f"✅ 旧数据清理完成: 笔记 {report['notes']['deleted']} 条, 日志 {report['logs']['deleted']} 条")
             
         except Exception as e:
             logger.error(f"❌ 清理旧数据失败: {e}")
     
+    def reconcile_statistics(self):
+        """校正统计数据"""
+        try:
+            if not self.db_manager.connected:
+                return
+            
+            logger.info("🔧 开始校正统计数据...")
+            self.db_manager.reconcile_statistics()
+            
+        except Exception as e:
+            logger.error(f"❌ 校正统计数据失败: {e}")
+    
     def generate_analysis_report(self):
         """生成分析报告"""
         try:
             logger.info("📊 开始生成分析报告...")
             
             # 获取统计信息
-            stats = db_manager.get_statistics()
+            stats = self.db_manager.get_statistics()
             
             # 生成报告
             report = {
@@ -190,7 +237,7 @@ class SchedulerService:
             
             report_file = os.path.join(reports_dir, f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
             with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(report, f, ensure_ascii=False, indent=2)
+                json.dump(report, f, ensure_ascii=False, indent=2, default=str)
             
             logger.info(f"✅ 分析报告生成完成: {report_file}")
             
@@ -203,10 +250,10 @@ class SchedulerService:
             logger.info("💓 执行系统健康检查...")
             
             # 检查数据库连接
-            db_status = "connected" if db_manager.connected else "file_storage"
+            db_status = "connected" if self.db_manager.connected else "file_storage"
             
             # 检查最近的数据更新时间
-            notes = db_manager.get_notes(limit=1)
+            notes = self.db_manager.get_notes(limit=1)
             last_data_update = "unknown"
             if notes:
                 last_data_update = notes[0].get('crawl_time', 'unknown')
@@ -229,7 +276,7 @@ class SchedulerService:
         """启动调度器"""
         try:
             # 连接数据库
-            db_manager.connect()
+            self.db_manager.connect()
             
             # 启动调度器
             self.scheduler.start()
@@ -256,7 +303,7 @@ class SchedulerService:
         try:
             self.scheduler.shutdown()
             self.running = False
-            db_manager.close()
+            self.db_manager.close()
             
             logger.info("🛑 定时任务调度器已停止")
             
@@ -278,7 +325,7 @@ class SchedulerService:
             'running': self.running,
             'stats': self.stats,
             'jobs': jobs_info,
-            'database_connected': db_manager.connected
+            'database_connected': self.db_manager.connected
         }
     
     def run_job_now(self, job_id: str) -> bool:
@@ -297,12 +344,25 @@ class SchedulerService:
             logger.error(f"❌ 执行任务失败: {e}")
             return False
 
-# 全局调度器实例
-scheduler_service = SchedulerService()
+_scheduler_service = None
+
+def get_scheduler_service() -> SchedulerService:
+    """全局调度器实例（首次使用时创建）"""
+    global _scheduler_service
+    if _scheduler_service is None:
+        _scheduler_service = SchedulerService()
+    return _scheduler_service
+
+def __getattr__(name):
+    # 兼容 from scheduler_service import scheduler_service
+    if name == 'scheduler_service':
+        return get_scheduler_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def main():
     """主函数 - 演示调度器功能"""
     print("🚀 启动定时任务调度器...")
+    scheduler_service = get_scheduler_service()
     
     try:
         # 启动调度器